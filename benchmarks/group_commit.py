@@ -0,0 +1,94 @@
+import tempfile
+import threading
+from pathlib import Path
+from time import perf_counter
+
+from core.transaction import Transaction
+from core.wallet import Wallet
+from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.migration_sqlite import migrate
+from infra.sqlite.transaction_statistic_sqlite import TransactionStatisticSqlite
+from infra.sqlite.wallet_sqlite import WalletSqlite
+
+WRITERS = 16
+TRANSFERS_PER_WRITER = 50
+GROUP_COMMIT_SIZES = (0, 8, 32, 128)
+GROUP_COMMIT_WINDOW = 0.002
+
+
+def transfer(
+    repo: WalletSqlite,
+    statistics: TransactionStatisticSqlite,
+    wallet: Wallet,
+    sink: Wallet,
+) -> None:
+    for _ in range(TRANSFERS_PER_WRITER):
+        transaction = Transaction(
+            private_key=wallet.get_private_key(),
+            from_key=wallet.get_public_key(),
+            to_key=sink.get_public_key(),
+            amount=1,
+        )
+        repo.transfer(transaction, statistics)
+
+
+def run() -> None:
+    print(f"{'size':>6} {'transfers/s':>12} {'batches':>8} {'ms wait':>8}")
+    for size in GROUP_COMMIT_SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            database_path = str(Path(directory) / "benchmark.db")
+            sqlite_database = SqliteDatabase(
+                database_path,
+                pool_size=WRITERS,
+                group_commit_size=size,
+                group_commit_window=GROUP_COMMIT_WINDOW,
+            )
+            migrate(sqlite_database)
+            repo = WalletSqlite(sqlite_database)
+            statistics = TransactionStatisticSqlite(sqlite_database)
+
+            # Every writer pays into its own sink wallet, so transfers only
+            # contend on the write lock and never on a balance.
+            pairs = []
+            for _ in range(WRITERS):
+                wallet = Wallet(balance=10 * TRANSFERS_PER_WRITER)
+                sink = Wallet()
+                repo.create(wallet)
+                repo.create(sink)
+                pairs.append((wallet, sink))
+
+            group_commit = sqlite_database.group_commit
+            batches_before = 0 if group_commit is None else group_commit.get_batches()
+            wait_before = 0.0 if group_commit is None else group_commit.get_wait_time()
+
+            threads = [
+                threading.Thread(target=transfer, args=(repo, statistics, wallet, sink))
+                for wallet, sink in pairs
+            ]
+            start = perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = perf_counter() - start
+
+            transfers = WRITERS * TRANSFERS_PER_WRITER
+            batches = (
+                transfers
+                if group_commit is None
+                else group_commit.get_batches() - batches_before
+            )
+            wait = (
+                0.0
+                if group_commit is None
+                else group_commit.get_wait_time() - wait_before
+            )
+            print(
+                f"{size:>6} {transfers / elapsed:>12.0f} {batches:>8}"
+                f" {wait / transfers * 1000:>8.2f}"
+            )
+            sqlite_database.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,99 @@
+import os
+import random
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from uuid import uuid4
+
+from infra.sqlite.database_sqlite import KEY_FORMATS, SqliteDatabase
+from infra.sqlite.migration_sqlite import convert_keys, migrate
+from infra.sqlite.wallet_sqlite import WalletSqlite
+
+WALLETS = 20_000
+TRANSACTIONS = 100_000
+READS = 20_000
+
+
+def load(sqlite_database: SqliteDatabase) -> list[bytes | str]:
+    encode = sqlite_database.encode_key
+    wallets = [(encode(uuid4()), encode(uuid4())) for _ in range(WALLETS)]
+    transactions = []
+    links = []
+    for _ in range(TRANSACTIONS):
+        key = encode(uuid4())
+        from_key, private_key = random.choice(wallets)
+        to_key, _ = random.choice(wallets)
+        transactions.append((key, to_key, private_key, from_key))
+        links.append((from_key, key))
+        links.append((to_key, key))
+
+    connection = sqlite3.connect(sqlite_database.database_path)
+    connection.executemany(
+        "INSERT INTO wallets (public_key, private_key, balance) VALUES (?, ?, 1)",
+        wallets,
+    )
+    connection.executemany(
+        "INSERT INTO transactions (key, to_key, private_key, from_key, amount) "
+        "VALUES (?, ?, ?, ?, 1)",
+        transactions,
+    )
+    connection.executemany(
+        "INSERT INTO wallets_transactions (wallet_key, transaction_key) "
+        "VALUES (?, ?)",
+        links,
+    )
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+
+    return [public_key for public_key, _ in wallets]
+
+
+def index_depths(database_path: str) -> dict[str, int]:
+    connection = sqlite3.connect(database_path)
+    rows = connection.execute(
+        "SELECT name, MAX(length(path) - length(replace(path, '/', ''))) "
+        "FROM dbstat WHERE name IN "
+        "(SELECT name FROM sqlite_master WHERE type = 'index') GROUP BY name"
+    ).fetchall()
+    connection.close()
+    return {name: depth for name, depth in rows}
+
+
+def run() -> None:
+    for key_format in KEY_FORMATS:
+        with tempfile.TemporaryDirectory() as directory:
+            database_path = str(Path(directory) / "benchmark.db")
+            sqlite_database = SqliteDatabase(database_path)
+            migrate(sqlite_database)
+            convert_keys(sqlite_database, key_format)
+            wallet_keys = load(sqlite_database)
+            repo = WalletSqlite(sqlite_database)
+
+            sample = [
+                sqlite_database.decode_key(random.choice(wallet_keys))
+                for _ in range(READS)
+            ]
+            start = perf_counter()
+            for wallet_key in sample:
+                repo.get_header(wallet_key)
+            header_rate = READS / (perf_counter() - start)
+
+            start = perf_counter()
+            for wallet_key in sample[: READS // 10]:
+                repo.get(wallet_key)
+            wallet_rate = READS // 10 / (perf_counter() - start)
+
+            size = os.path.getsize(database_path) / 2**20
+            print(f"key format: {key_format}")
+            print(f"  database size:  {size:8.2f} MiB")
+            for name, depth in sorted(index_depths(database_path).items()):
+                print(f"  depth {name}: {depth}")
+            print(f"  get_header/s:   {header_rate:8.0f}")
+            print(f"  get/s:          {wallet_rate:8.0f}")
+            sqlite_database.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,59 @@
+import sqlite3
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from uuid import uuid4
+
+from core.wallet import Wallet
+from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.migration_sqlite import migrate
+from infra.sqlite.wallet_sqlite import WalletSqlite
+
+HISTORY_SIZES = (10, 100, 1_000, 10_000, 50_000)
+ROUNDS = 5
+
+
+def load_history(database_path: str, wallet: Wallet, size: int) -> None:
+    wallet_key = str(wallet.get_public_key())
+    keys = [str(uuid4()) for _ in range(size)]
+
+    connection = sqlite3.connect(database_path)
+    connection.executemany(
+        "INSERT INTO transactions (key, to_key, private_key, from_key, amount) "
+        "VALUES (?, ?, ?, ?, 1)",
+        [(key, str(uuid4()), wallet_key, wallet_key) for key in keys],
+    )
+    connection.executemany(
+        "INSERT INTO wallets_transactions (wallet_key, transaction_key) "
+        "VALUES (?, ?)",
+        [(wallet_key, key) for key in keys],
+    )
+    connection.commit()
+    connection.close()
+
+
+def run() -> None:
+    print(f"{'history':>8} {'queries':>8} {'ms/get':>10}")
+    for size in HISTORY_SIZES:
+        with tempfile.TemporaryDirectory() as directory:
+            database_path = str(Path(directory) / "benchmark.db")
+            sqlite_database = SqliteDatabase(database_path)
+            migrate(sqlite_database)
+            repo = WalletSqlite(sqlite_database)
+            wallet = Wallet()
+            repo.create(wallet)
+            load_history(database_path, wallet, size)
+
+            before = sqlite_database.get_query_count()
+            start = perf_counter()
+            for _ in range(ROUNDS):
+                repo.get(wallet.get_public_key())
+            elapsed = perf_counter() - start
+            queries = (sqlite_database.get_query_count() - before) // ROUNDS
+
+            print(f"{size:>8} {queries:>8} {elapsed / ROUNDS * 1000:>10.2f}")
+            sqlite_database.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -2,12 +2,46 @@ from typing import Any
 from uuid import UUID
 
 MAX_WALLETS_PER_USER = 3
+TRANSACTIONS_PAGE_LIMIT = 1000
+TRANSACTIONS_BATCH_LIMIT = 1000
+PAYOUT_LEGS_LIMIT = 1000
+SETTLEMENT_QUEUE_DEPTH = 10_000
+SETTLEMENT_BATCH_SIZE = 500
+SETTLEMENT_WORKERS = 1
+SETTLEMENT_POLL_INTERVAL = 0.1
+SETTLEMENT_RESULTS_LIMIT = 100_000
+TRANSACTIONS_EXPORT_CHUNK_SIZE = 500
 DB_PATH = "../main_sqlite.db"
 TEST_DB_PATH = "../test_sqlite.db"
+DB_POOL_SIZE = 8
+DB_POOL_TIMEOUT = 5.0
+DB_POOL_HEALTH_CHECK_INTERVAL = 30.0
+DB_FETCH_SIZE = 500
+DB_GROUP_COMMIT_SIZE = 0
+DB_GROUP_COMMIT_WINDOW = 0.002
+DB_KEY_FORMAT = "text"
+DB_PRAGMA_PROFILE = "balanced"
+DB_CHECKPOINT_INTERVAL = 30.0
+DB_CHECKPOINT_TRUNCATE_FRAMES = 10_000
+USER_CACHE_SIZE = 10_000
+USER_CACHE_TTL = 60.0
 ADMIN_API_KEY = UUID("002aa904-5f6d-4fa0-8bc6-e79094d3b599")
 BITCOIN = 10**8
+DOLLAR = 10**6
 TRANSFER_FEE = 0.015
+STATISTICS_GRANULARITIES: dict[str, int] = {"hour": 3600, "day": 86400}
 CONVERTER_URL = "https://blockchain.info/ticker"
+COINBASE_CONVERTER_URL = "https://api.coinbase.com/v2/exchange-rates?currency=BTC"
+RATE_PROVIDER_TIMEOUT = 2.0
+RATE_PROVIDER_POOL_SIZE = 4
+RATE_HEDGE_DELAY = 0.3
+RATE_DEADLINE = 3.0
+RATE_BREAKER_FAILURES = 3
+RATE_BREAKER_RESET = 30.0
+USD = "USD"
+STUB_BTC_RATES: dict[str, float] = {"USD": 50000.0, "EUR": 46000.0, "GBP": 39500.0}
+RATE_CACHE_TTL = 30.0
+RATE_MAX_STALENESS = 600.0
 ERROR_RESPONSES: dict[int, Any] = {
     401: {
         "content": {
@@ -97,4 +131,18 @@ ERROR_RESPONSES: dict[int, Any] = {
             }
         }
     },
+    422: {
+        "content": {
+            "application/json": {
+                "example": {"error": {"message": "Invalid cursor <cursor>."}}
+            }
+        }
+    },
+    503: {
+        "content": {
+            "application/json": {
+                "example": {"error": {"message": "Settlement queue is full."}}
+            }
+        }
+    },
 }
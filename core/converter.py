@@ -1,18 +1,183 @@
-from typing import Any
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from time import monotonic, time
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
 
 import requests
+from requests import RequestException
 
-from constants import CONVERTER_URL
+from constants import (
+    CONVERTER_URL,
+    RATE_CACHE_TTL,
+    RATE_MAX_STALENESS,
+    RATE_PROVIDER_TIMEOUT,
+    USD,
+)
 from core.errors import ConversionError
+from core.rate_history import RateHistoryRepository
 
 
 def get_btc_to_usd_rate() -> Any:
     url = CONVERTER_URL
 
-    response = requests.get(url)
+    response = requests.get(url, timeout=RATE_PROVIDER_TIMEOUT)
 
     if response.status_code == 200:
         data = response.json()
         return data["USD"]["last"]
 
     raise ConversionError()
+
+
+def get_btc_ticker() -> dict[str, float]:
+    url = CONVERTER_URL
+
+    response = requests.get(url, timeout=RATE_PROVIDER_TIMEOUT)
+
+    if response.status_code == 200:
+        return parse_ticker(response.json())
+
+    raise ConversionError()
+
+
+def parse_ticker(data: Any) -> dict[str, float]:
+    return {currency: float(quote["last"]) for currency, quote in data.items()}
+
+
+class RateProvider(ABC):
+    @abstractmethod
+    def fetch_rates(self) -> dict[str, float]:
+        pass
+
+    def fetch_rate(self) -> float:
+        rates = self.fetch_rates()
+        if USD not in rates:
+            raise ConversionError(USD)
+        return rates[USD]
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass(frozen=True)
+class Rate:
+    values: Mapping[str, float]
+    age: float
+
+    def get_value(self, currency: str = USD) -> float:
+        try:
+            return self.values[currency.upper()]
+        except KeyError:
+            raise ConversionError(currency)
+
+    def get_currencies(self) -> list[str]:
+        return sorted(self.values)
+
+    def get_age(self) -> float:
+        return self.age
+
+
+@dataclass
+class RateCache:
+    fetch: Callable[[], Any] = get_btc_ticker
+    ttl: float = RATE_CACHE_TTL
+    max_staleness: float = RATE_MAX_STALENESS
+    clock: Callable[[], float] = field(default=monotonic)
+    history: RateHistoryRepository | None = None
+    wall_clock: Callable[[], float] = field(default=time)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Mapping[str, float] | None = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._stopped = threading.Event()
+        self._refresher: threading.Thread | None = None
+
+    def get_rate(self) -> Rate:
+        rate = self._cached()
+        if rate is not None and rate.get_age() < self.ttl:
+            return rate
+
+        if rate is not None and rate.get_age() < self.max_staleness:
+            self._refresh_in_background()
+            return rate
+
+        self.refresh()
+        rate = self._cached()
+        if rate is None or rate.get_age() >= self.max_staleness:
+            raise ConversionError()
+        return rate
+
+    def refresh(self) -> bool:
+        try:
+            values = _to_snapshot(self.fetch())
+        except (ConversionError, RequestException, KeyError, TypeError, ValueError):
+            return False
+
+        with self._lock:
+            previous = self._values or {}
+            self._values = values
+            self._fetched_at = self.clock()
+
+        if self.history is not None:
+            changed = {
+                currency: rate
+                for currency, rate in values.items()
+                if previous.get(currency) != rate
+            }
+            if len(changed) > 0:
+                self.history.record(changed, self.wall_clock())
+        return True
+
+    def start(self) -> None:
+        if self._refresher is not None:
+            return
+
+        self._stopped.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh_periodically, name="rate-refresher", daemon=True
+        )
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _cached(self) -> Rate | None:
+        with self._lock:
+            if self._values is None:
+                return None
+            return Rate(self._values, self.clock() - self._fetched_at)
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run() -> None:
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="rate-revalidate", daemon=True).start()
+
+    def _refresh_periodically(self) -> None:
+        while not self._stopped.is_set():
+            self.refresh()
+            self._stopped.wait(self.ttl / 2)
+
+
+def _to_snapshot(fetched: Any) -> Mapping[str, float]:
+    if isinstance(fetched, Mapping):
+        return MappingProxyType(
+            {str(currency).upper(): float(rate) for currency, rate in fetched.items()}
+        )
+    return MappingProxyType({USD: float(fetched)})
@@ -44,3 +44,15 @@ class TransactionStatisticDoesNotExistError(Exception):
 
 class InvalidAdminAPIKeyError(Exception):
     pass
+
+
+class ConnectionPoolTimeoutError(Exception):
+    pass
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+class SettlementQueueFullError(Exception):
+    pass
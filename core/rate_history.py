@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import Mapping
+
+
+class RateHistoryRepository(ABC):
+    @abstractmethod
+    def record(self, rates: Mapping[str, float], recorded_at: float) -> None:
+        pass
+
+    @abstractmethod
+    def get_rate_at(self, currency: str, at: float) -> float | None:
+        pass
+
+    @abstractmethod
+    def get_rates_at(self, currency: str, times: list[float]) -> list[float | None]:
+        pass
@@ -0,0 +1,158 @@
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from queue import Empty, Full, Queue
+from uuid import UUID
+
+from constants import (
+    SETTLEMENT_BATCH_SIZE,
+    SETTLEMENT_POLL_INTERVAL,
+    SETTLEMENT_QUEUE_DEPTH,
+    SETTLEMENT_RESULTS_LIMIT,
+    SETTLEMENT_WORKERS,
+)
+from core.errors import SettlementQueueFullError, TransactionDoesNotExistError
+from core.transaction import Transaction
+from core.transaction_statistic import (
+    TRANSFER_ERRORS,
+    TransactionStatisticRepository,
+    TransferResult,
+)
+from core.wallet import WalletRepository
+
+PENDING = "pending"
+SETTLED = "settled"
+REJECTED = "rejected"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Settlement:
+    transaction: Transaction
+    status: str = PENDING
+    error: Exception | None = None
+
+    def get_transaction(self) -> Transaction:
+        return self.transaction
+
+    def get_status(self) -> str:
+        return self.status
+
+    def get_error(self) -> Exception | None:
+        return self.error
+
+
+@dataclass
+class SettlementQueue:
+    wallets: WalletRepository
+    statistics: TransactionStatisticRepository
+    max_depth: int = SETTLEMENT_QUEUE_DEPTH
+    batch_size: int = SETTLEMENT_BATCH_SIZE
+    workers: int = SETTLEMENT_WORKERS
+    poll_interval: float = SETTLEMENT_POLL_INTERVAL
+    results_limit: int = SETTLEMENT_RESULTS_LIMIT
+
+    def __post_init__(self) -> None:
+        self._queue: Queue[Transaction] = Queue(self.max_depth)
+        self._lock = threading.Lock()
+        self._pending: dict[UUID, Settlement] = {}
+        self._finished: OrderedDict[UUID, Settlement] = OrderedDict()
+        self._stopped = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._batches = 0
+
+    def submit(self, transaction: Transaction) -> Settlement:
+        settlement = Settlement(transaction)
+        with self._lock:
+            self._pending[transaction.get_key()] = settlement
+        try:
+            self._queue.put_nowait(transaction)
+        except Full:
+            with self._lock:
+                del self._pending[transaction.get_key()]
+            raise SettlementQueueFullError(self.max_depth)
+        return settlement
+
+    def get(self, key: UUID) -> Settlement:
+        with self._lock:
+            settlement = self._pending.get(key) or self._finished.get(key)
+        if settlement is None:
+            raise TransactionDoesNotExistError(key)
+        return settlement
+
+    def get_depth(self) -> int:
+        return self._queue.qsize()
+
+    def get_batches(self) -> int:
+        return self._batches
+
+    def settle(self, timeout: float = 0) -> int:
+        batch = self._take(timeout)
+        if len(batch) == 0:
+            return 0
+
+        results: list[TransferResult]
+        try:
+            results = self.wallets.transfer_many(batch, self.statistics)
+        except Exception as error:
+            logger.exception("Settling a batch of %d transfers failed.", len(batch))
+            results = [error] * len(batch)
+
+        with self._lock:
+            self._batches += 1
+            for transaction, result in zip(batch, results):
+                settlement = self._pending.pop(transaction.get_key())
+                if isinstance(result, TRANSFER_ERRORS):
+                    settlement.status = REJECTED
+                    settlement.error = result
+                elif isinstance(result, Exception):
+                    settlement.status = FAILED
+                    settlement.error = result
+                else:
+                    settlement.status = SETTLED
+                self._finished[transaction.get_key()] = settlement
+            while len(self._finished) > self.results_limit:
+                self._finished.popitem(last=False)
+        return len(batch)
+
+    def start(self) -> None:
+        if len(self._threads) > 0:
+            return
+
+        self._stopped.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._settle_continuously,
+                name=f"settlement-worker-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        while self.settle() > 0:
+            pass
+
+    def _take(self, timeout: float) -> list[Transaction]:
+        try:
+            batch = [self._queue.get(timeout > 0, timeout)]
+        except Empty:
+            return []
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _settle_continuously(self) -> None:
+        while not self._stopped.is_set():
+            self.settle(self.poll_interval)
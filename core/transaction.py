@@ -1,7 +1,13 @@
+from __future__ import annotations
+
+import binascii
 from abc import abstractmethod
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from dataclasses import dataclass, field
+from time import time
 from uuid import UUID, uuid4
 
+from core.errors import InvalidCursorError
 from core.repositories import RepositoryABC
 
 
@@ -12,6 +18,7 @@ class Transaction:
     private_key: UUID = field(default_factory=uuid4)
     from_key: UUID = field(default_factory=uuid4)
     amount: int = 1
+    created_at: float = field(default_factory=time)
 
     def get_key(self) -> UUID:
         return self.key
@@ -28,12 +35,47 @@ class Transaction:
     def get_amount(self) -> int:
         return self.amount
 
+    def get_created_at(self) -> float:
+        return self.created_at
+
+    def get_cursor(self) -> TransactionCursor:
+        return TransactionCursor(self.created_at, self.key)
+
+
+@dataclass(frozen=True, order=True)
+class TransactionCursor:
+    created_at: float
+    key: UUID
+
+    def get_created_at(self) -> float:
+        return self.created_at
+
+    def get_key(self) -> UUID:
+        return self.key
+
+    def encode(self) -> str:
+        token = f"{self.created_at!r}/{self.key}".encode()
+        return urlsafe_b64encode(token).decode().rstrip("=")
+
+    @staticmethod
+    def decode(token: str) -> TransactionCursor:
+        try:
+            raw = urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            created_at, key = raw.split("/")
+            return TransactionCursor(float(created_at), UUID(key))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidCursorError(token)
+
 
 class TransactionRepository(RepositoryABC[Transaction]):
     @abstractmethod
     def create(self, transaction: Transaction) -> None:
         pass
 
+    @abstractmethod
+    def create_many(self, transactions: list[Transaction]) -> None:
+        pass
+
     @abstractmethod
     def get(self, transaction_key: UUID) -> Transaction:
         pass
@@ -1,12 +1,21 @@
 from abc import abstractmethod
 from dataclasses import dataclass, field
 from math import ceil
+from time import time
+from typing import Sequence
 from uuid import UUID, uuid4
 
-from constants import TRANSFER_FEE
-from core.errors import NotEnoughBalanceError
+from constants import BITCOIN, DOLLAR, STATISTICS_GRANULARITIES, TRANSFER_FEE, USD
+from core.errors import (
+    InvalidOwnerError,
+    NotEnoughBalanceError,
+    SameWalletsError,
+    WalletDoesNotExistError,
+)
+from core.rate_history import RateHistoryRepository
 from core.repositories import RepositoryABC
-from core.wallet import Wallet, WalletRepository
+from core.transaction import Transaction
+from core.wallet import WalletHeader, WalletRepository
 
 
 @dataclass
@@ -14,6 +23,9 @@ class TransactionStatistic:
     key: UUID = field(default_factory=uuid4)
     transaction_key: UUID = field(default_factory=uuid4)
     profit: int = 0
+    amount: int = 0
+    created_at: float = field(default_factory=time)
+    profit_usd: int | None = None
 
     def get_key(self) -> UUID:
         return self.key
@@ -24,15 +36,23 @@ class TransactionStatistic:
     def get_profit(self) -> int:
         return self.profit
 
+    def get_amount(self) -> int:
+        return self.amount
+
+    def get_created_at(self) -> float:
+        return self.created_at
+
+    def get_profit_usd(self) -> int | None:
+        return self.profit_usd
+
     def system_update(
         self,
         wallet_repo: WalletRepository,
-        from_wallet: Wallet,
-        to_wallet: Wallet,
+        from_wallet: WalletHeader,
+        to_wallet: WalletHeader,
         transaction_amount: int,
     ) -> None:
-        if from_wallet.get_private_key() != to_wallet.get_private_key():
-            self.profit = ceil(transaction_amount * TRANSFER_FEE)
+        self.profit = get_transfer_fee(from_wallet, to_wallet, transaction_amount)
         required_amount = transaction_amount + self.profit
 
         if from_wallet.get_balance() < required_amount:
@@ -45,6 +65,28 @@ class TransactionStatistic:
 class Statistics:
     transactions_number: int = 0
     platform_profit: int = 0
+    platform_profit_usd: int = 0
+
+    def get_transactions_number(self) -> int:
+        return self.transactions_number
+
+    def get_platform_profit(self) -> int:
+        return self.platform_profit
+
+    def get_platform_profit_usd(self) -> int:
+        return self.platform_profit_usd
+
+
+@dataclass
+class StatisticsBucket:
+    start: int
+    transactions_number: int = 0
+    platform_profit: int = 0
+    volume: int = 0
+    platform_profit_usd: int = 0
+
+    def get_start(self) -> int:
+        return self.start
 
     def get_transactions_number(self) -> int:
         return self.transactions_number
@@ -52,12 +94,149 @@ class Statistics:
     def get_platform_profit(self) -> int:
         return self.platform_profit
 
+    def get_volume(self) -> int:
+        return self.volume
+
+    def get_platform_profit_usd(self) -> int:
+        return self.platform_profit_usd
+
+
+def get_transfer_fee(
+    from_wallet: WalletHeader, to_wallet: WalletHeader, amount: int
+) -> int:
+    if from_wallet.get_private_key() == to_wallet.get_private_key():
+        return 0
+    return ceil(amount * TRANSFER_FEE)
+
+
+TransferResult = TransactionStatistic | Exception
+TRANSFER_ERRORS = (
+    InvalidOwnerError,
+    NotEnoughBalanceError,
+    SameWalletsError,
+    WalletDoesNotExistError,
+)
+
+
+def plan_transfers(
+    transactions: list[Transaction], headers: dict[UUID, WalletHeader]
+) -> list[TransferResult]:
+    balances = {key: header.get_balance() for key, header in headers.items()}
+    results: list[TransferResult] = []
+    for transaction in transactions:
+        try:
+            results.append(_plan_transfer(transaction, headers, balances))
+        except TRANSFER_ERRORS as error:
+            results.append(error)
+
+    return results
+
+
+def plan_payout(
+    user_key: UUID,
+    from_key: UUID,
+    legs: list[tuple[UUID, int]],
+    headers: dict[UUID, WalletHeader],
+) -> tuple[list[Transaction], list[TransactionStatistic]]:
+    created_at = time()
+    transactions = [
+        Transaction(
+            to_key=to_key,
+            private_key=user_key,
+            from_key=from_key,
+            amount=amount,
+            created_at=created_at,
+        )
+        for to_key, amount in legs
+    ]
+
+    planned = []
+    for result in plan_transfers(transactions, headers):
+        if isinstance(result, Exception):
+            raise result
+        planned.append(result)
+
+    return transactions, planned
+
+
+def get_balance_changes(
+    transactions: list[Transaction], results: Sequence[TransferResult]
+) -> dict[UUID, int]:
+    changes: dict[UUID, int] = {}
+    for transaction, result in zip(transactions, results):
+        if isinstance(result, TransactionStatistic):
+            from_key = transaction.get_from_key()
+            to_key = transaction.get_to_key()
+            amount = transaction.get_amount()
+            changes[from_key] = changes.get(from_key, 0) - amount - result.get_profit()
+            changes[to_key] = changes.get(to_key, 0) + amount
+
+    return changes
+
+
+def _plan_transfer(
+    transaction: Transaction,
+    headers: dict[UUID, WalletHeader],
+    balances: dict[UUID, int],
+) -> TransactionStatistic:
+    from_key = transaction.get_from_key()
+    to_key = transaction.get_to_key()
+    if from_key not in headers:
+        raise WalletDoesNotExistError(from_key)
+    if headers[from_key].get_private_key() != transaction.get_private_key():
+        raise InvalidOwnerError(transaction.get_private_key())
+    if to_key not in headers:
+        raise WalletDoesNotExistError(to_key)
+    if from_key == to_key:
+        raise SameWalletsError(from_key)
+
+    amount = transaction.get_amount()
+    profit = get_transfer_fee(headers[from_key], headers[to_key], amount)
+    if balances[from_key] < amount + profit:
+        raise NotEnoughBalanceError(from_key)
+
+    balances[from_key] -= amount + profit
+    balances[to_key] += amount
+    return TransactionStatistic(
+        transaction_key=transaction.get_key(),
+        profit=profit,
+        amount=amount,
+        created_at=transaction.get_created_at(),
+    )
+
+
+def value_statistics(
+    statistics: list[TransactionStatistic], rate_history: RateHistoryRepository
+) -> None:
+    # Profit is valued once, at the rate in effect when the transfer executed,
+    # and stored in millionths of a dollar so rollups add up exactly.
+    unvalued = [
+        statistic for statistic in statistics if statistic.get_profit_usd() is None
+    ]
+    rates = rate_history.get_rates_at(
+        USD, [statistic.get_created_at() for statistic in unvalued]
+    )
+    for statistic, rate in zip(unvalued, rates):
+        if rate is not None:
+            statistic.profit_usd = round(
+                statistic.get_profit() * rate * DOLLAR / BITCOIN
+            )
+
+
+def get_bucket_start(created_at: float, granularity: str) -> int:
+    size = STATISTICS_GRANULARITIES[granularity]
+    return int(created_at // size) * size
+
 
 class TransactionStatisticRepository(RepositoryABC[TransactionStatistic]):
     @abstractmethod
     def create(self, statistic: TransactionStatistic) -> None:
         pass
 
+    @abstractmethod
+    def create_many(self, statistics: list[TransactionStatistic]) -> None:
+        pass
+
     @abstractmethod
     def get(self, key: UUID) -> TransactionStatistic:
         pass
@@ -65,3 +244,17 @@ class TransactionStatisticRepository(RepositoryABC[TransactionStatistic]):
     @abstractmethod
     def get_statistics(self) -> Statistics:
         pass
+
+    @abstractmethod
+    def get_buckets(
+        self, granularity: str, start: float | None = None, end: float | None = None
+    ) -> list[StatisticsBucket]:
+        pass
+
+    @abstractmethod
+    def check_statistics(self) -> bool:
+        pass
+
+    @abstractmethod
+    def rebuild_statistics(self) -> Statistics:
+        pass
@@ -38,6 +38,10 @@ class UserRepository(RepositoryABC[User]):
     def get(self, private_key: UUID) -> User:
         pass
 
+    @abstractmethod
+    def authenticate(self, private_key: UUID) -> None:
+        pass
+
     @abstractmethod
     def _get_by_email(self, email: str) -> User | None:
         pass
@@ -1,18 +1,27 @@
+from __future__ import annotations
+
 from abc import abstractmethod
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterator
 from uuid import UUID, uuid4
 
 from constants import BITCOIN
 from core.repositories import RepositoryABC
-from core.transaction import Transaction
+from core.transaction import Transaction, TransactionCursor
+
+if TYPE_CHECKING:
+    from core.transaction_statistic import (
+        TransactionStatistic,
+        TransactionStatisticRepository,
+        TransferResult,
+    )
 
 
 @dataclass
-class Wallet:
+class WalletHeader:
     public_key: UUID = field(default_factory=uuid4)
     private_key: UUID = field(default_factory=uuid4)
     balance: int = BITCOIN
-    transactions: dict[UUID, Transaction] = field(default_factory=dict)
 
     def get_public_key(self) -> UUID:
         return self.public_key
@@ -23,14 +32,19 @@ class Wallet:
     def get_balance(self) -> int:
         return self.balance
 
+    def update_balance(self, amount: int) -> None:
+        self.balance += amount
+
+
+@dataclass
+class Wallet(WalletHeader):
+    transactions: dict[UUID, Transaction] = field(default_factory=dict)
+
     def get_transactions(self) -> list[Transaction]:
         if len(self.transactions) == 0:
             return []
         return list(self.transactions.values())
 
-    def update_balance(self, amount: int) -> None:
-        self.balance += amount
-
     def add_transaction(self, transaction: Transaction) -> None:
         transaction_id = transaction.get_key()
         self.transactions[transaction_id] = transaction
@@ -45,6 +59,10 @@ class WalletRepository(RepositoryABC[Wallet]):
     def get(self, wallet_key: UUID) -> Wallet:
         pass
 
+    @abstractmethod
+    def get_header(self, wallet_key: UUID) -> WalletHeader:
+        pass
+
     @abstractmethod
     def update_balance(self, wallet_key: UUID, amount: int) -> None:
         pass
@@ -53,10 +71,65 @@ class WalletRepository(RepositoryABC[Wallet]):
     def add_transaction(self, transaction: Transaction) -> None:
         pass
 
+    @abstractmethod
+    def transfer(
+        self,
+        transaction: Transaction,
+        statistics: TransactionStatisticRepository,
+    ) -> TransactionStatistic:
+        pass
+
+    @abstractmethod
+    def transfer_many(
+        self,
+        transactions: list[Transaction],
+        statistics: TransactionStatisticRepository,
+    ) -> list[TransferResult]:
+        pass
+
+    @abstractmethod
+    def payout(
+        self,
+        user_key: UUID,
+        from_key: UUID,
+        legs: list[tuple[UUID, int]],
+        statistics: TransactionStatisticRepository,
+    ) -> list[Transaction]:
+        pass
+
     @abstractmethod
     def get_wallet(self, user_key: UUID, wallet_key: UUID) -> Wallet:
         pass
 
     @abstractmethod
-    def get_transactions(self, user_key: UUID, wallet_key: UUID) -> list[Transaction]:
+    def get_wallet_header(self, user_key: UUID, wallet_key: UUID) -> WalletHeader:
+        pass
+
+    @abstractmethod
+    def get_transactions(
+        self,
+        user_key: UUID,
+        wallet_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> list[Transaction]:
+        pass
+
+    @abstractmethod
+    def get_user_transactions(
+        self,
+        user_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> list[Transaction]:
+        pass
+
+    @abstractmethod
+    def export_transactions(
+        self, user_key: UUID, wallet_key: UUID
+    ) -> Iterator[Transaction]:
+        pass
+
+    @abstractmethod
+    def export_user_transactions(self, user_key: UUID) -> Iterator[Transaction]:
         pass
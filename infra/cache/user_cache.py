@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from time import monotonic
+from typing import Callable
+from uuid import UUID
+
+from constants import USER_CACHE_SIZE, USER_CACHE_TTL
+from core.user import User, UserRepository
+
+
+@dataclass
+class UserCache(UserRepository):
+    users: UserRepository
+    max_size: int = USER_CACHE_SIZE
+    ttl: float = USER_CACHE_TTL
+    clock: Callable[[], float] = field(default=monotonic)
+
+    def __post_init__(self) -> None:
+        self._entries: OrderedDict[UUID, tuple[User, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get_hits(self) -> int:
+        return self._hits
+
+    def get_misses(self) -> int:
+        return self._misses
+
+    def create(self, user: User) -> None:
+        self.users.create(user)
+
+    def get(self, private_key: UUID) -> User:
+        user = self._lookup(private_key)
+        if user is not None:
+            return user
+
+        generation = self._generation
+        user = self.users.get(private_key)
+        self._store(user, generation)
+        return replace(user, wallets=list(user.get_wallets()))
+
+    def authenticate(self, private_key: UUID) -> None:
+        self.get(private_key)
+
+    def _get_by_email(self, email: str) -> User | None:
+        return self.users._get_by_email(email)
+
+    def add_wallet(self, user_key: UUID, wallet_key: UUID) -> None:
+        self.invalidate(user_key)
+        try:
+            self.users.add_wallet(user_key, wallet_key)
+        finally:
+            self.invalidate(user_key)
+
+    def invalidate(self, private_key: UUID) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(private_key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, private_key: UUID) -> User | None:
+        with self._lock:
+            entry = self._entries.get(private_key)
+            if entry is None or self.clock() >= entry[1]:
+                self._entries.pop(private_key, None)
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(private_key)
+            self._hits += 1
+            user = entry[0]
+
+        return replace(user, wallets=list(user.get_wallets()))
+
+    def _store(self, user: User, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._entries[user.get_private_key()] = (user, self.clock() + self.ttl)
+            self._entries.move_to_end(user.get_private_key())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -3,6 +3,9 @@ from typing import Annotated
 from fastapi import Depends
 from fastapi.requests import Request
 
+from core.converter import RateCache
+from core.rate_history import RateHistoryRepository
+from core.settlement import SettlementQueue
 from core.transaction import TransactionRepository
 from core.transaction_statistic import TransactionStatisticRepository
 from core.user import UserRepository
@@ -21,6 +24,18 @@ def get_user_repository(request: Request) -> UserRepository:
     return request.app.state.users  # type: ignore
 
 
+def get_rate_cache(request: Request) -> RateCache:
+    return request.app.state.rates  # type: ignore
+
+
+def get_rate_history_repository(request: Request) -> RateHistoryRepository:
+    return request.app.state.rate_history  # type: ignore
+
+
+def get_settlement_queue(request: Request) -> SettlementQueue | None:
+    return request.app.state.settlements  # type: ignore
+
+
 def get_transaction_statistic_repository(
     request: Request,
 ) -> TransactionStatisticRepository:
@@ -35,3 +50,10 @@ UserRepositoryDependable = Annotated[UserRepository, Depends(get_user_repository
 TransactionStatisticRepositoryDependable = Annotated[
     TransactionStatisticRepository, Depends(get_transaction_statistic_repository)
 ]
+RateCacheDependable = Annotated[RateCache, Depends(get_rate_cache)]
+RateHistoryRepositoryDependable = Annotated[
+    RateHistoryRepository, Depends(get_rate_history_repository)
+]
+SettlementQueueDependable = Annotated[
+    SettlementQueue | None, Depends(get_settlement_queue)
+]
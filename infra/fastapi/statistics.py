@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
+from typing import Any, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, Query
 from pydantic import BaseModel
 from starlette.responses import JSONResponse
 
-from constants import BITCOIN, ERROR_RESPONSES
+from constants import BITCOIN, DOLLAR, ERROR_RESPONSES
 from core.admin_checker import check_admin
 from core.errors import InvalidAdminAPIKeyError
+from core.transaction_statistic import (
+    StatisticsBucket,
+    TransactionStatisticRepository,
+)
 from infra.fastapi.dependables import TransactionStatisticRepositoryDependable
 
 statistic_api = APIRouter(tags=["Statistics"])
@@ -17,16 +23,27 @@ statistic_api = APIRouter(tags=["Statistics"])
 class StatisticItemResponse(BaseModel):
     transactions_number: int
     platform_profit: float
+    platform_profit_usd: float
+
+
+class StatisticBucketResponse(BaseModel):
+    start: datetime
+    transactions_number: int
+    platform_profit: float
+    platform_profit_usd: float
+    volume: float
 
 
 class StatisticItemResponseEnvelope(BaseModel):
     statistics: StatisticItemResponse
+    buckets: list[StatisticBucketResponse] | None = None
 
 
 @statistic_api.get(
     "/statistics",
     status_code=200,
     response_model=StatisticItemResponseEnvelope,
+    response_model_exclude_unset=True,
     responses={
         401: ERROR_RESPONSES[401],
     },
@@ -34,7 +51,10 @@ class StatisticItemResponseEnvelope(BaseModel):
 def get_transactions(
     transaction_statistics: TransactionStatisticRepositoryDependable,
     api_key: UUID = Header(alias="api_key"),
-) -> JSONResponse | dict[str, StatisticItemResponse]:
+    start: datetime | None = Query(default=None, alias="from"),
+    end: datetime | None = Query(default=None, alias="to"),
+    granularity: Literal["hour", "day"] | None = None,
+) -> JSONResponse | dict[str, Any]:
     try:
         check_admin(api_key)
     except InvalidAdminAPIKeyError:
@@ -43,10 +63,60 @@ def get_transactions(
             content={"error": {"message": f"Invalid admin API key <{api_key}>"}},
         )
 
+    if start is not None or end is not None or granularity is not None:
+        return _get_bucketed_statistics(
+            transaction_statistics, start, end, granularity or "day"
+        )
+
     statistics = transaction_statistics.get_statistics()
     return {
         "statistics": StatisticItemResponse(
             transactions_number=statistics.get_transactions_number(),
             platform_profit=statistics.get_platform_profit() / BITCOIN,
+            platform_profit_usd=statistics.get_platform_profit_usd() / DOLLAR,
         )
     }
+
+
+def _get_bucketed_statistics(
+    transaction_statistics: TransactionStatisticRepository,
+    start: datetime | None,
+    end: datetime | None,
+    granularity: str,
+) -> dict[str, Any]:
+    buckets = transaction_statistics.get_buckets(
+        granularity, _to_timestamp(start), _to_timestamp(end)
+    )
+
+    return {
+        "statistics": StatisticItemResponse(
+            transactions_number=sum(
+                bucket.get_transactions_number() for bucket in buckets
+            ),
+            platform_profit=sum(bucket.get_platform_profit() for bucket in buckets)
+            / BITCOIN,
+            platform_profit_usd=sum(
+                bucket.get_platform_profit_usd() for bucket in buckets
+            )
+            / DOLLAR,
+        ),
+        "buckets": [_to_bucket_item(bucket) for bucket in buckets],
+    }
+
+
+def _to_bucket_item(bucket: StatisticsBucket) -> StatisticBucketResponse:
+    return StatisticBucketResponse(
+        start=datetime.fromtimestamp(bucket.get_start(), timezone.utc),
+        transactions_number=bucket.get_transactions_number(),
+        platform_profit=bucket.get_platform_profit() / BITCOIN,
+        platform_profit_usd=bucket.get_platform_profit_usd() / DOLLAR,
+        volume=bucket.get_volume() / BITCOIN,
+    )
+
+
+def _to_timestamp(moment: datetime | None) -> float | None:
+    if moment is None:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
@@ -2,23 +2,38 @@ from __future__ import annotations
 
 from decimal import Context, ROUND_DOWN
 from math import ceil
+from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Header
-from pydantic import BaseModel
-from starlette.responses import JSONResponse
+from fastapi import APIRouter, Body, Header, Query
+from pydantic import BaseModel, Field
+from starlette.responses import JSONResponse, StreamingResponse
 
-from constants import BITCOIN, ERROR_RESPONSES
+from constants import (
+    BITCOIN,
+    ERROR_RESPONSES,
+    PAYOUT_LEGS_LIMIT,
+    TRANSACTIONS_BATCH_LIMIT,
+    TRANSACTIONS_PAGE_LIMIT,
+)
 from core.errors import (
+    InvalidCursorError,
     InvalidOwnerError,
     NotEnoughBalanceError,
     SameWalletsError,
+    SettlementQueueFullError,
+    TransactionDoesNotExistError,
     UserDoesNotExistError,
     WalletDoesNotExistError,
 )
-from core.transaction import Transaction
-from core.transaction_statistic import TransactionStatistic
+from core.settlement import SETTLED, Settlement, SettlementQueue
+from core.transaction import Transaction, TransactionRepository
+from core.transaction_statistic import TransactionStatistic, TransferResult
+from core.wallet import WalletRepository
 from infra.fastapi.dependables import (
+    RateHistoryRepositoryDependable,
+    SettlementQueueDependable,
+    TransactionRepositoryDependable,
     TransactionStatisticRepositoryDependable,
     UserRepositoryDependable,
     WalletRepositoryDependable,
@@ -27,6 +42,10 @@ from infra.fastapi.wallets import (
     TransactionItemResponse,
     TransactionItemResponseEnvelope,
     TransactionListResponseEnvelope,
+    decode_cursor,
+    invalid_cursor,
+    stream_transactions,
+    to_transaction_page,
 )
 
 transaction_api = APIRouter(tags=["Transactions"])
@@ -38,17 +57,58 @@ class MakeTransactionRequest(BaseModel):
     amount: float
 
 
+class PayoutLegRequest(BaseModel):
+    to_key: UUID
+    amount: float
+
+
+class PayoutRequest(BaseModel):
+    from_key: UUID
+    legs: list[PayoutLegRequest] = Field(min_length=1, max_length=PAYOUT_LEGS_LIMIT)
+
+
+class PayoutResponseEnvelope(BaseModel):
+    transactions: list[TransactionItemResponse]
+
+
+class ErrorMessage(BaseModel):
+    message: str
+
+
+class TransferStatusResponse(BaseModel):
+    id: UUID
+    status: str
+    transaction: TransactionItemResponse
+    error: ErrorMessage | None = None
+
+
+class TransferStatusResponseEnvelope(BaseModel):
+    transfer: TransferStatusResponse
+
+
+class TransactionBatchItemResponse(BaseModel):
+    status_code: int
+    transaction: TransactionItemResponse | None = None
+    error: ErrorMessage | None = None
+
+
+class TransactionBatchResponseEnvelope(BaseModel):
+    results: list[TransactionBatchItemResponse]
+
+
 @transaction_api.post(
     "/transactions",
     status_code=201,
     response_model=TransactionItemResponseEnvelope,
     responses={
+        202: {"model": TransferStatusResponseEnvelope},
         404: ERROR_RESPONSES[404],
         405: ERROR_RESPONSES[405],
         409: ERROR_RESPONSES[409],
         413: ERROR_RESPONSES[413],
         419: ERROR_RESPONSES[419],
         420: ERROR_RESPONSES[420],
+        503: ERROR_RESPONSES[503],
     },
 )
 def make_transaction(
@@ -56,17 +116,18 @@ def make_transaction(
     wallets: WalletRepositoryDependable,
     users: UserRepositoryDependable,
     transaction_statistics: TransactionStatisticRepositoryDependable,
+    settlements: SettlementQueueDependable,
     api_key: UUID = Header(alias="api_key"),
 ) -> JSONResponse | dict[str, TransactionItemResponse]:
     try:
-        users.get(api_key)
+        users.authenticate(api_key)
     except UserDoesNotExistError:
         return JSONResponse(
             status_code=404,
             content={"error": {"message": "User does not exist."}},
         )
     try:
-        from_wallet = wallets.get_wallet(api_key, request.from_key)
+        wallets.get_wallet_header(api_key, request.from_key)
     except InvalidOwnerError:
         return JSONResponse(
             status_code=409,
@@ -90,7 +151,7 @@ def make_transaction(
         )
 
     try:
-        to_wallet = wallets.get(request.to_key)
+        wallets.get_header(request.to_key)
     except WalletDoesNotExistError:
         return JSONResponse(
             status_code=405,
@@ -101,11 +162,8 @@ def make_transaction(
             },
         )
 
-    context = Context(prec=16, rounding=ROUND_DOWN)
-    amount = context.create_decimal_from_float(request.amount)
-    satoshi_amount = amount * BITCOIN
-
-    if satoshi_amount < 1 or (satoshi_amount != ceil(satoshi_amount)):
+    satoshi_amount = _to_satoshis(request.amount)
+    if satoshi_amount is None:
         return JSONResponse(
             status_code=413,
             content={
@@ -117,26 +175,16 @@ def make_transaction(
         private_key=api_key,
         from_key=request.from_key,
         to_key=request.to_key,
-        amount=int(satoshi_amount),
+        amount=satoshi_amount,
     )
 
-    try:
-        transaction_statistic = TransactionStatistic(
-            transaction_key=transaction.get_key()
-        )
-        transaction_statistic.system_update(
-            wallets, from_wallet, to_wallet, int(satoshi_amount)
-        )
+    # Transfers to the same wallet fall through and are rejected synchronously.
+    if settlements is not None and request.from_key != request.to_key:
+        return _defer(settlements, transaction)
 
-        wallets.add_transaction(transaction)
-        transaction_statistics.create(transaction_statistic)
-        return {
-            "transaction": TransactionItemResponse(
-                to_key=transaction.get_to_key(),
-                from_key=transaction.get_from_key(),
-                amount=amount,
-            )
-        }
+    try:
+        wallets.transfer(transaction, transaction_statistics)
+        return {"transaction": _transaction_item(transaction)}
     except SameWalletsError:
         return JSONResponse(
             status_code=420,
@@ -160,43 +208,329 @@ def make_transaction(
         )
 
 
+@transaction_api.post(
+    "/transactions/batch",
+    status_code=200,
+    response_model=TransactionBatchResponseEnvelope,
+    response_model_exclude_unset=True,
+    responses={
+        404: ERROR_RESPONSES[404],
+    },
+)
+def make_transactions(
+    wallets: WalletRepositoryDependable,
+    users: UserRepositoryDependable,
+    transaction_statistics: TransactionStatisticRepositoryDependable,
+    requests: list[MakeTransactionRequest] = Body(max_length=TRANSACTIONS_BATCH_LIMIT),
+    api_key: UUID = Header(alias="api_key"),
+) -> JSONResponse | dict[str, Any]:
+    try:
+        users.authenticate(api_key)
+    except UserDoesNotExistError:
+        return JSONResponse(
+            status_code=404,
+            content={"error": {"message": "User does not exist."}},
+        )
+
+    transactions: list[Transaction | None] = []
+    for request in requests:
+        satoshi_amount = _to_satoshis(request.amount)
+        transactions.append(
+            None
+            if satoshi_amount is None
+            else Transaction(
+                private_key=api_key,
+                from_key=request.from_key,
+                to_key=request.to_key,
+                amount=satoshi_amount,
+            )
+        )
+
+    valid = [transaction for transaction in transactions if transaction is not None]
+    outcomes = iter(wallets.transfer_many(valid, transaction_statistics))
+    results = []
+    for request, transaction in zip(requests, transactions):
+        if transaction is None:
+            results.append(_invalid_amount_result(wallets, api_key, request))
+        else:
+            results.append(_batch_result(request, transaction, next(outcomes)))
+    return {"results": results}
+
+
+@transaction_api.post(
+    "/transactions/payout",
+    status_code=201,
+    response_model=PayoutResponseEnvelope,
+    responses={
+        404: ERROR_RESPONSES[404],
+        405: ERROR_RESPONSES[405],
+        409: ERROR_RESPONSES[409],
+        413: ERROR_RESPONSES[413],
+        419: ERROR_RESPONSES[419],
+        420: ERROR_RESPONSES[420],
+    },
+)
+def make_payout(
+    request: PayoutRequest,
+    wallets: WalletRepositoryDependable,
+    users: UserRepositoryDependable,
+    transaction_statistics: TransactionStatisticRepositoryDependable,
+    api_key: UUID = Header(alias="api_key"),
+) -> JSONResponse | dict[str, Any]:
+    try:
+        users.authenticate(api_key)
+    except UserDoesNotExistError:
+        return JSONResponse(
+            status_code=404,
+            content={"error": {"message": "User does not exist."}},
+        )
+
+    legs = []
+    for leg in request.legs:
+        satoshi_amount = _to_satoshis(leg.amount)
+        if satoshi_amount is None:
+            return JSONResponse(
+                status_code=413,
+                content={
+                    "error": {
+                        "message": "Transaction amount must be a positive integer."
+                    }
+                },
+            )
+        legs.append((leg.to_key, satoshi_amount))
+
+    try:
+        transactions = wallets.payout(
+            api_key, request.from_key, legs, transaction_statistics
+        )
+    except (
+        InvalidOwnerError,
+        NotEnoughBalanceError,
+        SameWalletsError,
+        WalletDoesNotExistError,
+    ) as error:
+        status_code, message = _transfer_error(error, request.from_key)
+        return JSONResponse(
+            status_code=status_code, content={"error": {"message": message}}
+        )
+
+    return {"transactions": [_transaction_item(item) for item in transactions]}
+
+
 @transaction_api.get(
     "/transactions",
     status_code=200,
     response_model=TransactionListResponseEnvelope,
     responses={
         404: ERROR_RESPONSES[404],
+        422: ERROR_RESPONSES[422],
     },
 )
 def get_transactions(
     wallets: WalletRepositoryDependable,
     users: UserRepositoryDependable,
+    rate_history: RateHistoryRepositoryDependable,
     api_key: UUID = Header(alias="api_key"),
-) -> dict[str, list[TransactionItemResponse]] | JSONResponse:
+    limit: int | None = Query(default=None, ge=1, le=TRANSACTIONS_PAGE_LIMIT),
+    after: str | None = None,
+) -> dict[str, Any] | JSONResponse:
     try:
-        user = users.get(api_key)
+        users.authenticate(api_key)
     except UserDoesNotExistError:
         return JSONResponse(
             status_code=404,
             content={"error": {"message": "User does not exist."}},
         )
 
-    wallet_ids = user.get_wallets()
-    user_transactions = [
-        wallets.get_transactions(api_key, wallet_id) for wallet_id in wallet_ids
-    ]
-    transactions = []
-    for wallet_transactions in user_transactions:
-        for transaction in wallet_transactions:
-            if transaction not in transactions:
-                transactions.append(transaction)
-    return {
-        "transactions": [
-            TransactionItemResponse(
-                to_key=transaction.get_to_key(),
-                from_key=transaction.get_from_key(),
-                amount=transaction.get_amount() / BITCOIN,
+    try:
+        cursor = decode_cursor(after)
+    except InvalidCursorError:
+        return invalid_cursor(after)
+
+    transactions = wallets.get_user_transactions(
+        api_key, None if limit is None else limit + 1, cursor
+    )
+    return to_transaction_page(transactions, limit, rate_history)
+
+
+@transaction_api.get(
+    "/transactions/export",
+    status_code=200,
+    response_class=StreamingResponse,
+    response_model=None,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        404: ERROR_RESPONSES[404],
+    },
+)
+def export_transactions(
+    wallets: WalletRepositoryDependable,
+    users: UserRepositoryDependable,
+    rate_history: RateHistoryRepositoryDependable,
+    api_key: UUID = Header(alias="api_key"),
+) -> StreamingResponse | JSONResponse:
+    try:
+        users.authenticate(api_key)
+    except UserDoesNotExistError:
+        return JSONResponse(
+            status_code=404,
+            content={"error": {"message": "User does not exist."}},
+        )
+
+    return stream_transactions(wallets.export_user_transactions(api_key), rate_history)
+
+
+@transaction_api.get(
+    "/transactions/{transaction_id}",
+    status_code=200,
+    response_model=TransferStatusResponseEnvelope,
+    responses={
+        404: ERROR_RESPONSES[404],
+    },
+)
+def get_transaction_status(
+    transaction_id: UUID,
+    users: UserRepositoryDependable,
+    settlements: SettlementQueueDependable,
+    transactions: TransactionRepositoryDependable,
+    api_key: UUID = Header(alias="api_key"),
+) -> JSONResponse | dict[str, TransferStatusResponse]:
+    try:
+        users.authenticate(api_key)
+    except UserDoesNotExistError:
+        return JSONResponse(
+            status_code=404,
+            content={"error": {"message": "User does not exist."}},
+        )
+
+    try:
+        settlement = _find_settlement(transaction_id, settlements, transactions)
+        if settlement.get_transaction().get_private_key() != api_key:
+            raise TransactionDoesNotExistError(transaction_id)
+    except TransactionDoesNotExistError:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "error": {
+                    "message": f"Transaction with id <{transaction_id}> does not exist."
+                }
+            },
+        )
+
+    return {"transfer": _transfer_status(settlement)}
+
+
+def _find_settlement(
+    transaction_id: UUID,
+    settlements: SettlementQueue | None,
+    transactions: TransactionRepository,
+) -> Settlement:
+    if settlements is not None:
+        try:
+            return settlements.get(transaction_id)
+        except TransactionDoesNotExistError:
+            pass
+
+    # Only settled transfers are persisted, and they outlive the queue's
+    # in-memory results.
+    return Settlement(transactions.get(transaction_id), SETTLED)
+
+
+def _defer(settlements: SettlementQueue, transaction: Transaction) -> JSONResponse:
+    try:
+        settlement = settlements.submit(transaction)
+    except SettlementQueueFullError:
+        return JSONResponse(
+            status_code=503,
+            content={"error": {"message": "Settlement queue is full."}},
+            headers={"Retry-After": "1"},
+        )
+
+    return JSONResponse(
+        status_code=202,
+        content={"transfer": _transfer_status(settlement).model_dump(mode="json")},
+    )
+
+
+def _transfer_status(settlement: Settlement) -> TransferStatusResponse:
+    transaction = settlement.get_transaction()
+    error = settlement.get_error()
+    return TransferStatusResponse(
+        id=transaction.get_key(),
+        status=settlement.get_status(),
+        transaction=_transaction_item(transaction),
+        error=(
+            None
+            if error is None
+            else ErrorMessage(
+                message=_transfer_error(error, transaction.get_from_key())[1]
             )
-            for transaction in transactions
-        ]
-    }
+        ),
+    )
+
+
+def _to_satoshis(amount: float) -> int | None:
+    context = Context(prec=16, rounding=ROUND_DOWN)
+    satoshi_amount = context.create_decimal_from_float(amount) * BITCOIN
+
+    if satoshi_amount < 1 or (satoshi_amount != ceil(satoshi_amount)):
+        return None
+    return int(satoshi_amount)
+
+
+def _transaction_item(transaction: Transaction) -> TransactionItemResponse:
+    return TransactionItemResponse(
+        to_key=transaction.get_to_key(),
+        from_key=transaction.get_from_key(),
+        amount=transaction.get_amount() / BITCOIN,
+    )
+
+
+def _batch_result(
+    request: MakeTransactionRequest, transaction: Transaction, outcome: TransferResult
+) -> TransactionBatchItemResponse:
+    if isinstance(outcome, TransactionStatistic):
+        return TransactionBatchItemResponse(
+            status_code=201, transaction=_transaction_item(transaction)
+        )
+
+    status_code, message = _transfer_error(outcome, request.from_key)
+    return _batch_error(status_code, message)
+
+
+def _invalid_amount_result(
+    wallets: WalletRepository, api_key: UUID, request: MakeTransactionRequest
+) -> TransactionBatchItemResponse:
+    # Wallets are checked before the amount, in the same order as POST /transactions.
+    try:
+        wallets.get_wallet_header(api_key, request.from_key)
+        wallets.get_header(request.to_key)
+    except (InvalidOwnerError, WalletDoesNotExistError) as error:
+        return _batch_error(*_transfer_error(error, request.from_key))
+    return _batch_error(413, "Transaction amount must be a positive integer.")
+
+
+def _batch_error(status_code: int, message: str) -> TransactionBatchItemResponse:
+    return TransactionBatchItemResponse(
+        status_code=status_code, error=ErrorMessage(message=message)
+    )
+
+
+def _transfer_error(error: Exception, from_key: UUID) -> tuple[int, str]:
+    if isinstance(error, InvalidOwnerError):
+        return (
+            409,
+            f"Wallet with address <{from_key}> does not belong to the correct owner.",
+        )
+    if isinstance(error, WalletDoesNotExistError):
+        return 405, f"Wallet with address <{error.args[0]}> does not exist."
+    if isinstance(error, SameWalletsError):
+        return (
+            420,
+            "You are trying to make transaction from "
+            f"wallet with address <{from_key}> "
+            f"to same wallet with address <{from_key}>.",
+        )
+    if isinstance(error, NotEnoughBalanceError):
+        return 419, f"Wallet with address <{from_key}> does not have enough balance."
+    return 500, "Transfer could not be settled, please try again."
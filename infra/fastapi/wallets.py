@@ -1,23 +1,37 @@
 from __future__ import annotations
 
-from typing import Any
+import json
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Iterator
 from uuid import UUID
 
-from fastapi import APIRouter, Header
+from fastapi import APIRouter, Header, Query
 from pydantic import BaseModel
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
-from constants import BITCOIN, ERROR_RESPONSES
-from core.converter import get_btc_to_usd_rate
+from constants import (
+    BITCOIN,
+    ERROR_RESPONSES,
+    TRANSACTIONS_EXPORT_CHUNK_SIZE,
+    TRANSACTIONS_PAGE_LIMIT,
+    USD,
+)
+from core.converter import Rate
 from core.errors import (
     ConversionError,
+    InvalidCursorError,
     InvalidOwnerError,
     UserDoesNotExistError,
     WalletDoesNotExistError,
     WalletLimitReachedError,
 )
+from core.rate_history import RateHistoryRepository
+from core.transaction import Transaction, TransactionCursor
 from core.wallet import Wallet
 from infra.fastapi.dependables import (
+    RateCacheDependable,
+    RateHistoryRepositoryDependable,
     UserRepositoryDependable,
     WalletRepositoryDependable,
 )
@@ -29,12 +43,15 @@ class WalletItemResponse(BaseModel):
     public_key: UUID
     btc_balance: float
     usd_balance: float
+    usd_rate_age: float
+    balances: dict[str, float]
 
 
 class TransactionItemResponse(BaseModel):
     to_key: UUID
     from_key: UUID
     amount: float
+    usd_value: float | None = None
 
     def __eq__(self, other: Any) -> bool:
         if isinstance(other, TransactionItemResponse):
@@ -52,6 +69,7 @@ class TransactionItemResponseEnvelope(BaseModel):
 
 class TransactionListResponseEnvelope(BaseModel):
     transactions: list[TransactionItemResponse]
+    next_cursor: str | None = None
 
 
 class WalletItemResponseEnvelope(BaseModel):
@@ -71,7 +89,9 @@ class WalletItemResponseEnvelope(BaseModel):
 def create_wallet(
     wallets: WalletRepositoryDependable,
     users: UserRepositoryDependable,
+    rates: RateCacheDependable,
     api_key: UUID = Header(alias="api_key"),
+    currencies: str = Query(default=USD),
 ) -> dict[str, Any] | JSONResponse:
     wallet = Wallet(private_key=api_key)
     try:
@@ -83,15 +103,14 @@ def create_wallet(
         )
 
     try:
+        response = _wallet_item(
+            wallet.get_public_key(),
+            wallet.get_balance(),
+            rates.get_rate(),
+            _parse_currencies(currencies),
+        )
         users.add_wallet(api_key, wallet.get_public_key())
         wallets.create(wallet)
-        btc_balance = wallet.get_balance() / BITCOIN
-        usd_balance = get_btc_to_usd_rate() * btc_balance
-        response = WalletItemResponse(
-            public_key=wallet.get_public_key(),
-            btc_balance=btc_balance,
-            usd_balance=usd_balance,
-        )
         return {"wallet": response}
     except WalletLimitReachedError:
         return JSONResponse(
@@ -103,11 +122,8 @@ def create_wallet(
                 }
             },
         )
-    except ConversionError:
-        return JSONResponse(
-            status_code=415,
-            content={"error": {"message": "conversion of btc to usd failed."}},
-        )
+    except ConversionError as error:
+        return _conversion_failed(error)
 
 
 @wallet_api.get(
@@ -125,21 +141,24 @@ def get_wallet_by_address(
     address: UUID,
     wallets: WalletRepositoryDependable,
     users: UserRepositoryDependable,
+    rates: RateCacheDependable,
     api_key: UUID = Header(alias="api_key"),
+    currencies: str = Query(default=USD),
 ) -> dict[str, Any] | JSONResponse:
     try:
-        users.get(api_key)
+        users.authenticate(api_key)
     except UserDoesNotExistError:
         return JSONResponse(
             status_code=404,
             content={"error": {"message": "User does not exist."}},
         )
     try:
-        wallet = wallets.get_wallet(api_key, address)
-        btc_balance = wallet.get_balance() / BITCOIN
-        usd_balance = get_btc_to_usd_rate() * btc_balance
-        response = WalletItemResponse(
-            public_key=address, btc_balance=btc_balance, usd_balance=usd_balance
+        wallet = wallets.get_wallet_header(api_key, address)
+        response = _wallet_item(
+            address,
+            wallet.get_balance(),
+            rates.get_rate(),
+            _parse_currencies(currencies),
         )
         return {"wallet": response}
     except WalletDoesNotExistError:
@@ -159,11 +178,8 @@ def get_wallet_by_address(
                 }
             },
         )
-    except ConversionError:
-        return JSONResponse(
-            status_code=415,
-            content={"error": {"message": "conversion of btc to usd failed."}},
-        )
+    except ConversionError as error:
+        return _conversion_failed(error)
 
 
 @wallet_api.get(
@@ -174,33 +190,79 @@ def get_wallet_by_address(
         404: ERROR_RESPONSES[404],
         405: ERROR_RESPONSES[405],
         409: ERROR_RESPONSES[409],
+        422: ERROR_RESPONSES[422],
     },
 )
 def get_wallet_transactions(
     address: UUID,
     wallets: WalletRepositoryDependable,
     users: UserRepositoryDependable,
+    rate_history: RateHistoryRepositoryDependable,
     api_key: UUID = Header(alias="api_key"),
+    limit: int | None = Query(default=None, ge=1, le=TRANSACTIONS_PAGE_LIMIT),
+    after: str | None = None,
 ) -> dict[str, Any] | JSONResponse:
     try:
-        users.get(api_key)
+        users.authenticate(api_key)
+    except UserDoesNotExistError:
+        return JSONResponse(
+            status_code=404,
+            content={"error": {"message": "User does not exist."}},
+        )
+    try:
+        wallet_transactions = wallets.get_transactions(
+            api_key, address, None if limit is None else limit + 1, decode_cursor(after)
+        )
+        return to_transaction_page(wallet_transactions, limit, rate_history)
+    except InvalidCursorError:
+        return invalid_cursor(after)
+    except WalletDoesNotExistError:
+        return JSONResponse(
+            status_code=405,
+            content={
+                "error": {"message": f"Wallet with address <{address}> does not exist."}
+            },
+        )
+    except InvalidOwnerError:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "error": {
+                    "message": f"Wallet with address <{address}> "
+                    "does not belong to the correct owner."
+                }
+            },
+        )
+
+
+@wallet_api.get(
+    "/wallets/{address}/transactions/export",
+    status_code=200,
+    response_class=StreamingResponse,
+    response_model=None,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        404: ERROR_RESPONSES[404],
+        405: ERROR_RESPONSES[405],
+        409: ERROR_RESPONSES[409],
+    },
+)
+def export_wallet_transactions(
+    address: UUID,
+    wallets: WalletRepositoryDependable,
+    users: UserRepositoryDependable,
+    rate_history: RateHistoryRepositoryDependable,
+    api_key: UUID = Header(alias="api_key"),
+) -> StreamingResponse | JSONResponse:
+    try:
+        users.authenticate(api_key)
     except UserDoesNotExistError:
         return JSONResponse(
             status_code=404,
             content={"error": {"message": "User does not exist."}},
         )
     try:
-        wallet_transactions = wallets.get_transactions(api_key, address)
-        return {
-            "transactions": [
-                TransactionItemResponse(
-                    to_key=transaction.get_to_key(),
-                    from_key=transaction.get_from_key(),
-                    amount=transaction.get_amount() / BITCOIN,
-                )
-                for transaction in wallet_transactions
-            ]
-        }
+        wallet_transactions = wallets.export_transactions(api_key, address)
     except WalletDoesNotExistError:
         return JSONResponse(
             status_code=405,
@@ -218,3 +280,115 @@ def get_wallet_transactions(
                 }
             },
         )
+    return stream_transactions(wallet_transactions, rate_history)
+
+
+def decode_cursor(after: str | None) -> TransactionCursor | None:
+    return None if after is None else TransactionCursor.decode(after)
+
+
+def invalid_cursor(after: str | None) -> JSONResponse:
+    return JSONResponse(
+        status_code=422,
+        content={"error": {"message": f"Invalid cursor <{after}>."}},
+    )
+
+
+def to_transaction_page(
+    transactions: list[Transaction],
+    limit: int | None,
+    rate_history: RateHistoryRepository,
+) -> dict[str, Any]:
+    next_cursor = None
+    if limit is not None and len(transactions) > limit:
+        transactions = transactions[:limit]
+        next_cursor = transactions[-1].get_cursor().encode()
+
+    return {
+        "transactions": to_transaction_items(transactions, rate_history),
+        "next_cursor": next_cursor,
+    }
+
+
+def to_transaction_items(
+    transactions: list[Transaction], rate_history: RateHistoryRepository
+) -> list[TransactionItemResponse]:
+    rates = rate_history.get_rates_at(
+        USD, [transaction.get_created_at() for transaction in transactions]
+    )
+    items = []
+    for transaction, rate in zip(transactions, rates):
+        amount = transaction.get_amount() / BITCOIN
+        items.append(
+            TransactionItemResponse(
+                to_key=transaction.get_to_key(),
+                from_key=transaction.get_from_key(),
+                amount=amount,
+                usd_value=None if rate is None else amount * rate,
+            )
+        )
+    return items
+
+
+def stream_transactions(
+    transactions: Iterator[Transaction], rate_history: RateHistoryRepository
+) -> StreamingResponse:
+    return StreamingResponse(
+        _to_ndjson(transactions, rate_history), media_type="application/x-ndjson"
+    )
+
+
+def _to_ndjson(
+    transactions: Iterator[Transaction], rate_history: RateHistoryRepository
+) -> Iterator[str]:
+    chunk = list(islice(transactions, TRANSACTIONS_EXPORT_CHUNK_SIZE))
+    while len(chunk) > 0:
+        rates = rate_history.get_rates_at(
+            USD, [transaction.get_created_at() for transaction in chunk]
+        )
+        lines = []
+        for transaction, rate in zip(chunk, rates):
+            amount = transaction.get_amount() / BITCOIN
+            item = {
+                "key": str(transaction.get_key()),
+                "from_key": str(transaction.get_from_key()),
+                "to_key": str(transaction.get_to_key()),
+                "amount": amount,
+                "usd_value": None if rate is None else amount * rate,
+                "created_at": datetime.fromtimestamp(
+                    transaction.get_created_at(), timezone.utc
+                ).isoformat(),
+            }
+            lines.append(json.dumps(item) + "\n")
+        yield "".join(lines)
+        chunk = list(islice(transactions, TRANSACTIONS_EXPORT_CHUNK_SIZE))
+
+
+def _parse_currencies(currencies: str) -> list[str]:
+    requested = [currency.strip().upper() for currency in currencies.split(",")]
+    return list(dict.fromkeys(currency for currency in requested if currency))
+
+
+def _wallet_item(
+    public_key: UUID, balance: int, rate: Rate, currencies: list[str]
+) -> WalletItemResponse:
+    btc_balance = balance / BITCOIN
+    return WalletItemResponse(
+        public_key=public_key,
+        btc_balance=btc_balance,
+        usd_balance=rate.get_value(USD) * btc_balance,
+        usd_rate_age=rate.get_age(),
+        balances={
+            currency: rate.get_value(currency) * btc_balance for currency in currencies
+        },
+    )
+
+
+def _conversion_failed(error: ConversionError) -> JSONResponse:
+    currency = error.args[0] if len(error.args) > 0 else USD
+    return JSONResponse(
+        status_code=415,
+        content={
+            "error": {"message": f"conversion of btc to {currency.lower()} failed."}
+        },
+    )
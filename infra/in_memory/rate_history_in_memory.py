@@ -0,0 +1,35 @@
+import threading
+from bisect import bisect_right, insort
+from dataclasses import dataclass, field
+from typing import Mapping
+
+from core.rate_history import RateHistoryRepository
+
+
+@dataclass
+class RateHistoryInMemory(RateHistoryRepository):
+    history: dict[str, list[tuple[float, float]]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.lock = threading.Lock()
+
+    def record(self, rates: Mapping[str, float], recorded_at: float) -> None:
+        with self.lock:
+            for currency, rate in rates.items():
+                insort(self.history.setdefault(currency, []), (recorded_at, rate))
+
+    def get_rate_at(self, currency: str, at: float) -> float | None:
+        return self.get_rates_at(currency, [at])[0]
+
+    def get_rates_at(self, currency: str, times: list[float]) -> list[float | None]:
+        with self.lock:
+            points = self.history.get(currency, [])
+            rates: list[float | None] = []
+            for at in times:
+                index = bisect_right(points, (at, float("inf")))
+                rates.append(points[index - 1][1] if index > 0 else None)
+            return rates
+
+    def clear(self) -> None:
+        with self.lock:
+            self.history.clear()
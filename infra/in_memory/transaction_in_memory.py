@@ -13,6 +13,10 @@ class TransactionInMemory(TransactionRepository):
         key = transaction.get_key()
         self.transactions[key] = transaction
 
+    def create_many(self, transactions: list[Transaction]) -> None:
+        for transaction in transactions:
+            self.create(transaction)
+
     def get(self, transaction_key: UUID) -> Transaction:
         try:
             return self.transactions[transaction_key]
@@ -1,12 +1,21 @@
+import threading
 from dataclasses import dataclass, field
 from uuid import UUID
 
+from constants import STATISTICS_GRANULARITIES
 from core.errors import TransactionStatisticDoesNotExistError
+from core.rate_history import RateHistoryRepository
 from core.transaction_statistic import (
     Statistics,
+    StatisticsBucket,
     TransactionStatistic,
     TransactionStatisticRepository,
+    get_bucket_start,
+    value_statistics,
 )
+from infra.in_memory.rate_history_in_memory import RateHistoryInMemory
+
+Rollups = dict[str, dict[int, StatisticsBucket]]
 
 
 @dataclass
@@ -14,11 +23,25 @@ class TransactionStatisticInMemory(TransactionStatisticRepository):
     transaction_statistics: dict[UUID, TransactionStatistic] = field(
         default_factory=dict
     )
+    rate_history: RateHistoryRepository = field(default_factory=RateHistoryInMemory)
+
+    def __post_init__(self) -> None:
+        self.lock = threading.Lock()
+        self.totals, self.rollups = self._compute_statistics()
 
     def create(self, statistic: TransactionStatistic) -> None:
-        key = statistic.get_key()
+        self.create_many([statistic])
 
-        self.transaction_statistics[key] = statistic
+    def create_many(self, statistics: list[TransactionStatistic]) -> None:
+        value_statistics(statistics, self.rate_history)
+        with self.lock:
+            for statistic in statistics:
+                key = statistic.get_key()
+                replaced = self.transaction_statistics.get(key)
+                self.transaction_statistics[key] = statistic
+                if replaced is not None:
+                    self.totals = _apply(self.totals, self.rollups, replaced, -1)
+                self.totals = _apply(self.totals, self.rollups, statistic, 1)
 
     def get(self, key: UUID) -> TransactionStatistic:
         try:
@@ -27,12 +50,58 @@ class TransactionStatisticInMemory(TransactionStatisticRepository):
             raise TransactionStatisticDoesNotExistError(key)
 
     def get_statistics(self) -> Statistics:
-        profit = sum(
-            transaction_statistic.get_profit()
-            for transaction_statistic in self.transaction_statistics.values()
-        )
+        return self.totals
+
+    def get_buckets(
+        self, granularity: str, start: float | None = None, end: float | None = None
+    ) -> list[StatisticsBucket]:
+        first = None if start is None else get_bucket_start(start, granularity)
+        with self.lock:
+            return [
+                bucket
+                for bucket_start, bucket in sorted(self.rollups[granularity].items())
+                if (first is None or bucket_start >= first)
+                and (end is None or bucket_start < end)
+            ]
+
+    def check_statistics(self) -> bool:
+        with self.lock:
+            return (self.totals, self.rollups) == self._compute_statistics()
+
+    def rebuild_statistics(self) -> Statistics:
+        with self.lock:
+            self.totals, self.rollups = self._compute_statistics()
+            return self.totals
 
-        return Statistics(
-            transactions_number=len(self.transaction_statistics.values()),
-            platform_profit=profit,
+    def _compute_statistics(self) -> tuple[Statistics, Rollups]:
+        totals = Statistics()
+        rollups: Rollups = {granularity: {} for granularity in STATISTICS_GRANULARITIES}
+        for transaction_statistic in self.transaction_statistics.values():
+            totals = _apply(totals, rollups, transaction_statistic, 1)
+
+        return totals, rollups
+
+
+def _apply(
+    totals: Statistics, rollups: Rollups, statistic: TransactionStatistic, sign: int
+) -> Statistics:
+    for granularity, buckets in rollups.items():
+        bucket_start = get_bucket_start(statistic.get_created_at(), granularity)
+        bucket = buckets.get(bucket_start, StatisticsBucket(bucket_start))
+        bucket = StatisticsBucket(
+            bucket_start,
+            bucket.get_transactions_number() + sign,
+            bucket.get_platform_profit() + sign * statistic.get_profit(),
+            bucket.get_volume() + sign * statistic.get_amount(),
+            bucket.get_platform_profit_usd() + sign * (statistic.get_profit_usd() or 0),
         )
+        if bucket.get_transactions_number() == 0:
+            buckets.pop(bucket_start, None)
+        else:
+            buckets[bucket_start] = bucket
+
+    return Statistics(
+        totals.get_transactions_number() + sign,
+        totals.get_platform_profit() + sign * statistic.get_profit(),
+        totals.get_platform_profit_usd() + sign * (statistic.get_profit_usd() or 0),
+    )
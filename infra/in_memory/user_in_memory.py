@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass, field
 from uuid import UUID
 
@@ -15,11 +16,19 @@ from core.user import User, UserRepository
 class UserInMemory(UserRepository):
     users: dict[UUID, User] = field(default_factory=dict)
 
+    def __post_init__(self) -> None:
+        self.lock = threading.Lock()
+        self.emails: dict[str, UUID] = {
+            user.get_email(): private_key for private_key, user in self.users.items()
+        }
+
     def create(self, user: User) -> None:
-        if self._get_by_email(user.get_email()) is not None:
-            raise UserAlreadyExistsError(user.get_email())
+        with self.lock:
+            if self._get_by_email(user.get_email()) is not None:
+                raise UserAlreadyExistsError(user.get_email())
 
-        self.users[user.get_private_key()] = user
+            self.users[user.get_private_key()] = user
+            self.emails[user.get_email()] = user.get_private_key()
 
     def get(self, private_key: UUID) -> User:
         try:
@@ -27,12 +36,15 @@ class UserInMemory(UserRepository):
         except KeyError:
             raise UserDoesNotExistError(private_key)
 
-    def _get_by_email(self, email: str) -> User | None:
-        users = list(
-            filter(lambda user: user.get_email() == email, self.users.values())
-        )
+    def authenticate(self, private_key: UUID) -> None:
+        if private_key not in self.users:
+            raise UserDoesNotExistError(private_key)
 
-        return users[0] if len(users) >= 1 else None
+    def _get_by_email(self, email: str) -> User | None:
+        # users.email is UNIQUE with BINARY collation in sqlite, so emails
+        # are matched exactly, without case folding or trimming.
+        private_key = self.emails.get(email)
+        return None if private_key is None else self.users[private_key]
 
     def add_wallet(self, user_key: UUID, wallet_key: UUID) -> None:
         user = self.get(user_key)
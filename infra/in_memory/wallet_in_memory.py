@@ -1,17 +1,46 @@
+import threading
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
+from typing import Iterator
 from uuid import UUID
 
-from core.errors import InvalidOwnerError, SameWalletsError, WalletDoesNotExistError
-from core.transaction import Transaction
-from core.wallet import Wallet, WalletRepository
+from core.errors import (
+    InvalidOwnerError,
+    NotEnoughBalanceError,
+    SameWalletsError,
+    WalletDoesNotExistError,
+)
+from core.transaction import Transaction, TransactionCursor, TransactionRepository
+from core.transaction_statistic import (
+    TransactionStatistic,
+    TransactionStatisticRepository,
+    TransferResult,
+    get_balance_changes,
+    plan_payout,
+    plan_transfers,
+)
+from core.wallet import Wallet, WalletHeader, WalletRepository
+from infra.in_memory.transaction_in_memory import TransactionInMemory
+
+History = list[tuple[TransactionCursor, Transaction]]
 
 
 @dataclass
 class WalletInMemory(WalletRepository):
     wallets: dict[UUID, Wallet] = field(default_factory=dict)
+    transactions: TransactionRepository = field(default_factory=TransactionInMemory)
+
+    def __post_init__(self) -> None:
+        self.lock = threading.RLock()
+        self.history: dict[UUID, History] = {}
+        self.user_history: dict[UUID, History] = {}
+        for wallet in self.wallets.values():
+            self._index(wallet)
 
     def create(self, wallet: Wallet) -> None:
-        self.wallets[wallet.get_public_key()] = wallet
+        with self.lock:
+            self.wallets[wallet.get_public_key()] = wallet
+            self._index(wallet)
 
     def get(self, wallet_key: UUID) -> Wallet:
         try:
@@ -19,10 +48,17 @@ class WalletInMemory(WalletRepository):
         except KeyError:
             raise WalletDoesNotExistError(wallet_key)
 
+    def get_header(self, wallet_key: UUID) -> WalletHeader:
+        return self.get(wallet_key)
+
     def update_balance(self, wallet_key: UUID, amount: int) -> None:
-        wallet = self.get(wallet_key)
-        wallet.update_balance(amount)
-        self.wallets[wallet_key] = wallet
+        with self.lock:
+            wallet = self.get(wallet_key)
+            if wallet.get_balance() + amount < 0:
+                raise NotEnoughBalanceError(wallet_key)
+
+            wallet.update_balance(amount)
+            self.wallets[wallet_key] = wallet
 
     def get_wallet(self, user_key: UUID, wallet_key: UUID) -> Wallet:
         try:
@@ -34,6 +70,9 @@ class WalletInMemory(WalletRepository):
         except KeyError:
             raise WalletDoesNotExistError(wallet_key)
 
+    def get_wallet_header(self, user_key: UUID, wallet_key: UUID) -> WalletHeader:
+        return self.get_wallet(user_key, wallet_key)
+
     def add_transaction(self, transaction: Transaction) -> None:
         from_user_id = transaction.get_private_key()
         from_wallet_id = transaction.get_from_key()
@@ -41,14 +80,160 @@ class WalletInMemory(WalletRepository):
         if from_wallet_id == to_wallet_id:
             raise SameWalletsError(from_wallet_id)
 
-        from_wallet = self.get_wallet(from_user_id, from_wallet_id)
-        to_wallet = self.get(to_wallet_id)
+        with self.lock:
+            from_wallet = self.get_wallet(from_user_id, from_wallet_id)
+            to_wallet = self.get(to_wallet_id)
+
+            amount = transaction.get_amount()
+            self.update_balance(from_wallet_id, -amount)
+            to_wallet.update_balance(amount)
+            from_wallet.add_transaction(transaction)
+            to_wallet.add_transaction(transaction)
+            self._add_to_history(from_wallet, transaction)
+            self._add_to_history(to_wallet, transaction)
+            self.transactions.create(transaction)
+
+    def transfer(
+        self,
+        transaction: Transaction,
+        statistics: TransactionStatisticRepository,
+    ) -> TransactionStatistic:
+        from_wallet_id = transaction.get_from_key()
+        if from_wallet_id == transaction.get_to_key():
+            raise SameWalletsError(from_wallet_id)
+
+        with self.lock:
+            from_wallet = self.get_wallet_header(
+                transaction.get_private_key(), from_wallet_id
+            )
+            to_wallet = self.get_header(transaction.get_to_key())
+
+            statistic = TransactionStatistic(
+                transaction_key=transaction.get_key(),
+                amount=transaction.get_amount(),
+                created_at=transaction.get_created_at(),
+            )
+            statistic.system_update(
+                self, from_wallet, to_wallet, transaction.get_amount()
+            )
+            self.add_transaction(transaction)
+            statistics.create(statistic)
+
+        return statistic
+
+    def transfer_many(
+        self,
+        transactions: list[Transaction],
+        statistics: TransactionStatisticRepository,
+    ) -> list[TransferResult]:
+        with self.lock:
+            results = plan_transfers(transactions, self._get_headers(transactions))
+            accepted = [
+                transaction
+                for transaction, result in zip(transactions, results)
+                if isinstance(result, TransactionStatistic)
+            ]
+            planned = [
+                result for result in results if isinstance(result, TransactionStatistic)
+            ]
+            self._apply(accepted, planned, statistics)
+
+        return results
+
+    def payout(
+        self,
+        user_key: UUID,
+        from_key: UUID,
+        legs: list[tuple[UUID, int]],
+        statistics: TransactionStatisticRepository,
+    ) -> list[Transaction]:
+        with self.lock:
+            headers: dict[UUID, WalletHeader] = {
+                key: self.wallets[key]
+                for key in (from_key, *(to_key for to_key, _ in legs))
+                if key in self.wallets
+            }
+            transactions, planned = plan_payout(user_key, from_key, legs, headers)
+            self._apply(transactions, planned, statistics)
+
+        return transactions
+
+    def get_transactions(
+        self,
+        user_key: UUID,
+        wallet_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> list[Transaction]:
+        with self.lock:
+            self.get_wallet(user_key, wallet_key)
+            return _page(self.history.get(wallet_key, []), limit, after)
+
+    def get_user_transactions(
+        self,
+        user_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> list[Transaction]:
+        with self.lock:
+            return _page(self.user_history.get(user_key, []), limit, after)
+
+    def export_transactions(
+        self, user_key: UUID, wallet_key: UUID
+    ) -> Iterator[Transaction]:
+        return iter(self.get_transactions(user_key, wallet_key))
+
+    def export_user_transactions(self, user_key: UUID) -> Iterator[Transaction]:
+        return iter(self.get_user_transactions(user_key))
+
+    def _get_headers(self, transactions: list[Transaction]) -> dict[UUID, WalletHeader]:
+        return {
+            key: self.wallets[key]
+            for transaction in transactions
+            for key in (transaction.get_from_key(), transaction.get_to_key())
+            if key in self.wallets
+        }
+
+    def _apply(
+        self,
+        transactions: list[Transaction],
+        planned: list[TransactionStatistic],
+        statistics: TransactionStatisticRepository,
+    ) -> None:
+        for key, change in get_balance_changes(transactions, planned).items():
+            self.wallets[key].update_balance(change)
+        for transaction in transactions:
+            for key in (transaction.get_from_key(), transaction.get_to_key()):
+                self.wallets[key].add_transaction(transaction)
+                self._add_to_history(self.wallets[key], transaction)
+        self.transactions.create_many(transactions)
+        statistics.create_many(planned)
+
+    def _index(self, wallet: Wallet) -> None:
+        self.history[wallet.get_public_key()] = []
+        for transaction in wallet.get_transactions():
+            self._add_to_history(wallet, transaction)
+
+    def _add_to_history(self, wallet: Wallet, transaction: Transaction) -> None:
+        _insert(self.history[wallet.get_public_key()], transaction)
+        _insert(self.user_history.setdefault(wallet.get_private_key(), []), transaction)
+
+
+def _cursor(entry: tuple[TransactionCursor, Transaction]) -> TransactionCursor:
+    return entry[0]
+
+
+def _insert(history: History, transaction: Transaction) -> None:
+    cursor = transaction.get_cursor()
+    index = bisect_left(history, cursor, key=_cursor)
+    if index < len(history) and history[index][0] == cursor:
+        return
+    history.insert(index, (cursor, transaction))
 
-        amount = transaction.get_amount()
-        from_wallet.update_balance(-amount)
-        to_wallet.update_balance(amount)
-        from_wallet.add_transaction(transaction)
-        to_wallet.add_transaction(transaction)
 
-    def get_transactions(self, user_key: UUID, wallet_key: UUID) -> list[Transaction]:
-        return self.get_wallet(user_key, wallet_key).get_transactions()
+def _page(
+    history: History, limit: int | None, after: TransactionCursor | None
+) -> list[Transaction]:
+    start = 0 if after is None else bisect_right(history, after, key=_cursor)
+    end = len(history) if limit is None else start + limit
+    return [transaction for _, transaction in history[start:end]]
@@ -0,0 +1,53 @@
+import threading
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Callable
+
+from constants import RATE_BREAKER_FAILURES, RATE_BREAKER_RESET
+from core.converter import RateProvider
+from core.errors import ConversionError
+
+
+@dataclass
+class CircuitBreakerRateProvider(RateProvider):
+    provider: RateProvider
+    failure_threshold: int = RATE_BREAKER_FAILURES
+    reset_timeout: float = RATE_BREAKER_RESET
+    clock: Callable[[], float] = field(default=monotonic)
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def fetch_rates(self) -> dict[str, float]:
+        with self._lock:
+            if self._opened_at is not None:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    raise ConversionError()
+                if self._probing:
+                    raise ConversionError()
+                self._probing = True
+
+        try:
+            rates = self.provider.fetch_rates()
+        except ConversionError:
+            with self._lock:
+                self._failures += 1
+                if self._probing or self._failures >= self.failure_threshold:
+                    self._opened_at = self.clock()
+                self._probing = False
+            raise
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+        return rates
+
+    def close(self) -> None:
+        self.provider.close()
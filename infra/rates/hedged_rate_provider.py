@@ -0,0 +1,54 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from time import monotonic
+
+from constants import RATE_DEADLINE, RATE_HEDGE_DELAY
+from core.converter import RateProvider
+from core.errors import ConversionError
+
+
+@dataclass
+class HedgedRateProvider(RateProvider):
+    providers: list[RateProvider]
+    hedge_delay: float = RATE_HEDGE_DELAY
+    deadline: float = RATE_DEADLINE
+
+    def __post_init__(self) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=4 * len(self.providers), thread_name_prefix="rate-hedge"
+        )
+
+    def fetch_rates(self) -> dict[str, float]:
+        expires_at = monotonic() + self.deadline
+        waiting = list(self.providers)
+        pending: set[Future[dict[str, float]]] = {self._submit(waiting.pop(0))}
+
+        try:
+            while len(pending) > 0:
+                remaining = expires_at - monotonic()
+                if remaining <= 0:
+                    break
+
+                timeout = min(self.hedge_delay, remaining) if waiting else remaining
+                done, pending = wait(
+                    pending, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    if future.exception() is None:
+                        return future.result()
+
+                if waiting:
+                    pending.add(self._submit(waiting.pop(0)))
+        finally:
+            for future in pending:
+                future.cancel()
+
+        raise ConversionError()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for provider in self.providers:
+            provider.close()
+
+    def _submit(self, provider: RateProvider) -> Future[dict[str, float]]:
+        return self._executor.submit(provider.fetch_rates)
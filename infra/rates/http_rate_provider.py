@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import requests
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+
+from constants import (
+    COINBASE_CONVERTER_URL,
+    CONVERTER_URL,
+    RATE_PROVIDER_POOL_SIZE,
+    RATE_PROVIDER_TIMEOUT,
+)
+from core.converter import RateProvider, parse_ticker
+from core.errors import ConversionError
+
+
+def parse_coinbase_rates(data: Any) -> dict[str, float]:
+    return {currency: float(rate) for currency, rate in data["data"]["rates"].items()}
+
+
+@dataclass
+class HttpRateProvider(RateProvider):
+    url: str
+    parse: Callable[[Any], dict[str, float]]
+    timeout: float = RATE_PROVIDER_TIMEOUT
+    pool_size: int = RATE_PROVIDER_POOL_SIZE
+    session: requests.Session = field(default_factory=requests.Session)
+
+    def __post_init__(self) -> None:
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.pool_size, max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def fetch_rates(self) -> dict[str, float]:
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+        except RequestException:
+            raise ConversionError(self.url)
+
+        if response.status_code != 200:
+            raise ConversionError(self.url)
+
+        try:
+            return self.parse(response.json())
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise ConversionError(self.url)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def blockchain_rate_provider() -> HttpRateProvider:
+    return HttpRateProvider(CONVERTER_URL, parse_ticker)
+
+
+def coinbase_rate_provider() -> HttpRateProvider:
+    return HttpRateProvider(COINBASE_CONVERTER_URL, parse_coinbase_rates)
@@ -0,0 +1,12 @@
+from dataclasses import dataclass, field
+
+from constants import STUB_BTC_RATES
+from core.converter import RateProvider
+
+
+@dataclass
+class StubRateProvider(RateProvider):
+    rates: dict[str, float] = field(default_factory=lambda: dict(STUB_BTC_RATES))
+
+    def fetch_rates(self) -> dict[str, float]:
+        return dict(self.rates)
@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Tuple
+
+from constants import DB_CHECKPOINT_INTERVAL, DB_CHECKPOINT_TRUNCATE_FRAMES
+from infra.sqlite.database_sqlite import SqliteDatabase
+
+
+@dataclass
+class SqliteCheckpointScheduler:
+    sqlite_database: SqliteDatabase
+    interval: float = DB_CHECKPOINT_INTERVAL
+    truncate_frames: int = DB_CHECKPOINT_TRUNCATE_FRAMES
+
+    def __post_init__(self) -> None:
+        self._stopped = threading.Event()
+        self._checkpointer: threading.Thread | None = None
+        self._checkpoints = 0
+        self._truncations = 0
+
+    def get_checkpoints(self) -> int:
+        return self._checkpoints
+
+    def get_truncations(self) -> int:
+        return self._truncations
+
+    def checkpoint(self) -> Tuple[int, int, int]:
+        # A passive checkpoint never blocks writers, but it cannot shrink the
+        # log file; truncate only once the log has grown past the threshold.
+        result = self.sqlite_database.checkpoint("PASSIVE")
+        self._checkpoints += 1
+        if result[1] >= self.truncate_frames:
+            result = self.sqlite_database.checkpoint("TRUNCATE")
+            self._truncations += 1
+        return result
+
+    def start(self) -> None:
+        if self._checkpointer is not None:
+            return
+
+        self._stopped.clear()
+        self._checkpointer = threading.Thread(
+            target=self._checkpoint_periodically,
+            name="sqlite-checkpointer",
+            daemon=True,
+        )
+        self._checkpointer.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._checkpointer is not None:
+            self._checkpointer.join()
+            self._checkpointer = None
+
+    def _checkpoint_periodically(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.checkpoint()
+            except sqlite3.Error:
+                pass
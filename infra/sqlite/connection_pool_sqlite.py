@@ -0,0 +1,135 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from queue import Empty, LifoQueue
+from sqlite3 import Connection, ProgrammingError
+from time import monotonic
+from typing import Iterator
+
+from constants import (
+    DB_POOL_HEALTH_CHECK_INTERVAL,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
+from core.errors import ConnectionPoolTimeoutError
+from infra.sqlite.pragma_sqlite import PragmaProfile, open_connection
+
+
+@dataclass
+class SqliteConnectionPool:
+    database_path: str
+    size: int = DB_POOL_SIZE
+    timeout: float = DB_POOL_TIMEOUT
+    health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL
+    profile: PragmaProfile = field(default_factory=PragmaProfile)
+
+    def __post_init__(self) -> None:
+        self._idle: LifoQueue[tuple[Connection, float]] = LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._opened = 0
+        self._closed = False
+
+    def get_opened(self) -> int:
+        return self._opened
+
+    def get_idle(self) -> int:
+        return self._idle.qsize()
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        pinned: Connection | None = getattr(self._local, "connection", None)
+        if pinned is not None:
+            yield pinned
+            return
+
+        connection = self.acquire()
+        self._local.connection = connection
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self.release(connection)
+
+    def acquire(self) -> Connection:
+        if self._closed:
+            raise ProgrammingError("Cannot operate on a closed connection pool.")
+
+        try:
+            connection, released_at = self._idle.get_nowait()
+        except Empty:
+            if self._reserve():
+                return self._open()
+            try:
+                connection, released_at = self._idle.get(timeout=self.timeout)
+            except Empty:
+                raise ConnectionPoolTimeoutError(self.database_path)
+
+        if monotonic() - released_at < self.health_check_interval:
+            return connection
+        if self._is_healthy(connection):
+            return connection
+
+        # The replacement takes over the unhealthy connection's slot, so
+        # another thread can never claim it in between.
+        self._close(connection)
+        return self._open()
+
+    def release(self, connection: Connection) -> None:
+        if self._closed:
+            self._discard(connection)
+            return
+
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except sqlite3.Error:
+            self._discard(connection)
+            return
+
+        self._idle.put((connection, monotonic()))
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except Empty:
+                return
+            self._discard(connection)
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self._opened >= self.size:
+                return False
+            self._opened += 1
+            return True
+
+    def _open(self) -> Connection:
+        try:
+            return open_connection(self.database_path, self.profile)
+        except sqlite3.Error:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, connection: Connection) -> None:
+        with self._lock:
+            self._opened -= 1
+        self._close(connection)
+
+    @staticmethod
+    def _close(connection: Connection) -> None:
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+    @staticmethod
+    def _is_healthy(connection: Connection) -> bool:
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
@@ -1,49 +1,272 @@
-import sqlite3
-from sqlite3 import IntegrityError
-from typing import Any, List, Tuple
+import threading
+from contextlib import contextmanager
+from sqlite3 import Connection, IntegrityError, OperationalError, ProgrammingError
+from typing import Any, Callable, Iterator, List, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from constants import (
+    DB_FETCH_SIZE,
+    DB_GROUP_COMMIT_SIZE,
+    DB_GROUP_COMMIT_WINDOW,
+    DB_KEY_FORMAT,
+    DB_POOL_HEALTH_CHECK_INTERVAL,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PRAGMA_PROFILE,
+)
+from infra.sqlite.connection_pool_sqlite import SqliteConnectionPool
+from infra.sqlite.group_commit_sqlite import SqliteGroupCommit
+from infra.sqlite.pragma_sqlite import get_pragma_profile, open_connection
+
+KEY_FORMATS = ("text", "blob")
+CHECKPOINT_MODES = ("PASSIVE", "FULL", "RESTART", "TRUNCATE")
+
+T = TypeVar("T")
 
 
 class SqliteDatabase:
-    def __init__(self, database_path: str) -> None:
+    def __init__(
+        self,
+        database_path: str,
+        pool_size: int = DB_POOL_SIZE,
+        pool_timeout: float = DB_POOL_TIMEOUT,
+        health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL,
+        group_commit_size: int = DB_GROUP_COMMIT_SIZE,
+        group_commit_window: float = DB_GROUP_COMMIT_WINDOW,
+        pragma_profile: str = DB_PRAGMA_PROFILE,
+    ) -> None:
         self.database_path = database_path
+        self.profile = get_pragma_profile(pragma_profile)
+        self.pool = (
+            SqliteConnectionPool(
+                database_path,
+                pool_size,
+                pool_timeout,
+                health_check_interval,
+                self.profile,
+            )
+            if pool_size > 0
+            else None
+        )
+        self.group_commit = (
+            SqliteGroupCommit(
+                database_path, group_commit_size, group_commit_window, self.profile
+            )
+            if group_commit_size > 0
+            else None
+        )
+        self._local = threading.local()
+        self._query_lock = threading.Lock()
+        self._query_count = 0
+        self._closed = False
+        self.key_format = self._load_key_format()
+
+    def encode_key(self, key: UUID) -> str | bytes:
+        if self.key_format == "blob":
+            return key.bytes
+        return str(key)
+
+    @staticmethod
+    def decode_key(value: str | bytes) -> UUID:
+        if isinstance(value, bytes):
+            return UUID(bytes=value)
+        return UUID(value)
 
-    def execute(self, query: str, params: Tuple[Any, ...] = ()) -> None:
-        connection = sqlite3.connect(self.database_path, check_same_thread=False)
-        cursor = connection.cursor()
+    def _load_key_format(self) -> str:
+        # The format is recorded by the migrations; databases that have not
+        # been migrated yet start out with the default.
+        query = "SELECT value FROM schema_settings WHERE name = 'key_format'"
         try:
-            cursor.execute(query, params)
-            connection.commit()
+            result = self.fetch_one(query)
+        except OperationalError:
+            return DB_KEY_FORMAT
+        if result is None:
+            return DB_KEY_FORMAT
+        return str(result[0])
+
+    def get_query_count(self) -> int:
+        return self._query_count
+
+    def _count_query(self) -> None:
+        with self._query_lock:
+            self._query_count += 1
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "connection", None) is not None
+
+    @contextmanager
+    def transaction(self) -> Iterator[Connection]:
+        bound: Connection | None = getattr(self._local, "connection", None)
+        if bound is not None:
+            yield bound
+            return
+
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            self._local.connection = connection
+            try:
+                yield connection
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+            finally:
+                self._local.connection = None
+
+    def run_transaction(self, unit: Callable[[], T]) -> T:
+        if self.group_commit is None or self.in_transaction():
+            with self.transaction():
+                return unit()
+
+        def run_bound(connection: Connection) -> T:
+            # Runs on the group-commit writer, whose open batch transaction
+            # becomes the transaction every call made by the unit joins.
+            self._local.connection = connection
+            try:
+                return unit()
+            finally:
+                self._local.connection = None
+
+        return self.group_commit.run(run_bound)
+
+    @contextmanager
+    def connect(self) -> Iterator[Connection]:
+        bound: Connection | None = getattr(self._local, "connection", None)
+        if bound is not None:
+            yield bound
+            return
+
+        if self.pool is not None:
+            with self.pool.connection() as connection:
+                yield connection
+            return
+
+        self._check_open()
+        connection = open_connection(self.database_path, self.profile)
+        try:
+            yield connection
+        finally:
             connection.close()
-        except IntegrityError:
+
+    @contextmanager
+    def _connect_unpinned(self) -> Iterator[Connection]:
+        # Generators may be resumed on any thread, so the connection they hold
+        # must not be pinned to the thread that started them.
+        bound: Connection | None = getattr(self._local, "connection", None)
+        if bound is not None:
+            yield bound
+            return
+
+        if self.pool is not None:
+            pooled = self.pool.acquire()
+            try:
+                yield pooled
+            finally:
+                self.pool.release(pooled)
+            return
+
+        self._check_open()
+        connection = open_connection(self.database_path, self.profile)
+        try:
+            yield connection
+        finally:
             connection.close()
-            raise IntegrityError
+
+    def execute(self, query: str, params: Tuple[Any, ...] = ()) -> int:
+        self._count_query()
+        if self.group_commit is not None and not self.in_transaction():
+            return self.group_commit.execute(query, params)
+
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            if self.in_transaction():
+                cursor.execute(query, params)
+                return cursor.rowcount
+
+            try:
+                cursor.execute(query, params)
+                connection.commit()
+                return cursor.rowcount
+            except IntegrityError:
+                connection.rollback()
+                raise IntegrityError
+
+    def execute_many(self, query: str, params_list: Sequence[Tuple[Any, ...]]) -> int:
+        self._count_query()
+        if self.group_commit is not None and not self.in_transaction():
+            return self.group_commit.execute_many(query, params_list)
+
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            if self.in_transaction():
+                cursor.executemany(query, params_list)
+                return cursor.rowcount
+
+            try:
+                cursor.executemany(query, params_list)
+                connection.commit()
+                return cursor.rowcount
+            except IntegrityError:
+                connection.rollback()
+                raise IntegrityError
 
     def fetch_one(self, query: str, params: Tuple[Any, ...] = ()) -> Tuple[Any, ...]:
-        connection = sqlite3.connect(self.database_path, check_same_thread=False)
-        cursor = connection.cursor()
-        cursor.execute(query, params)
-        result: Tuple[Any, ...] = cursor.fetchone()
-        connection.close()
-        return result
+        self._count_query()
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            result: Tuple[Any, ...] = cursor.fetchone()
+            return result
 
     def fetch_all(
         self, query: str, params: Tuple[Any, ...] = ()
     ) -> List[Tuple[Any, ...]]:
-        connection = sqlite3.connect(self.database_path, check_same_thread=False)
-        cursor = connection.cursor()
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        connection.close()
-        return results
+        self._count_query()
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            return results
+
+    def fetch_many(
+        self, query: str, params: Tuple[Any, ...] = (), size: int = DB_FETCH_SIZE
+    ) -> Iterator[Tuple[Any, ...]]:
+        self._count_query()
+        with self._connect_unpinned() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            try:
+                rows = cursor.fetchmany(size)
+                while len(rows) > 0:
+                    yield from rows
+                    rows = cursor.fetchmany(size)
+            finally:
+                cursor.close()
+
+    def checkpoint(self, mode: str = "PASSIVE") -> Tuple[int, int, int]:
+        if mode not in CHECKPOINT_MODES:
+            raise ValueError(f"Unknown checkpoint mode <{mode}>.")
+
+        busy, log, checkpointed = self.fetch_one(f"PRAGMA wal_checkpoint({mode})")
+        return busy, log, checkpointed
 
     def clear(self, table_names: tuple[Any, ...] = ()) -> None:
-        connection = sqlite3.connect(self.database_path, check_same_thread=False)
-        cursor = connection.cursor()
-        for table_name in table_names:
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            count = cursor.fetchone()[0]
-            if count != 0:
-                cursor.execute(f"DELETE FROM {table_name}")
-                connection.commit()
+        with self.connect() as connection:
+            cursor = connection.cursor()
+            for table_name in table_names:
+                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                count = cursor.fetchone()[0]
+                if count != 0:
+                    cursor.execute(f"DELETE FROM {table_name}")
+                    connection.commit()
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ProgrammingError("Cannot operate on a closed database.")
 
-        connection.close()
+    def close(self) -> None:
+        self._closed = True
+        if self.group_commit is not None:
+            self.group_commit.close()
+        if self.pool is not None:
+            self.pool.close()
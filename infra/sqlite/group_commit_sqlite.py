@@ -0,0 +1,180 @@
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from queue import Empty, Queue
+from sqlite3 import Connection, ProgrammingError
+from time import monotonic
+from typing import Any, Callable, Sequence, Tuple, TypeVar
+
+from constants import DB_GROUP_COMMIT_SIZE, DB_GROUP_COMMIT_WINDOW
+from infra.sqlite.pragma_sqlite import PragmaProfile, open_connection
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Write:
+    unit: Callable[[Connection], Any]
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Exception | None = None
+
+
+@dataclass
+class SqliteGroupCommit:
+    database_path: str
+    size: int = DB_GROUP_COMMIT_SIZE
+    window: float = DB_GROUP_COMMIT_WINDOW
+    profile: PragmaProfile = field(default_factory=PragmaProfile)
+
+    def __post_init__(self) -> None:
+        self._writes: Queue[_Write | None] = Queue()
+        self._lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+        self._closed = False
+        self._batches = 0
+        self._statements = 0
+        self._largest_batch = 0
+        self._wait_time = 0.0
+
+    def get_batches(self) -> int:
+        return self._batches
+
+    def get_statements(self) -> int:
+        return self._statements
+
+    def get_largest_batch(self) -> int:
+        return self._largest_batch
+
+    def get_wait_time(self) -> float:
+        return self._wait_time
+
+    def execute(self, query: str, params: Tuple[Any, ...] = ()) -> int:
+        return self.run(lambda connection: connection.execute(query, params).rowcount)
+
+    def execute_many(self, query: str, params_list: Sequence[Tuple[Any, ...]]) -> int:
+        return self.run(
+            lambda connection: connection.executemany(query, params_list).rowcount
+        )
+
+    def run(self, unit: Callable[[Connection], T]) -> T:
+        write = _Write(unit)
+        self._submit(write)
+        result: T = write.result
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join()
+
+    def _submit(self, write: _Write) -> None:
+        submitted_at = monotonic()
+        with self._lock:
+            if self._closed:
+                raise ProgrammingError("Cannot operate on a closed group commit.")
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_continuously,
+                    name="sqlite-group-commit",
+                    daemon=True,
+                )
+                self._writer.start()
+            self._writes.put(write)
+
+        write.done.wait()
+        with self._lock:
+            self._wait_time += monotonic() - submitted_at
+
+        if write.error is not None:
+            raise write.error
+
+    def _write_continuously(self) -> None:
+        try:
+            connection = open_connection(
+                self.database_path, self.profile, isolation_level=None
+            )
+        except Exception as error:
+            self._fail(error)
+            return
+
+        try:
+            while True:
+                batch = self._collect()
+                writes = [write for write in batch if write is not None]
+                if len(writes) > 0:
+                    self._commit(connection, writes)
+                if batch[-1] is None:
+                    return
+        except Exception as error:
+            self._fail(error)
+        finally:
+            connection.close()
+
+    def _fail(self, error: Exception) -> None:
+        # Queued writes fail with the writer's error instead of waiting for a
+        # thread that is gone; the next submit starts a fresh writer.
+        with self._lock:
+            self._writer = None
+            while True:
+                try:
+                    write = self._writes.get_nowait()
+                except Empty:
+                    return
+                if write is not None:
+                    write.error = error
+                    write.done.set()
+
+    def _collect(self) -> list[_Write | None]:
+        first = self._writes.get()
+        if first is None:
+            return [None]
+
+        batch: list[_Write | None] = [first]
+        deadline = monotonic() + self.window
+        while len(batch) < self.size:
+            try:
+                write = self._writes.get(timeout=max(deadline - monotonic(), 0))
+            except Empty:
+                break
+            batch.append(write)
+            if write is None:
+                break
+        return batch
+
+    def _commit(self, connection: Connection, writes: list[_Write]) -> None:
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for write in writes:
+                self._apply(connection, write)
+            connection.execute("COMMIT")
+        except Exception as error:
+            try:
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            for write in writes:
+                write.error = write.error or error
+        finally:
+            with self._lock:
+                self._batches += 1
+                self._statements += len(writes)
+                self._largest_batch = max(self._largest_batch, len(writes))
+            for write in writes:
+                write.done.set()
+
+    @staticmethod
+    def _apply(connection: Connection, write: _Write) -> None:
+        # Each write gets its own savepoint so a failing unit is undone and
+        # reported to its caller without aborting the rest of the batch.
+        connection.execute("SAVEPOINT write")
+        try:
+            write.result = write.unit(connection)
+        except Exception as error:
+            connection.execute("ROLLBACK TO write")
+            write.error = error
+        connection.execute("RELEASE write")
@@ -0,0 +1,325 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from infra.sqlite.database_sqlite import KEY_FORMATS, SqliteDatabase
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+
+    def get_version(self) -> int:
+        return self.version
+
+    def get_name(self) -> str:
+        return self.name
+
+    def get_statements(self) -> tuple[str, ...]:
+        return self.statements
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create tables",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS transactions (
+                [key] TEXT PRIMARY KEY,
+                [to_key] TEXT,
+                [private_key] TEXT,
+                [from_key] TEXT,
+                [amount] INT
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS wallets (
+                [public_key] TEXT PRIMARY KEY,
+                [private_key] TEXT,
+                [balance] INT
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS wallets_transactions (
+                [wallet_key] TEXT,
+                [transaction_key] TEXT
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                [private_key] TEXT PRIMARY KEY,
+                [email] TEXT UNIQUE
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS users_wallets (
+                [private_key] TEXT,
+                [public_key] TEXT
+            );
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS transaction_statistics (
+                [key] TEXT PRIMARY KEY,
+                [transaction_key] TEXT UNIQUE,
+                [profit] INT
+            );
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "add lookup indexes",
+        (
+            "CREATE INDEX IF NOT EXISTS wallets_transactions_wallet_key"
+            " ON wallets_transactions (wallet_key, transaction_key);",
+            "CREATE INDEX IF NOT EXISTS users_wallets_private_key"
+            " ON users_wallets (private_key, public_key);",
+            "CREATE INDEX IF NOT EXISTS transactions_from_key"
+            " ON transactions (from_key);",
+            "CREATE INDEX IF NOT EXISTS transactions_to_key"
+            " ON transactions (to_key);",
+        ),
+    ),
+    Migration(
+        3,
+        "record key format",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS schema_settings (
+                [name] TEXT PRIMARY KEY,
+                [value] TEXT NOT NULL
+            );
+            """,
+            "INSERT OR IGNORE INTO schema_settings (name, value)"
+            " VALUES ('key_format', 'text');",
+        ),
+    ),
+    Migration(
+        4,
+        "add timestamps and rate history",
+        (
+            "ALTER TABLE transactions ADD COLUMN created_at REAL NOT NULL DEFAULT 0;",
+            "ALTER TABLE transaction_statistics"
+            " ADD COLUMN created_at REAL NOT NULL DEFAULT 0;",
+            "CREATE INDEX IF NOT EXISTS transaction_statistics_created_at"
+            " ON transaction_statistics (created_at);",
+            """
+            CREATE TABLE IF NOT EXISTS rate_history (
+                [currency] TEXT NOT NULL,
+                [recorded_at] REAL NOT NULL,
+                [rate] REAL NOT NULL,
+                PRIMARY KEY (currency, recorded_at)
+            ) WITHOUT ROWID;
+            """,
+        ),
+    ),
+    Migration(
+        5,
+        "add statistics totals",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS statistics_totals (
+                [id] INTEGER PRIMARY KEY CHECK (id = 1),
+                [transactions_number] INT NOT NULL,
+                [platform_profit] INT NOT NULL
+            );
+            """,
+            "INSERT OR IGNORE INTO statistics_totals"
+            " SELECT 1, COUNT(*), ifnull(SUM(profit), 0) FROM transaction_statistics;",
+        ),
+    ),
+    Migration(
+        6,
+        "add statistics rollups",
+        (
+            "ALTER TABLE transaction_statistics"
+            " ADD COLUMN amount INT NOT NULL DEFAULT 0;",
+            "UPDATE transaction_statistics SET amount = ifnull("
+            "(SELECT t.amount FROM transactions t"
+            " WHERE t.key = transaction_statistics.transaction_key), 0);",
+            """
+            CREATE TABLE IF NOT EXISTS statistics_hourly (
+                [bucket_start] INTEGER PRIMARY KEY,
+                [transactions_number] INT NOT NULL,
+                [platform_profit] INT NOT NULL,
+                [volume] INT NOT NULL
+            );
+            """,
+            "INSERT INTO statistics_hourly"
+            " SELECT CAST(created_at / 3600 AS INTEGER) * 3600,"
+            " COUNT(*), SUM(profit), SUM(amount)"
+            " FROM transaction_statistics GROUP BY 1;",
+            """
+            CREATE TABLE IF NOT EXISTS statistics_daily (
+                [bucket_start] INTEGER PRIMARY KEY,
+                [transactions_number] INT NOT NULL,
+                [platform_profit] INT NOT NULL,
+                [volume] INT NOT NULL
+            );
+            """,
+            "INSERT INTO statistics_daily"
+            " SELECT CAST(created_at / 86400 AS INTEGER) * 86400,"
+            " COUNT(*), SUM(profit), SUM(amount)"
+            " FROM transaction_statistics GROUP BY 1;",
+        ),
+    ),
+    Migration(
+        7,
+        "order wallet transactions by time",
+        (
+            "ALTER TABLE wallets_transactions"
+            " ADD COLUMN created_at REAL NOT NULL DEFAULT 0;",
+            "UPDATE wallets_transactions SET created_at = ifnull("
+            "(SELECT t.created_at FROM transactions t"
+            " WHERE t.key = wallets_transactions.transaction_key), 0);",
+            "CREATE INDEX IF NOT EXISTS wallets_transactions_wallet_created_at"
+            " ON wallets_transactions (wallet_key, created_at, transaction_key);",
+            "DROP INDEX IF EXISTS wallets_transactions_wallet_key;",
+        ),
+    ),
+    Migration(
+        8,
+        "add wallet owner index",
+        (
+            "CREATE INDEX IF NOT EXISTS wallets_private_key"
+            " ON wallets (private_key, public_key);",
+        ),
+    ),
+    Migration(
+        9,
+        "value statistics in usd",
+        (
+            "ALTER TABLE transaction_statistics ADD COLUMN profit_usd INT;",
+            "UPDATE transaction_statistics SET profit_usd = CAST(ROUND(profit"
+            " * (SELECT rate FROM rate_history WHERE currency = 'USD'"
+            " AND recorded_at <= transaction_statistics.created_at"
+            " ORDER BY recorded_at DESC LIMIT 1) / 100) AS INTEGER);",
+            "ALTER TABLE statistics_hourly"
+            " ADD COLUMN platform_profit_usd INT NOT NULL DEFAULT 0;",
+            "UPDATE statistics_hourly SET platform_profit_usd = ifnull("
+            "(SELECT SUM(profit_usd) FROM transaction_statistics"
+            " WHERE CAST(created_at / 3600 AS INTEGER) * 3600"
+            " = statistics_hourly.bucket_start), 0);",
+            "ALTER TABLE statistics_daily"
+            " ADD COLUMN platform_profit_usd INT NOT NULL DEFAULT 0;",
+            "UPDATE statistics_daily SET platform_profit_usd = ifnull("
+            "(SELECT SUM(profit_usd) FROM transaction_statistics"
+            " WHERE CAST(created_at / 86400 AS INTEGER) * 86400"
+            " = statistics_daily.bucket_start), 0);",
+        ),
+    ),
+    Migration(
+        10,
+        "add usd profit to statistics totals",
+        (
+            "ALTER TABLE statistics_totals"
+            " ADD COLUMN platform_profit_usd INT NOT NULL DEFAULT 0;",
+            "UPDATE statistics_totals SET platform_profit_usd ="
+            " (SELECT ifnull(SUM(profit_usd), 0) FROM transaction_statistics);",
+        ),
+    ),
+)
+
+KEY_COLUMNS: dict[str, tuple[str, ...]] = {
+    "transactions": ("key", "to_key", "private_key", "from_key"),
+    "wallets": ("public_key", "private_key"),
+    "wallets_transactions": ("wallet_key", "transaction_key"),
+    "users": ("private_key",),
+    "users_wallets": ("private_key", "public_key"),
+    "transaction_statistics": ("key", "transaction_key"),
+}
+
+
+def get_schema_version(sqlite_database: SqliteDatabase) -> int:
+    _create_migrations_table(sqlite_database)
+
+    query = "SELECT ifnull(MAX(version), 0) FROM schema_migrations"
+    result = sqlite_database.fetch_one(query)
+    return int(result[0])
+
+
+def migrate(
+    sqlite_database: SqliteDatabase,
+    migrations: tuple[Migration, ...] = MIGRATIONS,
+) -> int:
+    _create_migrations_table(sqlite_database)
+
+    for migration in sorted(migrations, key=Migration.get_version):
+        with sqlite_database.transaction():
+            if _is_applied(sqlite_database, migration):
+                continue
+
+            for statement in migration.get_statements():
+                sqlite_database.execute(statement)
+
+            query = (
+                "INSERT INTO schema_migrations (version, name, applied_at) "
+                "VALUES (?, ?, ?);"
+            )
+            params = (
+                migration.get_version(),
+                migration.get_name(),
+                datetime.now(timezone.utc).isoformat(),
+            )
+            sqlite_database.execute(query, params)
+
+    return get_schema_version(sqlite_database)
+
+
+def get_key_format(sqlite_database: SqliteDatabase) -> str:
+    query = "SELECT value FROM schema_settings WHERE name = 'key_format'"
+    result = sqlite_database.fetch_one(query)
+    return str(result[0])
+
+
+def convert_keys(sqlite_database: SqliteDatabase, key_format: str) -> None:
+    if key_format not in KEY_FORMATS:
+        raise ValueError(f"Unknown key format <{key_format}>.")
+
+    converter = _key_to_blob if key_format == "blob" else _key_to_text
+    with sqlite_database.transaction() as connection:
+        if get_key_format(sqlite_database) != key_format:
+            connection.create_function("convert_key", 1, converter, deterministic=True)
+            for table_name, columns in KEY_COLUMNS.items():
+                assignments = ", ".join(
+                    f"{column} = convert_key({column})" for column in columns
+                )
+                sqlite_database.execute(f"UPDATE {table_name} SET {assignments}")
+
+            query = "UPDATE schema_settings SET value = ? WHERE name = 'key_format'"
+            params = (key_format,)
+            sqlite_database.execute(query, params)
+
+    sqlite_database.key_format = key_format
+
+
+def _key_to_blob(value: Any) -> Any:
+    if isinstance(value, str):
+        return UUID(value).bytes
+    return value
+
+
+def _key_to_text(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return str(UUID(bytes=value))
+    return value
+
+
+def _create_migrations_table(sqlite_database: SqliteDatabase) -> None:
+    sqlite_database.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            [version] INTEGER PRIMARY KEY,
+            [name] TEXT NOT NULL,
+            [applied_at] TEXT NOT NULL
+        );
+        """)
+
+
+def _is_applied(sqlite_database: SqliteDatabase, migration: Migration) -> bool:
+    query = "SELECT version FROM schema_migrations WHERE version = ?"
+    params = (migration.get_version(),)
+    return sqlite_database.fetch_one(query, params) is not None
@@ -0,0 +1,63 @@
+import sqlite3
+from dataclasses import dataclass
+from sqlite3 import Connection
+from typing import Any
+
+
+@dataclass(frozen=True)
+class PragmaProfile:
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -2_000
+    mmap_size: int = 0
+    temp_store: str = "DEFAULT"
+    busy_timeout: int = 5_000
+
+    def apply(self, connection: Connection) -> None:
+        connection.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        connection.execute(f"PRAGMA journal_mode = {self.journal_mode}").fetchone()
+        connection.execute(f"PRAGMA synchronous = {self.synchronous}")
+        connection.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        connection.execute(f"PRAGMA temp_store = {self.temp_store}")
+
+
+# Every preset keeps WAL: the journal mode is stored in the database file, and
+# switching it back requires that no other connection is open.
+PRAGMA_PROFILES = {
+    "durable": PragmaProfile(synchronous="FULL"),
+    "balanced": PragmaProfile(
+        synchronous="NORMAL",
+        cache_size=-16_000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="MEMORY",
+    ),
+    "bulk-load": PragmaProfile(
+        synchronous="OFF",
+        cache_size=-64_000,
+        mmap_size=1024 * 1024 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=30_000,
+    ),
+}
+
+
+def get_pragma_profile(name: str) -> PragmaProfile:
+    try:
+        return PRAGMA_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown pragma profile <{name}>.")
+
+
+def open_connection(
+    database_path: str, profile: PragmaProfile, **kwargs: Any
+) -> Connection:
+    connection: Connection = sqlite3.connect(
+        database_path, check_same_thread=False, **kwargs
+    )
+    try:
+        profile.apply(connection)
+    except sqlite3.Error:
+        connection.close()
+        raise
+    return connection
@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from typing import Mapping
+
+from core.rate_history import RateHistoryRepository
+from infra.sqlite.database_sqlite import SqliteDatabase
+
+AS_OF_CHUNK_SIZE = 500
+
+
+@dataclass
+class RateHistorySqlite(RateHistoryRepository):
+    sqlite_database: SqliteDatabase
+
+    def record(self, rates: Mapping[str, float], recorded_at: float) -> None:
+        query = (
+            "INSERT OR REPLACE INTO rate_history (currency, recorded_at, rate) "
+            "VALUES (?, ?, ?);"
+        )
+        with self.sqlite_database.transaction():
+            for currency, rate in rates.items():
+                params = (currency, recorded_at, rate)
+                self.sqlite_database.execute(query, params)
+
+    def get_rate_at(self, currency: str, at: float) -> float | None:
+        query = (
+            "SELECT rate FROM rate_history WHERE currency = ? AND recorded_at <= ?"
+            " ORDER BY recorded_at DESC LIMIT 1"
+        )
+        params = (currency, at)
+
+        result = self.sqlite_database.fetch_one(query, params)
+        return None if result is None else float(result[0])
+
+    def get_rates_at(self, currency: str, times: list[float]) -> list[float | None]:
+        rates: list[float | None] = []
+        for start in range(0, len(times), AS_OF_CHUNK_SIZE):
+            end = start + AS_OF_CHUNK_SIZE
+            chunk = times[start:end]
+            points = ", ".join("(?, ?)" for _ in chunk)
+            query = (
+                f"WITH points (position, at) AS (VALUES {points})"
+                " SELECT (SELECT rate FROM rate_history"
+                " WHERE currency = ? AND recorded_at <= points.at"
+                " ORDER BY recorded_at DESC LIMIT 1)"
+                " FROM points ORDER BY position"
+            )
+            params = tuple(
+                value for position, at in enumerate(chunk) for value in (position, at)
+            ) + (currency,)
+
+            result = self.sqlite_database.fetch_all(query, params)
+            rates.extend(None if row[0] is None else float(row[0]) for row in result)
+        return rates
+
+    def clear(self) -> None:
+        table_names = ("rate_history",)
+        self.sqlite_database.clear(table_names)
@@ -1,53 +1,59 @@
 from dataclasses import dataclass
+from typing import Any
 from uuid import UUID
 
 from core.errors import TransactionDoesNotExistError
 from core.transaction import Transaction, TransactionRepository
 from infra.sqlite.database_sqlite import SqliteDatabase
 
+INSERT_QUERY = (
+    "INSERT INTO transactions"
+    " (key, to_key, private_key, from_key, amount, created_at)"
+    " VALUES (?, ?, ?, ?, ?, ?);"
+)
+
 
 @dataclass
 class TransactionSqlite(TransactionRepository):
     sqlite_database: SqliteDatabase
 
     def create(self, transaction: Transaction) -> None:
-        key = str(transaction.get_key())
-        to_key = str(transaction.get_to_key())
-        private_key = str(transaction.get_private_key())
-        from_key = str(transaction.get_from_key())
-        amount = transaction.get_amount()
+        self.sqlite_database.execute(INSERT_QUERY, self._to_params(transaction))
 
-        query = (
-            "INSERT INTO transactions (key, to_key, private_key, from_key, amount) "
-            "VALUES (?, ?, ?, ?, ?);"
-        )
-        params = (
-            key,
-            to_key,
-            private_key,
-            from_key,
-            amount,
+    def create_many(self, transactions: list[Transaction]) -> None:
+        self.sqlite_database.execute_many(
+            INSERT_QUERY, [self._to_params(transaction) for transaction in transactions]
         )
-        self.sqlite_database.execute(query, params)
 
     def get(self, transaction_key: UUID) -> Transaction:
         query = (
-            "SELECT to_key, private_key, from_key, amount"
+            "SELECT to_key, private_key, from_key, amount, created_at"
             " FROM transactions WHERE key = ?"
         )
-        params = (str(transaction_key),)
+        params = (self.sqlite_database.encode_key(transaction_key),)
         result = self.sqlite_database.fetch_one(query, params)
 
         if result is None:
             raise TransactionDoesNotExistError(transaction_key)
         return Transaction(
             transaction_key,
-            UUID(result[0]),
-            UUID(result[1]),
-            UUID(result[2]),
+            self.sqlite_database.decode_key(result[0]),
+            self.sqlite_database.decode_key(result[1]),
+            self.sqlite_database.decode_key(result[2]),
             result[3],
+            result[4],
         )
 
     def clear(self) -> None:
         table_names = ("transactions",)
         self.sqlite_database.clear(table_names)
+
+    def _to_params(self, transaction: Transaction) -> tuple[Any, ...]:
+        return (
+            self.sqlite_database.encode_key(transaction.get_key()),
+            self.sqlite_database.encode_key(transaction.get_to_key()),
+            self.sqlite_database.encode_key(transaction.get_private_key()),
+            self.sqlite_database.encode_key(transaction.get_from_key()),
+            transaction.get_amount(),
+            transaction.get_created_at(),
+        )
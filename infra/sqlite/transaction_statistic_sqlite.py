@@ -1,42 +1,66 @@
 from dataclasses import dataclass
 from uuid import UUID
 
+from constants import STATISTICS_GRANULARITIES
 from core.errors import TransactionStatisticDoesNotExistError
 from core.transaction_statistic import (
     Statistics,
+    StatisticsBucket,
     TransactionStatistic,
     TransactionStatisticRepository,
+    get_bucket_start,
+    value_statistics,
 )
 from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.rate_history_sqlite import RateHistorySqlite
+
+ROLLUP_TABLES = {"hour": "statistics_hourly", "day": "statistics_daily"}
 
 
 @dataclass
 class TransactionStatisticSqlite(TransactionStatisticRepository):
     sqlite_database: SqliteDatabase
 
+    def __post_init__(self) -> None:
+        self.rate_history = RateHistorySqlite(self.sqlite_database)
+
     def create(self, statistic: TransactionStatistic) -> None:
-        key = str(statistic.get_key())
-        transaction_key = str(statistic.get_transaction_key())
-        profit = statistic.get_profit()
+        self.create_many([statistic])
+
+    def create_many(self, statistics: list[TransactionStatistic]) -> None:
+        if len(statistics) == 0:
+            return
 
+        value_statistics(statistics, self.rate_history)
         query = (
-            "INSERT INTO transaction_statistics (key, transaction_key, profit) "
-            "VALUES (?, ?, ?);"
-        )
-        params = (
-            key,
-            transaction_key,
-            profit,
+            "INSERT INTO transaction_statistics"
+            " (key, transaction_key, profit, amount, created_at, profit_usd)"
+            " VALUES (?, ?, ?, ?, ?, ?);"
         )
+        params = [
+            (
+                self.sqlite_database.encode_key(statistic.get_key()),
+                self.sqlite_database.encode_key(statistic.get_transaction_key()),
+                statistic.get_profit(),
+                statistic.get_amount(),
+                statistic.get_created_at(),
+                statistic.get_profit_usd(),
+            )
+            for statistic in statistics
+        ]
 
-        self.sqlite_database.execute(query, params)
+        with self.sqlite_database.transaction():
+            self.sqlite_database.execute_many(query, params)
+            self._add_to_totals(statistics)
+            for granularity in ROLLUP_TABLES:
+                self._add_to_rollup(granularity, statistics)
 
     def get(self, key: UUID) -> TransactionStatistic:
         query = (
-            "SELECT transaction_key, profit FROM transaction_statistics"
-            " WHERE key = ?"
+            "SELECT transaction_key, profit, amount, created_at, profit_usd"
+            " FROM transaction_statistics WHERE key = ?"
         )
-        params = (str(key),)
+        params = (self.sqlite_database.encode_key(key),)
 
         result = self.sqlite_database.fetch_one(query, params)
 
@@ -44,20 +68,166 @@ class TransactionStatisticSqlite(TransactionStatisticRepository):
             raise TransactionStatisticDoesNotExistError(key)
         return TransactionStatistic(
             key=key,
-            transaction_key=UUID(result[0]),
+            transaction_key=self.sqlite_database.decode_key(result[0]),
             profit=result[1],
+            amount=result[2],
+            created_at=result[3],
+            profit_usd=result[4],
         )
 
     def get_statistics(self) -> Statistics:
         query = (
-            "SELECT COUNT(transaction_key), ifnull(SUM(profit), 0) "
-            "FROM transaction_statistics"
+            "SELECT transactions_number, platform_profit, platform_profit_usd "
+            "FROM statistics_totals WHERE id = 1"
         )
-        params = ()
 
-        result = self.sqlite_database.fetch_one(query, params)
-        return Statistics(int(result[0]), int(result[1]))
+        result = self.sqlite_database.fetch_one(query)
+        if result is None:
+            return Statistics()
+        return Statistics(int(result[0]), int(result[1]), int(result[2]))
+
+    def get_buckets(
+        self, granularity: str, start: float | None = None, end: float | None = None
+    ) -> list[StatisticsBucket]:
+        conditions = []
+        params: tuple[float, ...] = ()
+        if start is not None:
+            conditions.append("bucket_start >= ?")
+            params += (get_bucket_start(start, granularity),)
+        if end is not None:
+            conditions.append("bucket_start < ?")
+            params += (end,)
+
+        query = (
+            "SELECT bucket_start, transactions_number, platform_profit, volume,"
+            f" platform_profit_usd FROM {ROLLUP_TABLES[granularity]}"
+            f" {_where(conditions)} ORDER BY bucket_start"
+        )
+
+        result = self.sqlite_database.fetch_all(query, params)
+        return [StatisticsBucket(*row) for row in result]
+
+    def check_statistics(self) -> bool:
+        with self.sqlite_database.transaction():
+            if self.get_statistics() != self._compute_statistics():
+                return False
+
+            for granularity, table_name in ROLLUP_TABLES.items():
+                stored = f"SELECT * FROM {table_name}"
+                computed = _rollup_query(granularity)
+                query = (
+                    f"SELECT (SELECT COUNT(*) FROM ({stored} EXCEPT {computed}))"
+                    f" + (SELECT COUNT(*) FROM ({computed} EXCEPT {stored}))"
+                )
+                if self.sqlite_database.fetch_one(query)[0] != 0:
+                    return False
+            return True
+
+    def rebuild_statistics(self) -> Statistics:
+        with self.sqlite_database.transaction():
+            statistics = self._compute_statistics()
+            query = (
+                "INSERT OR REPLACE INTO statistics_totals"
+                " (id, transactions_number, platform_profit, platform_profit_usd)"
+                " VALUES (1, ?, ?, ?);"
+            )
+            params = (
+                statistics.get_transactions_number(),
+                statistics.get_platform_profit(),
+                statistics.get_platform_profit_usd(),
+            )
+            self.sqlite_database.execute(query, params)
+
+            for granularity, table_name in ROLLUP_TABLES.items():
+                self.sqlite_database.execute(f"DELETE FROM {table_name}")
+                self.sqlite_database.execute(
+                    f"INSERT INTO {table_name} {_rollup_query(granularity)}"
+                )
+        return statistics
 
     def clear(self) -> None:
-        table_names = ("transaction_statistics",)
+        table_names = (
+            "transaction_statistics",
+            "statistics_totals",
+            *ROLLUP_TABLES.values(),
+        )
         self.sqlite_database.clear(table_names)
+
+    def _add_to_totals(self, statistics: list[TransactionStatistic]) -> None:
+        query = (
+            "INSERT INTO statistics_totals"
+            " (id, transactions_number, platform_profit, platform_profit_usd)"
+            " VALUES (1, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET"
+            " transactions_number = transactions_number"
+            " + excluded.transactions_number,"
+            " platform_profit = platform_profit + excluded.platform_profit,"
+            " platform_profit_usd = platform_profit_usd"
+            " + excluded.platform_profit_usd;"
+        )
+        params = (
+            len(statistics),
+            sum(statistic.get_profit() for statistic in statistics),
+            sum(statistic.get_profit_usd() or 0 for statistic in statistics),
+        )
+        self.sqlite_database.execute(query, params)
+
+    def _add_to_rollup(
+        self, granularity: str, statistics: list[TransactionStatistic]
+    ) -> None:
+        buckets: dict[int, StatisticsBucket] = {}
+        for statistic in statistics:
+            start = get_bucket_start(statistic.get_created_at(), granularity)
+            bucket = buckets.get(start, StatisticsBucket(start))
+            buckets[start] = StatisticsBucket(
+                start,
+                bucket.get_transactions_number() + 1,
+                bucket.get_platform_profit() + statistic.get_profit(),
+                bucket.get_volume() + statistic.get_amount(),
+                bucket.get_platform_profit_usd() + (statistic.get_profit_usd() or 0),
+            )
+
+        query = (
+            f"INSERT INTO {ROLLUP_TABLES[granularity]}"
+            " (bucket_start, transactions_number, platform_profit, volume,"
+            " platform_profit_usd) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (bucket_start) DO UPDATE SET"
+            " transactions_number = transactions_number"
+            " + excluded.transactions_number,"
+            " platform_profit = platform_profit + excluded.platform_profit,"
+            " volume = volume + excluded.volume,"
+            " platform_profit_usd = platform_profit_usd"
+            " + excluded.platform_profit_usd;"
+        )
+        params = [
+            (
+                bucket.get_start(),
+                bucket.get_transactions_number(),
+                bucket.get_platform_profit(),
+                bucket.get_volume(),
+                bucket.get_platform_profit_usd(),
+            )
+            for bucket in buckets.values()
+        ]
+        self.sqlite_database.execute_many(query, params)
+
+    def _compute_statistics(self) -> Statistics:
+        query = (
+            "SELECT COUNT(transaction_key), ifnull(SUM(profit), 0),"
+            " ifnull(SUM(profit_usd), 0) FROM transaction_statistics"
+        )
+
+        result = self.sqlite_database.fetch_one(query)
+        return Statistics(int(result[0]), int(result[1]), int(result[2]))
+
+
+def _rollup_query(granularity: str) -> str:
+    size = STATISTICS_GRANULARITIES[granularity]
+    return (
+        f"SELECT CAST(created_at / {size} AS INTEGER) * {size},"
+        " COUNT(*), SUM(profit), SUM(amount), ifnull(SUM(profit_usd), 0)"
+        " FROM transaction_statistics GROUP BY 1"
+    )
+
+
+def _where(conditions: list[str]) -> str:
+    return "WHERE " + " AND ".join(conditions) if len(conditions) > 0 else ""
@@ -1,4 +1,3 @@
-import uuid
 from dataclasses import dataclass
 from uuid import UUID
 
@@ -24,7 +23,7 @@ class UserSqlite(UserRepository):
         if result is not None:
             raise UserAlreadyExistsError(user.get_email())
         email = user.get_email()
-        private_key = str(user.get_private_key())
+        private_key = self.sqlite_database.encode_key(user.get_private_key())
 
         query2 = "INSERT INTO users (private_key, email) " "VALUES (?, ?);"
         params2 = (
@@ -35,40 +34,53 @@ class UserSqlite(UserRepository):
         self.sqlite_database.execute(query2, params2)
 
     def get(self, private_key: UUID) -> User:
-        query = "SELECT email FROM users WHERE private_key = ?"
-        params = (str(private_key),)
+        query = (
+            "SELECT u.email, uw.public_key FROM users u"
+            " LEFT JOIN users_wallets uw ON uw.private_key = u.private_key"
+            " WHERE u.private_key = ? ORDER BY uw.rowid"
+        )
+        params = (self.sqlite_database.encode_key(private_key),)
 
-        result = self.sqlite_database.fetch_one(query, params)
+        result = self.sqlite_database.fetch_all(query, params)
 
-        if result is None:
+        if len(result) == 0:
             raise UserDoesNotExistError(private_key)
 
-        email = str(result[0])
-        user = self._get_by_email(email)
-        if user is None:
+        email = str(result[0][0])
+        wallets = [
+            self.sqlite_database.decode_key(row[1])
+            for row in result
+            if row[1] is not None
+        ]
+        return User(email, private_key, wallets)
+
+    def authenticate(self, private_key: UUID) -> None:
+        query = "SELECT 1 FROM users WHERE private_key = ?"
+        params = (self.sqlite_database.encode_key(private_key),)
+
+        if self.sqlite_database.fetch_one(query, params) is None:
             raise UserDoesNotExistError(private_key)
-        return user
 
     def _get_by_email(self, email: str) -> User | None:
-        query = "SELECT private_key FROM users WHERE email = ?"
+        query = (
+            "SELECT u.private_key, uw.public_key FROM users u"
+            " LEFT JOIN users_wallets uw ON uw.private_key = u.private_key"
+            " WHERE u.email = ? ORDER BY uw.rowid"
+        )
         params = (email,)
 
-        result = self.sqlite_database.fetch_one(query, params)
+        result = self.sqlite_database.fetch_all(query, params)
 
-        if result is None:
+        if len(result) == 0:
             return None
-        user_private_key = uuid.UUID(result[0])
-
-        query2 = "SELECT public_key FROM users_wallets WHERE private_key = ?"
-        params2 = (str(user_private_key),)
 
-        result2 = self.sqlite_database.fetch_all(query2, params2)
-
-        return (
-            User(email, user_private_key)
-            if result2 is None
-            else User(email, user_private_key, [uuid.UUID(row[0]) for row in result2])
-        )
+        user_private_key = self.sqlite_database.decode_key(result[0][0])
+        wallets = [
+            self.sqlite_database.decode_key(row[1])
+            for row in result
+            if row[1] is not None
+        ]
+        return User(email, user_private_key, wallets)
 
     def add_wallet(self, user_key: UUID, wallet_key: UUID) -> None:
         user = self.get(user_key)
@@ -80,8 +92,8 @@ class UserSqlite(UserRepository):
 
         query = "INSERT INTO users_wallets (private_key, public_key) " "VALUES (?, ?);"
         params = (
-            str(user_key),
-            str(wallet_key),
+            self.sqlite_database.encode_key(user_key),
+            self.sqlite_database.encode_key(wallet_key),
         )
 
         self.sqlite_database.execute(query, params)
@@ -1,9 +1,24 @@
 from dataclasses import dataclass
+from typing import Any, Callable, Iterator
 from uuid import UUID
 
-from core.errors import InvalidOwnerError, SameWalletsError, WalletDoesNotExistError
-from core.transaction import Transaction
-from core.wallet import Wallet, WalletRepository
+from constants import DB_FETCH_SIZE
+from core.errors import (
+    InvalidOwnerError,
+    NotEnoughBalanceError,
+    SameWalletsError,
+    WalletDoesNotExistError,
+)
+from core.transaction import Transaction, TransactionCursor
+from core.transaction_statistic import (
+    TransactionStatistic,
+    TransactionStatisticRepository,
+    TransferResult,
+    get_balance_changes,
+    plan_payout,
+    plan_transfers,
+)
+from core.wallet import Wallet, WalletHeader, WalletRepository
 from infra.sqlite.database_sqlite import SqliteDatabase
 from infra.sqlite.transaction_sqlite import TransactionSqlite
 
@@ -26,20 +41,21 @@ class WalletSqlite(WalletRepository):
             "VALUES (?, ?, ?);"
         )
         params = (
-            str(public_key),
-            str(private_key),
+            self.sqlite_database.encode_key(public_key),
+            self.sqlite_database.encode_key(private_key),
             balance,
         )
         self.sqlite_database.execute(query, params)
 
         for transaction in transactions:
             query2 = (
-                "INSERT INTO wallets_transactions (wallet_key, transaction_key) "
-                "VALUES (?, ?);"
+                "INSERT INTO wallets_transactions"
+                " (wallet_key, transaction_key, created_at) VALUES (?, ?, ?);"
             )
             params2 = (
-                str(public_key),
-                str(transaction.get_key()),
+                self.sqlite_database.encode_key(public_key),
+                self.sqlite_database.encode_key(transaction.get_key()),
+                transaction.get_created_at(),
             )
             self.sqlite_database.execute(query2, params2)
 
@@ -47,40 +63,66 @@ class WalletSqlite(WalletRepository):
             self.transactions.create(transaction)
 
     def get(self, wallet_key: UUID) -> Wallet:
-        query = "SELECT private_key, balance FROM wallets WHERE public_key = ?"
-        params = (str(wallet_key),)
+        query = (
+            "SELECT w.private_key, w.balance, t.key, t.to_key, t.private_key,"
+            " t.from_key, t.amount, t.created_at FROM wallets w"
+            " LEFT JOIN wallets_transactions wt ON wt.wallet_key = w.public_key"
+            " LEFT JOIN transactions t ON t.key = wt.transaction_key"
+            " WHERE w.public_key = ? ORDER BY wt.rowid"
+        )
+        params = (self.sqlite_database.encode_key(wallet_key),)
 
-        result = self.sqlite_database.fetch_one(query, params)
+        result = self.sqlite_database.fetch_all(query, params)
 
-        if result is None:
+        if len(result) == 0:
             raise WalletDoesNotExistError(wallet_key)
 
-        private_key = UUID(result[0])
-        balance = result[1]
-
-        query2 = "SELECT transaction_key FROM wallets_transactions WHERE wallet_key = ?"
-        params2 = (str(wallet_key),)
-
-        result2 = self.sqlite_database.fetch_all(query2, params2)
+        private_key = self.sqlite_database.decode_key(result[0][0])
+        balance = result[0][1]
 
         transactions: dict[UUID, Transaction] = {}
-        for row in result2:
-            transaction_key = UUID(row[0])
-            transactions[transaction_key] = self.transactions.get(transaction_key)
+        for row in result:
+            if row[2] is None:
+                continue
+            transaction_key = self.sqlite_database.decode_key(row[2])
+            transactions[transaction_key] = Transaction(
+                transaction_key,
+                self.sqlite_database.decode_key(row[3]),
+                self.sqlite_database.decode_key(row[4]),
+                self.sqlite_database.decode_key(row[5]),
+                row[6],
+                row[7],
+            )
 
         return Wallet(wallet_key, private_key, balance, transactions)
 
-    def update_balance(self, wallet_key: UUID, amount: int) -> None:
-        wallet = self.get(wallet_key)
-        balance = wallet.get_balance()
+    def get_header(self, wallet_key: UUID) -> WalletHeader:
+        query = "SELECT private_key, balance FROM wallets WHERE public_key = ?"
+        params = (self.sqlite_database.encode_key(wallet_key),)
+
+        result = self.sqlite_database.fetch_one(query, params)
+
+        if result is None:
+            raise WalletDoesNotExistError(wallet_key)
 
-        query = "UPDATE wallets SET balance = ? WHERE public_key = ?"
+        return WalletHeader(
+            wallet_key, self.sqlite_database.decode_key(result[0]), result[1]
+        )
+
+    def update_balance(self, wallet_key: UUID, amount: int) -> None:
+        query = (
+            "UPDATE wallets SET balance = balance + ?"
+            " WHERE public_key = ? AND balance + ? >= 0"
+        )
         params = (
-            balance + amount,
-            str(wallet_key),
+            amount,
+            self.sqlite_database.encode_key(wallet_key),
+            amount,
         )
 
-        self.sqlite_database.execute(query, params)
+        if self.sqlite_database.execute(query, params) == 0:
+            self.get_header(wallet_key)
+            raise NotEnoughBalanceError(wallet_key)
 
     def add_transaction(self, transaction: Transaction) -> None:
         from_user_id = transaction.get_private_key()
@@ -90,30 +132,163 @@ class WalletSqlite(WalletRepository):
         if from_wallet_id == to_wallet_id:
             raise SameWalletsError(from_wallet_id)
 
-        self.get_wallet(from_user_id, from_wallet_id)
-        amount = transaction.get_amount()
+        self.get_wallet_header(from_user_id, from_wallet_id)
+        self.sqlite_database.run_transaction(lambda: self._move(transaction))
 
-        self.update_balance(from_wallet_id, -amount)
-        self.update_balance(to_wallet_id, amount)
+    def transfer(
+        self,
+        transaction: Transaction,
+        statistics: TransactionStatisticRepository,
+    ) -> TransactionStatistic:
+        from_wallet_id = transaction.get_from_key()
+        if from_wallet_id == transaction.get_to_key():
+            raise SameWalletsError(from_wallet_id)
 
-        query = (
-            "INSERT INTO wallets_transactions (wallet_key, transaction_key) "
-            "VALUES (?, ?)"
+        return self.sqlite_database.run_transaction(
+            lambda: self._transfer(transaction, statistics)
         )
-        params = (
-            str(from_wallet_id),
-            str(transaction.get_key()),
+
+    def _transfer(
+        self,
+        transaction: Transaction,
+        statistics: TransactionStatisticRepository,
+    ) -> TransactionStatistic:
+        from_wallet = self.get_wallet_header(
+            transaction.get_private_key(), transaction.get_from_key()
         )
-        params2 = (
-            str(to_wallet_id),
-            str(transaction.get_key()),
+        to_wallet = self.get_header(transaction.get_to_key())
+
+        statistic = TransactionStatistic(
+            transaction_key=transaction.get_key(),
+            amount=transaction.get_amount(),
+            created_at=transaction.get_created_at(),
         )
+        statistic.system_update(self, from_wallet, to_wallet, transaction.get_amount())
+        self._move(transaction)
+        statistics.create(statistic)
+        return statistic
 
-        self.sqlite_database.execute(query, params)
-        self.sqlite_database.execute(query, params2)
+    def transfer_many(
+        self,
+        transactions: list[Transaction],
+        statistics: TransactionStatisticRepository,
+    ) -> list[TransferResult]:
+        return self.sqlite_database.run_transaction(
+            lambda: self._transfer_many(transactions, statistics)
+        )
+
+    def _transfer_many(
+        self,
+        transactions: list[Transaction],
+        statistics: TransactionStatisticRepository,
+    ) -> list[TransferResult]:
+        wallet_keys = dict.fromkeys(
+            key
+            for transaction in transactions
+            for key in (transaction.get_from_key(), transaction.get_to_key())
+        )
+
+        results = plan_transfers(transactions, self._get_headers(list(wallet_keys)))
+        accepted = [
+            transaction
+            for transaction, result in zip(transactions, results)
+            if isinstance(result, TransactionStatistic)
+        ]
+        planned = [
+            result for result in results if isinstance(result, TransactionStatistic)
+        ]
+        if len(accepted) > 0:
+            self._apply(accepted, planned, statistics)
+        return results
 
+    def payout(
+        self,
+        user_key: UUID,
+        from_key: UUID,
+        legs: list[tuple[UUID, int]],
+        statistics: TransactionStatisticRepository,
+    ) -> list[Transaction]:
+        return self.sqlite_database.run_transaction(
+            lambda: self._payout(user_key, from_key, legs, statistics)
+        )
+
+    def _payout(
+        self,
+        user_key: UUID,
+        from_key: UUID,
+        legs: list[tuple[UUID, int]],
+        statistics: TransactionStatisticRepository,
+    ) -> list[Transaction]:
+        wallet_keys = dict.fromkeys([from_key, *(to_key for to_key, _ in legs)])
+
+        transactions, planned = plan_payout(
+            user_key, from_key, legs, self._get_headers(list(wallet_keys))
+        )
+        self._apply(transactions, planned, statistics)
+        return transactions
+
+    def _apply(
+        self,
+        transactions: list[Transaction],
+        planned: list[TransactionStatistic],
+        statistics: TransactionStatisticRepository,
+    ) -> None:
+        self._update_balances(get_balance_changes(transactions, planned))
+        self._link(transactions)
+        self.transactions.create_many(transactions)
+        statistics.create_many(planned)
+
+    def _move(self, transaction: Transaction) -> None:
+        amount = transaction.get_amount()
+
+        self.update_balance(transaction.get_from_key(), -amount)
+        self.update_balance(transaction.get_to_key(), amount)
+        self._link([transaction])
         self.transactions.create(transaction)
 
+    def _link(self, transactions: list[Transaction]) -> None:
+        query = (
+            "INSERT INTO wallets_transactions"
+            " (wallet_key, transaction_key, created_at) VALUES (?, ?, ?)"
+        )
+        params = [
+            (
+                self.sqlite_database.encode_key(wallet_key),
+                self.sqlite_database.encode_key(transaction.get_key()),
+                transaction.get_created_at(),
+            )
+            for transaction in transactions
+            for wallet_key in (transaction.get_from_key(), transaction.get_to_key())
+        ]
+        self.sqlite_database.execute_many(query, params)
+
+    def _get_headers(self, wallet_keys: list[UUID]) -> dict[UUID, WalletHeader]:
+        placeholders = ", ".join("?" for _ in wallet_keys)
+        query = (
+            "SELECT public_key, private_key, balance FROM wallets"
+            f" WHERE public_key IN ({placeholders})"
+        )
+        params = tuple(self.sqlite_database.encode_key(key) for key in wallet_keys)
+
+        result = self.sqlite_database.fetch_all(query, params)
+        headers = {}
+        for row in result:
+            public_key = self.sqlite_database.decode_key(row[0])
+            headers[public_key] = WalletHeader(
+                public_key, self.sqlite_database.decode_key(row[1]), row[2]
+            )
+        return headers
+
+    def _update_balances(self, changes: dict[UUID, int]) -> None:
+        # The balances were read inside the same write transaction, so the
+        # planned changes cannot overdraw a wallet.
+        query = "UPDATE wallets SET balance = balance + ? WHERE public_key = ?"
+        params = [
+            (change, self.sqlite_database.encode_key(wallet_key))
+            for wallet_key, change in changes.items()
+        ]
+        self.sqlite_database.execute_many(query, params)
+
     def get_wallet(self, user_key: UUID, wallet_key: UUID) -> Wallet:
         wallet = self.get(wallet_key)
         if wallet.get_private_key() != user_key:
@@ -121,8 +296,67 @@ class WalletSqlite(WalletRepository):
         else:
             return wallet
 
-    def get_transactions(self, user_key: UUID, wallet_key: UUID) -> list[Transaction]:
-        return self.get_wallet(user_key, wallet_key).get_transactions()
+    def get_wallet_header(self, user_key: UUID, wallet_key: UUID) -> WalletHeader:
+        wallet = self.get_header(wallet_key)
+        if wallet.get_private_key() != user_key:
+            raise InvalidOwnerError(user_key)
+        else:
+            return wallet
+
+    def get_transactions(
+        self,
+        user_key: UUID,
+        wallet_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> list[Transaction]:
+        self.get_wallet_header(user_key, wallet_key)
+
+        query, params = self._wallet_transactions_query(wallet_key, limit, after)
+        result = self.sqlite_database.fetch_all(query, params)
+        return [self._to_transaction(row) for row in result]
+
+    def get_user_transactions(
+        self,
+        user_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> list[Transaction]:
+        query, params = self._user_transactions_query(user_key, limit, after)
+        result = self.sqlite_database.fetch_all(query, params)
+        return [self._to_transaction(row) for row in result]
+
+    def export_transactions(
+        self, user_key: UUID, wallet_key: UUID
+    ) -> Iterator[Transaction]:
+        self.get_wallet_header(user_key, wallet_key)
+
+        return self._export(
+            lambda after: self._wallet_transactions_query(
+                wallet_key, DB_FETCH_SIZE, after
+            )
+        )
+
+    def export_user_transactions(self, user_key: UUID) -> Iterator[Transaction]:
+        return self._export(
+            lambda after: self._user_transactions_query(user_key, DB_FETCH_SIZE, after)
+        )
+
+    def _export(
+        self,
+        page_query: Callable[[TransactionCursor | None], tuple[str, tuple[Any, ...]]],
+    ) -> Iterator[Transaction]:
+        # Every page is read in full before it is handed out, so the export
+        # holds no pooled connection while its consumer works on the rows.
+        after: TransactionCursor | None = None
+        while True:
+            query, params = page_query(after)
+            result = self.sqlite_database.fetch_all(query, params)
+            page = [self._to_transaction(row) for row in result]
+            yield from page
+            if len(page) < DB_FETCH_SIZE:
+                return
+            after = page[-1].get_cursor()
 
     def clear(self) -> None:
         table_names = (
@@ -131,3 +365,66 @@ class WalletSqlite(WalletRepository):
         )
         self.sqlite_database.clear(table_names)
         self.transactions.clear()
+
+    def _wallet_transactions_query(
+        self,
+        wallet_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> tuple[str, tuple[Any, ...]]:
+        return self._transactions_query(
+            "SELECT",
+            "WHERE wt.wallet_key = ?",
+            (self.sqlite_database.encode_key(wallet_key),),
+            limit,
+            after,
+        )
+
+    def _user_transactions_query(
+        self,
+        user_key: UUID,
+        limit: int | None = None,
+        after: TransactionCursor | None = None,
+    ) -> tuple[str, tuple[Any, ...]]:
+        # A transfer between two wallets of the same user is linked to both of
+        # them, so DISTINCT keeps it in the feed once.
+        return self._transactions_query(
+            "SELECT DISTINCT",
+            "JOIN wallets w ON w.public_key = wt.wallet_key WHERE w.private_key = ?",
+            (self.sqlite_database.encode_key(user_key),),
+            limit,
+            after,
+        )
+
+    def _transactions_query(
+        self,
+        select: str,
+        condition: str,
+        params: tuple[Any, ...],
+        limit: int | None,
+        after: TransactionCursor | None,
+    ) -> tuple[str, tuple[Any, ...]]:
+        if after is not None:
+            condition += " AND (wt.created_at, wt.transaction_key) > (?, ?)"
+            params += (
+                after.get_created_at(),
+                self.sqlite_database.encode_key(after.get_key()),
+            )
+        query = (
+            f"{select} t.key, t.to_key, t.private_key, t.from_key, t.amount,"
+            " t.created_at FROM wallets_transactions wt"
+            " JOIN transactions t ON t.key = wt.transaction_key"
+            f" {condition}"
+            " ORDER BY wt.created_at, wt.transaction_key LIMIT ?"
+        )
+        return query, params + (-1 if limit is None else limit,)
+
+    def _to_transaction(self, row: tuple[Any, ...]) -> Transaction:
+        return Transaction(
+            self.sqlite_database.decode_key(row[0]),
+            self.sqlite_database.decode_key(row[1]),
+            self.sqlite_database.decode_key(row[2]),
+            self.sqlite_database.decode_key(row[3]),
+            row[4],
+            row[5],
+        )
@@ -1,16 +1,59 @@
 from __future__ import annotations
 
+import os
+
 import uvicorn
 from dotenv import load_dotenv
 from typer import Typer
 
+from constants import DB_PATH, DB_PRAGMA_PROFILE
+from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.migration_sqlite import convert_keys, migrate
+from infra.sqlite.pragma_sqlite import get_pragma_profile
+from infra.sqlite.transaction_statistic_sqlite import TransactionStatisticSqlite
 from runner.setup import init_app
 
 cli = Typer(no_args_is_help=True, add_completion=False)
 
 
 @cli.command()
-def run(host: str = "127.0.0.1", port: int = 8000) -> None:
+def run(
+    host: str = "127.0.0.1", port: int = 8000, pragma_profile: str | None = None
+) -> None:
     load_dotenv()
+    if pragma_profile is not None:
+        get_pragma_profile(pragma_profile)
+        os.environ["DB_PRAGMA_PROFILE"] = pragma_profile
 
     uvicorn.run(host=host, port=port, app=init_app())
+
+
+@cli.command("migrate")
+def migrate_database(
+    db_path: str = DB_PATH,
+    key_format: str | None = None,
+    pragma_profile: str = DB_PRAGMA_PROFILE,
+) -> None:
+    sqlite_database = SqliteDatabase(db_path, pragma_profile=pragma_profile)
+    version = migrate(sqlite_database)
+    if key_format is not None:
+        convert_keys(sqlite_database, key_format)
+    sqlite_database.close()
+
+    print(f"Database <{db_path}> is at schema version {version}.")
+
+
+@cli.command("rebuild-statistics")
+def rebuild_statistics(
+    db_path: str = DB_PATH, pragma_profile: str = "bulk-load"
+) -> None:
+    sqlite_database = SqliteDatabase(db_path, pragma_profile=pragma_profile)
+    migrate(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database).rebuild_statistics()
+    sqlite_database.close()
+
+    print(
+        f"Rebuilt statistics for <{db_path}>: "
+        f"{statistics.get_transactions_number()} transactions, "
+        f"{statistics.get_platform_profit()} satoshi profit."
+    )
@@ -2,16 +2,37 @@ import os
 
 from fastapi import FastAPI
 
-from constants import DB_PATH
+from constants import (
+    DB_CHECKPOINT_INTERVAL,
+    DB_GROUP_COMMIT_SIZE,
+    DB_GROUP_COMMIT_WINDOW,
+    DB_PATH,
+    DB_PRAGMA_PROFILE,
+    SETTLEMENT_QUEUE_DEPTH,
+)
+from core.converter import RateCache, RateProvider
+from core.settlement import SettlementQueue
+from infra.cache.user_cache import UserCache
 from infra.fastapi.statistics import statistic_api
 from infra.fastapi.transactions import transaction_api
 from infra.fastapi.users import user_api
 from infra.fastapi.wallets import wallet_api
+from infra.in_memory.rate_history_in_memory import RateHistoryInMemory
 from infra.in_memory.transaction_in_memory import TransactionInMemory
 from infra.in_memory.transaction_statistic_in_memory import TransactionStatisticInMemory
 from infra.in_memory.user_in_memory import UserInMemory
 from infra.in_memory.wallet_in_memory import WalletInMemory
+from infra.rates.circuit_breaker_rate_provider import CircuitBreakerRateProvider
+from infra.rates.hedged_rate_provider import HedgedRateProvider
+from infra.rates.http_rate_provider import (
+    blockchain_rate_provider,
+    coinbase_rate_provider,
+)
+from infra.rates.stub_rate_provider import StubRateProvider
+from infra.sqlite.checkpoint_sqlite import SqliteCheckpointScheduler
 from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.migration_sqlite import migrate
+from infra.sqlite.rate_history_sqlite import RateHistorySqlite
 from infra.sqlite.transaction_sqlite import TransactionSqlite
 from infra.sqlite.transaction_statistic_sqlite import TransactionStatisticSqlite
 from infra.sqlite.user_sqlite import UserSqlite
@@ -28,16 +49,72 @@ def init_app() -> FastAPI:
     # comment line below when you are using test-mode
     # os.environ["REPOSITORY_KIND"] = "sqlite"
 
+    sqlite_database: SqliteDatabase | None = None
     if os.getenv("REPOSITORY_KIND", "memory") == "sqlite":
-        sqlite_database = SqliteDatabase(DB_PATH)
+        sqlite_database = SqliteDatabase(
+            DB_PATH,
+            group_commit_size=int(
+                os.getenv("DB_GROUP_COMMIT_SIZE", DB_GROUP_COMMIT_SIZE)
+            ),
+            group_commit_window=float(
+                os.getenv("DB_GROUP_COMMIT_WINDOW", DB_GROUP_COMMIT_WINDOW)
+            ),
+            pragma_profile=os.getenv("DB_PRAGMA_PROFILE", DB_PRAGMA_PROFILE),
+        )
+        migrate(sqlite_database)
         app.state.transactions = TransactionSqlite(sqlite_database)
         app.state.wallets = WalletSqlite(sqlite_database)
-        app.state.users = UserSqlite(sqlite_database)
+        app.state.users = UserCache(UserSqlite(sqlite_database))
         app.state.transaction_statistics = TransactionStatisticSqlite(sqlite_database)
+        app.state.rate_history = RateHistorySqlite(sqlite_database)
+        checkpoints = SqliteCheckpointScheduler(
+            sqlite_database,
+            interval=float(os.getenv("DB_CHECKPOINT_INTERVAL", DB_CHECKPOINT_INTERVAL)),
+        )
+        app.add_event_handler("startup", checkpoints.start)
+        app.add_event_handler("shutdown", checkpoints.stop)
     else:
         app.state.transactions = TransactionInMemory()
-        app.state.wallets = WalletInMemory()
+        app.state.wallets = WalletInMemory(transactions=app.state.transactions)
         app.state.users = UserInMemory()
-        app.state.transaction_statistics = TransactionStatisticInMemory()
+        app.state.rate_history = RateHistoryInMemory()
+        app.state.transaction_statistics = TransactionStatisticInMemory(
+            rate_history=app.state.rate_history
+        )
+
+    app.state.settlements = None
+    if os.getenv("SETTLEMENT_MODE", "sync") == "deferred":
+        app.state.settlements = SettlementQueue(
+            app.state.wallets,
+            app.state.transaction_statistics,
+            max_depth=int(os.getenv("SETTLEMENT_QUEUE_DEPTH", SETTLEMENT_QUEUE_DEPTH)),
+        )
+        app.add_event_handler("startup", app.state.settlements.start)
+        app.add_event_handler("shutdown", app.state.settlements.stop)
+
+    rate_provider = init_rate_provider()
+    app.state.rates = RateCache(
+        rate_provider.fetch_rates, history=app.state.rate_history
+    )
+    app.add_event_handler("startup", app.state.rates.start)
+    app.add_event_handler("shutdown", app.state.rates.stop)
+    app.add_event_handler("shutdown", rate_provider.close)
+
+    # Shutdown handlers run in registration order, so the database closes
+    # only after the settlement queue has drained and the refresher stopped.
+    if sqlite_database is not None:
+        app.add_event_handler("shutdown", sqlite_database.close)
 
     return app
+
+
+def init_rate_provider() -> RateProvider:
+    if os.getenv("RATE_PROVIDER", "http") == "stub":
+        return StubRateProvider()
+
+    return HedgedRateProvider(
+        [
+            CircuitBreakerRateProvider(blockchain_rate_provider()),
+            CircuitBreakerRateProvider(coinbase_rate_provider()),
+        ]
+    )
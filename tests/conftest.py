@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from constants import TEST_DB_PATH
+from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.migration_sqlite import migrate
+
+os.environ.setdefault("RATE_PROVIDER", "stub")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrate_test_database() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    migrate(sqlite_database)
+    sqlite_database.close()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
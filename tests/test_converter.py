@@ -1,10 +1,14 @@
+import threading
 from typing import Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from core.converter import get_btc_to_usd_rate
+from constants import CONVERTER_URL, RATE_PROVIDER_TIMEOUT
+from core.converter import RateCache, get_btc_ticker, get_btc_to_usd_rate
 from core.errors import ConversionError
+from infra.in_memory.rate_history_in_memory import RateHistoryInMemory
+from tests.conftest import FakeClock
 
 
 @pytest.fixture
@@ -31,3 +35,130 @@ def test_failed_request(mock_requests_get: MagicMock) -> None:
 
     with pytest.raises(ConversionError):
         get_btc_to_usd_rate()
+
+
+def test_ticker_keeps_every_currency(mock_requests_get: MagicMock) -> None:
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {
+        "USD": {"last": 50000, "symbol": "$"},
+        "EUR": {"last": 46000, "symbol": "€"},
+    }
+    mock_requests_get.return_value = mock_response
+
+    result = get_btc_ticker()
+
+    assert result == {"USD": 50000, "EUR": 46000}
+    mock_requests_get.assert_called_with(CONVERTER_URL, timeout=RATE_PROVIDER_TIMEOUT)
+
+
+class FakeFetch:
+    def __init__(self, value: float) -> None:
+        self.value = value
+        self.calls = 0
+        self.fail = False
+        self.called = threading.Event()
+
+    def __call__(self) -> float:
+        self.calls += 1
+        self.called.set()
+        if self.fail:
+            raise ConversionError()
+        return self.value
+
+
+def test_rate_cache_serves_fresh_value(clock: FakeClock) -> None:
+    fetch = FakeFetch(50000)
+    rates = RateCache(fetch, ttl=10, max_staleness=100, clock=clock)
+
+    assert rates.get_rate().get_value() == 50000
+    clock.now = 5
+    rate = rates.get_rate()
+
+    assert rate.get_value() == 50000
+    assert rate.get_age() == 5
+    assert fetch.calls == 1
+
+
+def test_rate_cache_serves_stale_value_while_revalidating(clock: FakeClock) -> None:
+    fetch = FakeFetch(50000)
+    rates = RateCache(fetch, ttl=10, max_staleness=100, clock=clock)
+    rates.get_rate()
+
+    fetch.value = 60000
+    fetch.called.clear()
+    clock.now = 50
+    rate = rates.get_rate()
+
+    assert rate.get_value() == 50000
+    assert rate.get_age() == 50
+    assert fetch.called.wait(1)
+
+
+def test_rate_cache_refreshes_synchronously_when_too_stale(clock: FakeClock) -> None:
+    fetch = FakeFetch(50000)
+    rates = RateCache(fetch, ttl=10, max_staleness=100, clock=clock)
+    rates.get_rate()
+
+    fetch.value = 60000
+    clock.now = 100
+    rate = rates.get_rate()
+
+    assert rate.get_value() == 60000
+    assert rate.get_age() == 0
+
+
+def test_rate_cache_fails_without_recent_value(clock: FakeClock) -> None:
+    fetch = FakeFetch(50000)
+    rates = RateCache(fetch, ttl=10, max_staleness=100, clock=clock)
+
+    fetch.fail = True
+    with pytest.raises(ConversionError):
+        rates.get_rate()
+
+    fetch.fail = False
+    rates.get_rate()
+    fetch.fail = True
+    clock.now = 100
+    with pytest.raises(ConversionError):
+        rates.get_rate()
+
+
+def test_rate_cache_background_refresher() -> None:
+    fetch = FakeFetch(50000)
+    rates = RateCache(fetch, ttl=0.01)
+
+    rates.start()
+    assert fetch.called.wait(1)
+    rates.stop()
+
+    assert rates.get_rate().get_value() == 50000
+
+
+def test_rate_cache_serves_every_currency_from_one_fetch() -> None:
+    fetch = MagicMock(return_value={"usd": 50000, "EUR": 46000})
+    rates = RateCache(fetch)
+
+    rate = rates.get_rate()
+
+    assert rate.get_value() == 50000
+    assert rate.get_value("eur") == 46000
+    assert rate.get_currencies() == ["EUR", "USD"]
+    assert fetch.call_count == 1
+    with pytest.raises(ConversionError):
+        rate.get_value("GBP")
+
+
+def test_rate_cache_records_changed_rates_in_history(clock: FakeClock) -> None:
+    fetch = MagicMock(return_value={"USD": 50000, "EUR": 46000})
+    history = RateHistoryInMemory()
+    rates = RateCache(fetch, history=history, wall_clock=clock)
+
+    clock.now = 100
+    rates.refresh()
+    fetch.return_value = {"USD": 51000, "EUR": 46000}
+    clock.now = 200
+    rates.refresh()
+
+    assert history.get_rates_at("USD", [50, 150, 250]) == [None, 50000, 51000]
+    assert history.history["EUR"] == [(100, 46000)]
@@ -0,0 +1,361 @@
+import sys
+import threading
+from pathlib import Path
+from sqlite3 import Connection, IntegrityError, OperationalError, ProgrammingError
+from uuid import uuid4
+
+import pytest
+
+from constants import TEST_DB_PATH
+from core.errors import ConnectionPoolTimeoutError
+from infra.sqlite.checkpoint_sqlite import SqliteCheckpointScheduler
+from infra.sqlite.connection_pool_sqlite import SqliteConnectionPool
+from infra.sqlite.database_sqlite import SqliteDatabase
+
+
+def test_pool_reuses_connection() -> None:
+    pool = SqliteConnectionPool(TEST_DB_PATH, size=2)
+
+    with pool.connection() as connection1:
+        pass
+    with pool.connection() as connection2:
+        pass
+
+    assert connection1 is connection2
+    assert pool.get_opened() == 1
+    pool.close()
+
+
+def test_pool_pins_connection_for_nested_calls() -> None:
+    pool = SqliteConnectionPool(TEST_DB_PATH, size=2)
+
+    with pool.connection() as outer:
+        with pool.connection() as inner:
+            assert inner is outer
+
+    assert pool.get_opened() == 1
+    pool.close()
+
+
+def test_pool_times_out_when_exhausted() -> None:
+    pool = SqliteConnectionPool(TEST_DB_PATH, size=1, timeout=0.01)
+    connection = pool.acquire()
+
+    with pytest.raises(ConnectionPoolTimeoutError, match=TEST_DB_PATH):
+        pool.acquire()
+
+    pool.release(connection)
+    pool.close()
+
+
+def test_pool_replaces_unhealthy_connection() -> None:
+    pool = SqliteConnectionPool(TEST_DB_PATH, size=1, health_check_interval=0)
+    connection = pool.acquire()
+    pool.release(connection)
+    assert pool.get_idle() == 1
+    connection.close()
+
+    replacement = pool.acquire()
+
+    assert replacement is not connection
+    assert replacement.execute("SELECT 1").fetchone() == (1,)
+    assert pool.get_opened() == 1
+    pool.release(replacement)
+    pool.close()
+
+
+def test_pool_replaces_unhealthy_connections_within_bound(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    pool = SqliteConnectionPool(TEST_DB_PATH, size=2, health_check_interval=0)
+    monkeypatch.setattr(pool, "_is_healthy", lambda connection: False)
+
+    def work() -> None:
+        for _ in range(200):
+            pool.release(pool.acquire())
+
+    # Switching threads as often as possible makes a lost slot show up.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert pool.get_opened() <= 2
+    assert pool.get_idle() == pool.get_opened()
+    pool.close()
+
+
+def test_pool_is_bounded_across_threads() -> None:
+    pool = SqliteConnectionPool(TEST_DB_PATH, size=2)
+    used: set[int] = set()
+    lock = threading.Lock()
+
+    def work() -> None:
+        for _ in range(20):
+            with pool.connection() as connection:
+                connection.execute("SELECT 1").fetchone()
+                with lock:
+                    used.add(id(connection))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pool.get_opened() <= 2
+    assert len(used) <= 2
+    pool.close()
+
+
+def test_database_uses_pool() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, pool_size=1)
+
+    assert sqlite_database.fetch_one("SELECT 1") == (1,)
+    assert sqlite_database.fetch_all("SELECT 2") == [(2,)]
+    assert sqlite_database.pool is not None
+    assert sqlite_database.pool.get_opened() == 1
+    assert sqlite_database.pool.get_idle() == 1
+    sqlite_database.close()
+
+
+def test_database_fetch_many_streams_rows() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, pool_size=1)
+    query = (
+        "WITH RECURSIVE numbers(n) AS"
+        " (SELECT 1 UNION ALL SELECT n + 1 FROM numbers WHERE n < 10)"
+        " SELECT n FROM numbers"
+    )
+
+    rows = sqlite_database.fetch_many(query, size=3)
+
+    assert sqlite_database.pool is not None
+    assert next(rows) == (1,)
+    assert sqlite_database.pool.get_idle() == 0
+    assert list(rows) == [(n,) for n in range(2, 11)]
+    assert sqlite_database.pool.get_idle() == 1
+    sqlite_database.close()
+
+
+def test_database_fetch_many_resumes_on_another_thread() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, pool_size=2)
+    rows = sqlite_database.fetch_many("SELECT 1 UNION ALL SELECT 2", size=1)
+
+    assert next(rows) == (1,)
+    remaining: list[tuple[int, ...]] = []
+    thread = threading.Thread(target=lambda: remaining.extend(rows))
+    thread.start()
+    thread.join()
+
+    assert sqlite_database.pool is not None
+    streamed = sqlite_database.pool.acquire()
+    with sqlite_database.connect() as connection:
+        assert connection is not streamed
+    assert remaining == [(2,)]
+    sqlite_database.pool.release(streamed)
+    sqlite_database.close()
+
+
+def test_database_rejects_use_after_close() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, group_commit_size=8)
+    sqlite_database.close()
+
+    with pytest.raises(ProgrammingError):
+        sqlite_database.fetch_one("SELECT 1")
+    with pytest.raises(ProgrammingError):
+        sqlite_database.execute("SELECT 1")
+    assert sqlite_database.pool is not None
+    assert sqlite_database.pool.get_opened() == 0
+
+
+def test_database_without_pool() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, pool_size=0)
+
+    with sqlite_database.connect() as connection:
+        assert isinstance(connection, Connection)
+    assert sqlite_database.pool is None
+    assert sqlite_database.fetch_one("SELECT 1") == (1,)
+
+
+def test_database_transaction_commits() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    key = str(uuid4())
+    query = "INSERT INTO wallets (public_key, private_key, balance) VALUES (?, ?, ?)"
+
+    with sqlite_database.transaction():
+        sqlite_database.execute(query, (key, key, 1))
+        sqlite_database.execute(query, (str(uuid4()), key, 2))
+        assert sqlite_database.in_transaction()
+
+    assert not sqlite_database.in_transaction()
+    rows = sqlite_database.fetch_all(
+        "SELECT balance FROM wallets WHERE private_key = ?", (key,)
+    )
+    assert sorted(rows) == [(1,), (2,)]
+    sqlite_database.clear(("wallets",))
+
+
+def test_database_transaction_rolls_back() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    key = str(uuid4())
+    query = "INSERT INTO wallets (public_key, private_key, balance) VALUES (?, ?, ?)"
+
+    with pytest.raises(IntegrityError):
+        with sqlite_database.transaction():
+            sqlite_database.execute(query, (key, key, 1))
+            sqlite_database.execute(query, (key, key, 2))
+
+    assert (
+        sqlite_database.fetch_one(
+            "SELECT balance FROM wallets WHERE public_key = ?", (key,)
+        )
+        is None
+    )
+
+
+def test_database_group_commit_coalesces_concurrent_writes() -> None:
+    sqlite_database = SqliteDatabase(
+        TEST_DB_PATH, group_commit_size=8, group_commit_window=0.5
+    )
+    key = str(uuid4())
+    query = "INSERT INTO wallets (public_key, private_key, balance) VALUES (?, ?, ?)"
+
+    threads = [
+        threading.Thread(
+            target=sqlite_database.execute, args=(query, (str(uuid4()), key, 1))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    group_commit = sqlite_database.group_commit
+    assert group_commit is not None
+    assert group_commit.get_statements() == 8
+    assert group_commit.get_batches() < 8
+    assert group_commit.get_largest_batch() > 1
+    assert sqlite_database.fetch_one(
+        "SELECT COUNT(*) FROM wallets WHERE private_key = ?", (key,)
+    ) == (8,)
+    sqlite_database.clear(("wallets",))
+    sqlite_database.close()
+
+
+def test_database_group_commit_isolates_failing_write() -> None:
+    sqlite_database = SqliteDatabase(
+        TEST_DB_PATH, group_commit_size=8, group_commit_window=0
+    )
+    key = str(uuid4())
+    query = "INSERT INTO wallets (public_key, private_key, balance) VALUES (?, ?, ?)"
+
+    assert sqlite_database.execute(query, (key, key, 1)) == 1
+    with pytest.raises(IntegrityError):
+        sqlite_database.execute(query, (key, key, 2))
+    assert (
+        sqlite_database.execute_many(
+            query, [(str(uuid4()), key, 3), (str(uuid4()), key, 4)]
+        )
+        == 2
+    )
+
+    rows = sqlite_database.fetch_all(
+        "SELECT balance FROM wallets WHERE private_key = ?", (key,)
+    )
+    assert sorted(rows) == [(1,), (3,), (4,)]
+    sqlite_database.clear(("wallets",))
+    sqlite_database.close()
+
+
+def test_database_group_commit_skips_explicit_transactions() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, group_commit_size=8)
+    key = str(uuid4())
+    query = "INSERT INTO wallets (public_key, private_key, balance) VALUES (?, ?, ?)"
+
+    with sqlite_database.transaction():
+        sqlite_database.execute(query, (key, key, 1))
+
+    assert sqlite_database.group_commit is not None
+    assert sqlite_database.group_commit.get_statements() == 0
+    assert sqlite_database.fetch_one(
+        "SELECT balance FROM wallets WHERE public_key = ?", (key,)
+    ) == (1,)
+    sqlite_database.clear(("wallets",))
+    sqlite_database.close()
+
+
+@pytest.mark.parametrize(
+    "pragma_profile, synchronous", [("durable", 2), ("balanced", 1), ("bulk-load", 0)]
+)
+def test_database_applies_pragma_profile(
+    tmp_path: Path, pragma_profile: str, synchronous: int
+) -> None:
+    sqlite_database = SqliteDatabase(
+        str(tmp_path / "profile.db"), pragma_profile=pragma_profile
+    )
+
+    assert sqlite_database.fetch_one("PRAGMA journal_mode") == ("wal",)
+    assert sqlite_database.fetch_one("PRAGMA synchronous") == (synchronous,)
+    assert sqlite_database.fetch_one("PRAGMA busy_timeout") == (
+        sqlite_database.profile.busy_timeout,
+    )
+    sqlite_database.close()
+
+
+def test_database_rejects_unknown_pragma_profile() -> None:
+    with pytest.raises(ValueError):
+        SqliteDatabase(TEST_DB_PATH, pragma_profile="reckless")
+
+
+def test_checkpoint_scheduler_truncates_log(tmp_path: Path) -> None:
+    database_path = tmp_path / "checkpoint.db"
+    sqlite_database = SqliteDatabase(str(database_path))
+    sqlite_database.execute("CREATE TABLE numbers (n INTEGER)")
+    sqlite_database.execute_many(
+        "INSERT INTO numbers (n) VALUES (?)", [(n,) for n in range(1000)]
+    )
+    scheduler = SqliteCheckpointScheduler(sqlite_database, truncate_frames=1)
+
+    assert (tmp_path / "checkpoint.db-wal").stat().st_size > 0
+    assert scheduler.checkpoint() == (0, 0, 0)
+    assert (tmp_path / "checkpoint.db-wal").stat().st_size == 0
+    assert scheduler.get_checkpoints() == 1
+    assert scheduler.get_truncations() == 1
+    assert sqlite_database.fetch_one("SELECT COUNT(*) FROM numbers") == (1000,)
+    sqlite_database.close()
+
+
+def test_database_group_commit_isolates_unexpected_error() -> None:
+    sqlite_database = SqliteDatabase(
+        TEST_DB_PATH, group_commit_size=8, group_commit_window=0
+    )
+    key = str(uuid4())
+    query = "INSERT INTO wallets (public_key, private_key, balance) VALUES (?, ?, ?)"
+
+    with pytest.raises(OverflowError):
+        sqlite_database.execute(query, (key, key, 2**64))
+    assert sqlite_database.execute(query, (key, key, 1)) == 1
+
+    assert sqlite_database.fetch_one(
+        "SELECT balance FROM wallets WHERE public_key = ?", (key,)
+    ) == (1,)
+    sqlite_database.clear(("wallets",))
+    sqlite_database.close()
+
+
+def test_database_group_commit_fails_fast_without_writer(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(
+        str(tmp_path / "missing" / "database.db"), group_commit_size=8
+    )
+
+    for _ in range(2):
+        with pytest.raises(OperationalError):
+            sqlite_database.execute("CREATE TABLE numbers (n INTEGER)")
+    sqlite_database.close()
@@ -0,0 +1,178 @@
+from pathlib import Path
+
+import pytest
+
+from constants import BITCOIN, DOLLAR
+from core.transaction import Transaction
+from core.user import User
+from core.wallet import Wallet
+from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.migration_sqlite import (
+    MIGRATIONS,
+    Migration,
+    convert_keys,
+    get_key_format,
+    get_schema_version,
+    migrate,
+)
+from infra.sqlite.transaction_statistic_sqlite import TransactionStatisticSqlite
+from infra.sqlite.user_sqlite import UserSqlite
+from infra.sqlite.wallet_sqlite import WalletSqlite
+
+
+def test_migrate_creates_schema(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(str(tmp_path / "migrate.db"))
+
+    assert get_schema_version(sqlite_database) == 0
+    version = migrate(sqlite_database)
+
+    assert version == MIGRATIONS[-1].get_version()
+    tables = {
+        row[0]
+        for row in sqlite_database.fetch_all(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    }
+    assert {
+        "transactions",
+        "wallets",
+        "wallets_transactions",
+        "users",
+        "users_wallets",
+        "transaction_statistics",
+        "schema_migrations",
+    } <= tables
+
+
+def test_migrate_is_idempotent(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(str(tmp_path / "migrate.db"))
+
+    migrate(sqlite_database)
+    version = migrate(sqlite_database)
+
+    rows = sqlite_database.fetch_all("SELECT version FROM schema_migrations")
+    assert version == MIGRATIONS[-1].get_version()
+    assert len(rows) == len(MIGRATIONS)
+
+
+def test_migrate_applies_only_new_migrations(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(str(tmp_path / "migrate.db"))
+    migrate(sqlite_database)
+
+    extra = Migration(
+        MIGRATIONS[-1].get_version() + 1,
+        "add extra table",
+        ("CREATE TABLE extra ([key] TEXT PRIMARY KEY);",),
+    )
+    version = migrate(sqlite_database, MIGRATIONS + (extra,))
+
+    assert version == extra.get_version()
+    assert sqlite_database.fetch_one(
+        "SELECT name FROM schema_migrations WHERE version = ?",
+        (extra.get_version(),),
+    ) == (extra.get_name(),)
+
+
+def test_migrate_values_existing_statistics(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(str(tmp_path / "migrate.db"))
+    migrate(sqlite_database, MIGRATIONS[:4])
+    sqlite_database.execute(
+        "INSERT INTO rate_history (currency, recorded_at, rate) VALUES (?, ?, ?)",
+        ("USD", 10, 100),
+    )
+    sqlite_database.execute(
+        "INSERT INTO transaction_statistics"
+        " (key, transaction_key, profit, created_at)"
+        " VALUES ('a', 'b', ?, 15), ('c', 'd', ?, 5)",
+        (BITCOIN // 100, BITCOIN // 100),
+    )
+
+    migrate(sqlite_database)
+
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    assert statistics.get_buckets("day")[0].get_platform_profit_usd() == DOLLAR
+    assert statistics.get_statistics().get_platform_profit_usd() == DOLLAR
+    assert statistics.check_statistics()
+
+
+def test_wallet_transactions_lookup_uses_index(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(str(tmp_path / "migrate.db"))
+    migrate(sqlite_database)
+
+    plan = sqlite_database.fetch_all(
+        "EXPLAIN QUERY PLAN SELECT transaction_key FROM wallets_transactions"
+        " WHERE wallet_key = ?",
+        ("key",),
+    )
+
+    assert any(
+        "COVERING INDEX wallets_transactions_wallet_created_at" in row[-1]
+        for row in plan
+    )
+
+
+def test_convert_keys_in_place(tmp_path: Path) -> None:
+    database_path = str(tmp_path / "migrate.db")
+    text_database = SqliteDatabase(database_path)
+    migrate(text_database)
+
+    user = User("default@gmail.com")
+    wallet1 = Wallet(private_key=user.get_private_key(), balance=10)
+    wallet2 = Wallet()
+    transaction = Transaction(
+        private_key=user.get_private_key(),
+        from_key=wallet1.get_public_key(),
+        to_key=wallet2.get_public_key(),
+        amount=3,
+    )
+    UserSqlite(text_database).create(user)
+    UserSqlite(text_database).add_wallet(
+        user.get_private_key(), wallet1.get_public_key()
+    )
+    WalletSqlite(text_database).create(wallet1)
+    WalletSqlite(text_database).create(wallet2)
+    WalletSqlite(text_database).add_transaction(transaction)
+    text_database.close()
+
+    blob_database = SqliteDatabase(database_path)
+    convert_keys(blob_database, "blob")
+
+    assert get_key_format(blob_database) == "blob"
+    assert blob_database.key_format == "blob"
+    assert blob_database.fetch_one(
+        "SELECT typeof(public_key), length(public_key) FROM wallets LIMIT 1"
+    ) == ("blob", 16)
+    wallets = WalletSqlite(blob_database)
+    assert wallets.get(wallet1.get_public_key()).get_transactions() == [transaction]
+    assert UserSqlite(blob_database).get(user.get_private_key()).get_wallets() == [
+        wallet1.get_public_key()
+    ]
+
+    blob_database.close()
+
+    blob_database = SqliteDatabase(database_path)
+    migrate(blob_database)
+    assert blob_database.key_format == "blob"
+    assert WalletSqlite(blob_database).get_header(
+        wallet1.get_public_key()
+    ).get_balance() == (10 - 3)
+
+    convert_keys(blob_database, "text")
+    blob_database.close()
+
+    text_database = SqliteDatabase(database_path)
+    assert get_key_format(text_database) == "text"
+    assert text_database.fetch_one(
+        "SELECT typeof(public_key) FROM wallets LIMIT 1"
+    ) == ("text",)
+    assert WalletSqlite(text_database).get(
+        wallet2.get_public_key()
+    ).get_transactions() == [transaction]
+
+
+def test_convert_keys_rejects_unknown_format(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(str(tmp_path / "migrate.db"))
+    migrate(sqlite_database)
+
+    with pytest.raises(ValueError, match="uuid"):
+        convert_keys(sqlite_database, "uuid")
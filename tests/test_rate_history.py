@@ -0,0 +1,53 @@
+from constants import TEST_DB_PATH
+from core.rate_history import RateHistoryRepository
+from infra.in_memory.rate_history_in_memory import RateHistoryInMemory
+from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.rate_history_sqlite import AS_OF_CHUNK_SIZE, RateHistorySqlite
+
+
+def test_rate_history_as_of(
+    repo: RateHistoryRepository = RateHistoryInMemory(),
+) -> None:
+    repo.record({"USD": 100, "EUR": 90}, 10)
+    repo.record({"USD": 200}, 20)
+    repo.record({"USD": 300}, 30)
+
+    assert repo.get_rate_at("USD", 5) is None
+    assert repo.get_rate_at("USD", 10) == 100
+    assert repo.get_rate_at("USD", 29.5) == 200
+    assert repo.get_rate_at("USD", 1000) == 300
+    assert repo.get_rate_at("EUR", 1000) == 90
+    assert repo.get_rate_at("GBP", 1000) is None
+
+
+def test_rate_history_as_of_many(
+    repo: RateHistoryRepository = RateHistoryInMemory(),
+) -> None:
+    repo.record({"USD": 100}, 10)
+    repo.record({"USD": 200}, 20)
+
+    assert repo.get_rates_at("USD", [25, 0, 10, 15]) == [200, None, 100, 100]
+    assert repo.get_rates_at("USD", []) == []
+
+
+def test_rate_history_sqlite() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = RateHistorySqlite(sqlite_database)
+    repo.clear()
+    test_rate_history_as_of(repo)
+    repo.clear()
+    test_rate_history_as_of_many(repo)
+    repo.clear()
+
+
+def test_rate_history_sqlite_as_of_join_in_chunks() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = RateHistorySqlite(sqlite_database)
+    repo.clear()
+    repo.record({"USD": 100}, 10)
+    times = [float(at) for at in range(2 * AS_OF_CHUNK_SIZE + 1)]
+
+    rates = repo.get_rates_at("USD", times)
+
+    assert rates == [None] * 10 + [100] * (len(times) - 10)
+    repo.clear()
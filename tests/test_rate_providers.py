@@ -0,0 +1,176 @@
+import threading
+from time import monotonic
+from unittest.mock import MagicMock
+
+import pytest
+from requests import ConnectionError
+
+from constants import STUB_BTC_RATES
+from core.converter import RateProvider, parse_ticker
+from core.errors import ConversionError
+from infra.rates.circuit_breaker_rate_provider import CircuitBreakerRateProvider
+from infra.rates.hedged_rate_provider import HedgedRateProvider
+from infra.rates.http_rate_provider import (
+    HttpRateProvider,
+    parse_coinbase_rates,
+)
+from infra.rates.stub_rate_provider import StubRateProvider
+from tests.conftest import FakeClock
+
+
+class FakeRateProvider(RateProvider):
+    def __init__(self, rate: float, delay: float = 0, fail: bool = False) -> None:
+        self.rate = rate
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def fetch_rates(self) -> dict[str, float]:
+        self.calls += 1
+        threading.Event().wait(self.delay)
+        if self.fail:
+            raise ConversionError()
+        return {"USD": self.rate}
+
+
+def test_stub_rate_provider() -> None:
+    assert StubRateProvider().fetch_rates() == STUB_BTC_RATES
+    assert StubRateProvider({"USD": 1.5}).fetch_rate() == 1.5
+
+    with pytest.raises(ConversionError):
+        StubRateProvider({"EUR": 1.5}).fetch_rate()
+
+
+def test_http_rate_provider_parses_response() -> None:
+    session = MagicMock()
+    session.get.return_value.status_code = 200
+    session.get.return_value.json.return_value = {
+        "USD": {"last": 50000, "buy": 50010},
+        "EUR": {"last": 46000, "buy": 46010},
+    }
+    provider = HttpRateProvider("url", parse_ticker, 1, session=session)
+
+    assert provider.fetch_rates() == {"USD": 50000, "EUR": 46000}
+    assert provider.fetch_rate() == 50000
+    session.get.assert_called_with("url", timeout=1)
+
+
+def test_http_rate_provider_parses_coinbase_rates() -> None:
+    session = MagicMock()
+    session.get.return_value.status_code = 200
+    session.get.return_value.json.return_value = {
+        "data": {"currency": "BTC", "rates": {"USD": "50000.5", "EUR": "46000"}}
+    }
+    provider = HttpRateProvider("url", parse_coinbase_rates, session=session)
+
+    assert provider.fetch_rates() == {"USD": 50000.5, "EUR": 46000}
+
+
+def test_http_rate_provider_fails_on_bad_response() -> None:
+    session = MagicMock()
+    provider = HttpRateProvider("url", parse_coinbase_rates, session=session)
+
+    session.get.return_value.status_code = 503
+    with pytest.raises(ConversionError, match="url"):
+        provider.fetch_rate()
+
+    session.get.return_value.status_code = 200
+    session.get.return_value.json.return_value = {"data": {"amount": "1"}}
+    with pytest.raises(ConversionError, match="url"):
+        provider.fetch_rate()
+
+    session.get.side_effect = ConnectionError()
+    with pytest.raises(ConversionError, match="url"):
+        provider.fetch_rate()
+
+
+def test_circuit_breaker_opens_after_failures(clock: FakeClock) -> None:
+    provider = FakeRateProvider(50000, fail=True)
+    breaker = CircuitBreakerRateProvider(
+        provider, failure_threshold=2, reset_timeout=10, clock=clock
+    )
+
+    for _ in range(3):
+        with pytest.raises(ConversionError):
+            breaker.fetch_rate()
+
+    assert breaker.is_open()
+    assert provider.calls == 2
+
+
+def test_circuit_breaker_half_opens_after_timeout(clock: FakeClock) -> None:
+    provider = FakeRateProvider(50000, fail=True)
+    breaker = CircuitBreakerRateProvider(
+        provider, failure_threshold=1, reset_timeout=10, clock=clock
+    )
+    with pytest.raises(ConversionError):
+        breaker.fetch_rate()
+
+    clock.now = 10
+    with pytest.raises(ConversionError):
+        breaker.fetch_rate()
+    assert breaker.is_open()
+    assert provider.calls == 2
+
+    clock.now = 20
+    provider.fail = False
+    assert breaker.fetch_rate() == 50000
+    assert not breaker.is_open()
+
+
+def test_hedged_provider_returns_first_answer() -> None:
+    slow = FakeRateProvider(1, delay=1)
+    fast = FakeRateProvider(2)
+    hedged = HedgedRateProvider([slow, fast], hedge_delay=0.01, deadline=0.5)
+
+    start = monotonic()
+    assert hedged.fetch_rate() == 2
+    assert monotonic() - start < 0.5
+    hedged.close()
+
+
+def test_hedged_provider_does_not_hedge_fast_answers() -> None:
+    fast = FakeRateProvider(1)
+    other = FakeRateProvider(2)
+    hedged = HedgedRateProvider([fast, other], hedge_delay=0.5, deadline=1)
+
+    assert hedged.fetch_rate() == 1
+    assert other.calls == 0
+    hedged.close()
+
+
+def test_hedged_provider_falls_through_failures() -> None:
+    failing = FakeRateProvider(1, fail=True)
+    working = FakeRateProvider(2)
+    hedged = HedgedRateProvider([failing, working], hedge_delay=0.5, deadline=1)
+
+    assert hedged.fetch_rate() == 2
+    hedged.close()
+
+
+def test_hedged_provider_respects_deadline() -> None:
+    slow = FakeRateProvider(1, delay=1)
+    hedged = HedgedRateProvider([slow, FakeRateProvider(2, fail=True)], 0.01, 0.05)
+
+    start = monotonic()
+    with pytest.raises(ConversionError):
+        hedged.fetch_rate()
+    assert monotonic() - start < 0.5
+    hedged.close()
+
+
+def test_hedged_provider_closes_sessions() -> None:
+    sessions = [MagicMock(), MagicMock()]
+    hedged = HedgedRateProvider(
+        [
+            CircuitBreakerRateProvider(
+                HttpRateProvider("url", parse_ticker, session=session)
+            )
+            for session in sessions
+        ]
+    )
+
+    hedged.close()
+
+    for session in sessions:
+        session.close.assert_called_once_with()
@@ -0,0 +1,116 @@
+from sqlite3 import OperationalError
+from uuid import uuid4
+
+import pytest
+
+from core.errors import (
+    NotEnoughBalanceError,
+    SettlementQueueFullError,
+    TransactionDoesNotExistError,
+)
+from core.settlement import FAILED, PENDING, REJECTED, SETTLED, SettlementQueue
+from core.transaction import Transaction
+from core.wallet import Wallet
+from infra.in_memory.transaction_statistic_in_memory import TransactionStatisticInMemory
+from infra.in_memory.wallet_in_memory import WalletInMemory
+
+
+def create_queue(**kwargs: int) -> tuple[SettlementQueue, Wallet, Wallet]:
+    wallets = WalletInMemory()
+    wallet1 = Wallet(balance=100)
+    wallet2 = Wallet(private_key=wallet1.get_private_key(), balance=0)
+    wallets.create(wallet1)
+    wallets.create(wallet2)
+    queue = SettlementQueue(wallets, TransactionStatisticInMemory(), **kwargs)
+    return queue, wallet1, wallet2
+
+
+def transfer(from_wallet: Wallet, to_wallet: Wallet, amount: int) -> Transaction:
+    return Transaction(
+        private_key=from_wallet.get_private_key(),
+        from_key=from_wallet.get_public_key(),
+        to_key=to_wallet.get_public_key(),
+        amount=amount,
+    )
+
+
+def test_settlement_queue_settles_in_batches() -> None:
+    queue, wallet1, wallet2 = create_queue()
+    settled = queue.submit(transfer(wallet1, wallet2, 60))
+    rejected = queue.submit(transfer(wallet1, wallet2, 60))
+
+    assert settled.get_status() == PENDING
+    assert queue.get_depth() == 2
+    assert queue.settle() == 2
+
+    assert queue.get_batches() == 1
+    assert queue.get_depth() == 0
+    assert queue.get(settled.get_transaction().get_key()).get_status() == SETTLED
+    assert rejected.get_status() == REJECTED
+    assert isinstance(rejected.get_error(), NotEnoughBalanceError)
+    assert queue.wallets.get(wallet2.get_public_key()).get_balance() == 60
+
+
+def test_settlement_queue_fails_batch_on_unexpected_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    queue, wallet1, wallet2 = create_queue()
+    settlement = queue.submit(transfer(wallet1, wallet2, 10))
+
+    def transfer_many(*args: object) -> None:
+        raise OperationalError("database is locked")
+
+    monkeypatch.setattr(queue.wallets, "transfer_many", transfer_many)
+    assert queue.settle() == 1
+
+    assert settlement.get_status() == FAILED
+    assert isinstance(settlement.get_error(), OperationalError)
+    assert queue.wallets.get(wallet2.get_public_key()).get_balance() == 0
+
+
+def test_settlement_queue_applies_backpressure() -> None:
+    queue, wallet1, wallet2 = create_queue(max_depth=1)
+    queue.submit(transfer(wallet1, wallet2, 1))
+
+    with pytest.raises(SettlementQueueFullError):
+        queue.submit(transfer(wallet1, wallet2, 1))
+    assert queue.get_depth() == 1
+
+
+def test_settlement_queue_batch_size() -> None:
+    queue, wallet1, wallet2 = create_queue(batch_size=2)
+    for _ in range(3):
+        queue.submit(transfer(wallet1, wallet2, 1))
+
+    assert queue.settle() == 2
+    assert queue.settle() == 1
+    assert queue.settle() == 0
+
+
+def test_settlement_queue_unknown_transaction() -> None:
+    queue, _, _ = create_queue()
+    key = uuid4()
+
+    with pytest.raises(TransactionDoesNotExistError, match=str(key)):
+        queue.get(key)
+
+
+def test_settlement_queue_forgets_oldest_results() -> None:
+    queue, wallet1, wallet2 = create_queue(results_limit=1)
+    first = queue.submit(transfer(wallet1, wallet2, 1))
+    second = queue.submit(transfer(wallet1, wallet2, 1))
+    queue.settle()
+
+    assert queue.get(second.get_transaction().get_key()) == second
+    with pytest.raises(TransactionDoesNotExistError):
+        queue.get(first.get_transaction().get_key())
+
+
+def test_settlement_queue_worker_drains_on_stop() -> None:
+    queue, wallet1, wallet2 = create_queue()
+    queue.start()
+    settlements = [queue.submit(transfer(wallet1, wallet2, 1)) for _ in range(10)]
+    queue.stop()
+
+    assert [settlement.get_status() for settlement in settlements] == [SETTLED] * 10
+    assert queue.wallets.get(wallet2.get_public_key()).get_balance() == 10
@@ -1,9 +1,10 @@
+from unittest.mock import MagicMock
 from uuid import uuid4
 
 import pytest
 from fastapi.testclient import TestClient
 
-from constants import ADMIN_API_KEY
+from constants import ADMIN_API_KEY, BITCOIN, STUB_BTC_RATES, TRANSFER_FEE
 from runner.setup import init_app
 
 
@@ -20,7 +21,11 @@ def test_get_statistics_success(client: TestClient) -> None:
     assert response.status_code == 200
     assert "statistics" in response.json()
     assert response.json() == {
-        "statistics": {"transactions_number": 0, "platform_profit": 0.0}
+        "statistics": {
+            "transactions_number": 0,
+            "platform_profit": 0.0,
+            "platform_profit_usd": 0.0,
+        }
     }
 
 
@@ -33,3 +38,113 @@ def test_get_statistics_invalid_admin_key(client: TestClient) -> None:
     assert response.json() == {
         "error": {"message": f"Invalid admin API key <{invalid_api_key}>"}
     }
+
+
+def test_get_statistics_reports_usd_profit(client: TestClient) -> None:
+    user1 = client.post("/users", json={"email": "a@example.com"}).json()["user"]
+    user2 = client.post("/users", json={"email": "b@example.com"}).json()["user"]
+    from_key = client.post("/wallets", headers=user1).json()["wallet"]["public_key"]
+    to_key = client.post("/wallets", headers=user2).json()["wallet"]["public_key"]
+    client.post(
+        "/transactions",
+        json={"from_key": from_key, "to_key": to_key, "amount": 0.1},
+        headers=user1,
+    )
+
+    response = client.get("/statistics", headers={"api_key": str(ADMIN_API_KEY)})
+
+    profit = 0.1 * BITCOIN * TRANSFER_FEE / BITCOIN
+    statistics = response.json()["statistics"]
+    assert statistics["platform_profit"] == pytest.approx(profit)
+    assert statistics["platform_profit_usd"] == pytest.approx(
+        profit * STUB_BTC_RATES["USD"]
+    )
+
+
+def test_get_statistics_by_granularity(client: TestClient) -> None:
+    user1 = client.post("/users", json={"email": "a@example.com"}).json()["user"]
+    user2 = client.post("/users", json={"email": "b@example.com"}).json()["user"]
+    from_key = client.post("/wallets", headers=user1).json()["wallet"]["public_key"]
+    to_key = client.post("/wallets", headers=user2).json()["wallet"]["public_key"]
+    for _ in range(2):
+        client.post(
+            "/transactions",
+            json={"from_key": from_key, "to_key": to_key, "amount": 0.1},
+            headers=user1,
+        )
+
+    response = client.get(
+        "/statistics",
+        params={"granularity": "day"},
+        headers={"api_key": str(ADMIN_API_KEY)},
+    )
+
+    assert response.status_code == 200
+    statistics = response.json()["statistics"]
+    buckets = response.json()["buckets"]
+    assert statistics["transactions_number"] == 2
+    assert len(buckets) == 1
+    assert buckets[0]["transactions_number"] == 2
+    assert buckets[0]["volume"] == pytest.approx(0.2)
+    assert buckets[0]["platform_profit"] == statistics["platform_profit"]
+
+
+def test_get_statistics_totals_match_daily_buckets(client: TestClient) -> None:
+    user1 = client.post("/users", json={"email": "a@example.com"}).json()["user"]
+    user2 = client.post("/users", json={"email": "b@example.com"}).json()["user"]
+    from_key = client.post("/wallets", headers=user1).json()["wallet"]["public_key"]
+    to_key = client.post("/wallets", headers=user2).json()["wallet"]["public_key"]
+    client.post(
+        "/transactions",
+        json={"from_key": from_key, "to_key": to_key, "amount": 0.1},
+        headers=user1,
+    )
+    headers = {"api_key": str(ADMIN_API_KEY)}
+
+    totals = client.get("/statistics", headers=headers).json()["statistics"]
+    daily = client.get(
+        "/statistics", params={"granularity": "day"}, headers=headers
+    ).json()["statistics"]
+
+    assert totals == daily
+
+
+def test_get_statistics_reads_only_totals(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    statistics = client.app.state.transaction_statistics  # type: ignore
+    monkeypatch.setattr(
+        statistics, "get_buckets", MagicMock(side_effect=AssertionError)
+    )
+
+    response = client.get("/statistics", headers={"api_key": str(ADMIN_API_KEY)})
+
+    assert response.status_code == 200
+
+
+def test_get_statistics_in_empty_range(client: TestClient) -> None:
+    response = client.get(
+        "/statistics",
+        params={"from": "2020-01-01T00:00:00", "to": "2020-01-02T00:00:00"},
+        headers={"api_key": str(ADMIN_API_KEY)},
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "statistics": {
+            "transactions_number": 0,
+            "platform_profit": 0.0,
+            "platform_profit_usd": 0.0,
+        },
+        "buckets": [],
+    }
+
+
+def test_get_statistics_unknown_granularity(client: TestClient) -> None:
+    response = client.get(
+        "/statistics",
+        params={"granularity": "week"},
+        headers={"api_key": str(ADMIN_API_KEY)},
+    )
+
+    assert response.status_code == 422
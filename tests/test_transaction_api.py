@@ -1,10 +1,11 @@
+import json
 import uuid
 from typing import Any
 
 import pytest
 from fastapi.testclient import TestClient
 
-from constants import BITCOIN
+from constants import BITCOIN, STUB_BTC_RATES
 from runner.setup import init_app
 
 
@@ -150,6 +151,201 @@ def test_can_not_make_non_positive_transaction(client: TestClient) -> None:
     )
 
 
+def test_make_transactions_batch(client: TestClient) -> None:
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    public_key1 = wallet_response1.json()["wallet"]["public_key"]
+    public_key2 = wallet_response2.json()["wallet"]["public_key"]
+
+    response = client.post(
+        "/transactions/batch",
+        json=[
+            {"from_key": public_key1, "to_key": public_key2, "amount": 0.75},
+            {"from_key": public_key1, "to_key": public_key2, "amount": 0.75},
+            {"from_key": public_key1, "to_key": public_key2, "amount": 0},
+            {"from_key": public_key1, "to_key": public_key1, "amount": 0.1},
+        ],
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status_code"] for result in results] == [201, 419, 413, 420]
+    assert results[0]["transaction"]["amount"] == 0.75
+    assert results[1]["error"]["message"] == (
+        f"Wallet with address <{public_key1}> does not have enough balance."
+    )
+    transactions = client.get("/transactions", headers=headers).json()
+    assert len(transactions["transactions"]) == 1
+
+
+def test_make_transactions_batch_matches_single_error_codes(
+    client: TestClient,
+) -> None:
+    user_response, _, _ = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    unknown_key = str(uuid.uuid4())
+    requests = [
+        {"from_key": unknown_key, "to_key": unknown_key, "amount": 0.1},
+        {"from_key": unknown_key, "to_key": unknown_key, "amount": 0},
+    ]
+
+    batch = client.post("/transactions/batch", json=requests, headers=headers)
+
+    for request, result in zip(requests, batch.json()["results"]):
+        single = client.post("/transactions", json=request, headers=headers)
+        assert single.status_code == 405
+        assert result["status_code"] == single.status_code
+        assert result["error"] == single.json()["error"]
+
+
+def test_make_transactions_batch_user_does_not_exist(client: TestClient) -> None:
+    response = client.post(
+        "/transactions/batch", json=[], headers={"api_key": str(uuid.uuid4())}
+    )
+
+    assert response.status_code == 404
+
+
+def test_make_payout(client: TestClient) -> None:
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    public_key1 = wallet_response1.json()["wallet"]["public_key"]
+    public_key2 = wallet_response2.json()["wallet"]["public_key"]
+    other = client.post("/users", json={"email": "other@example.com"})
+    public_key3 = client.post("/wallets", headers=other.json()["user"]).json()[
+        "wallet"
+    ]["public_key"]
+
+    response = client.post(
+        "/transactions/payout",
+        json={
+            "from_key": public_key1,
+            "legs": [
+                {"to_key": public_key2, "amount": 0.25},
+                {"to_key": public_key3, "amount": 0.5},
+            ],
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == 201
+    assert [item["to_key"] for item in response.json()["transactions"]] == [
+        public_key2,
+        public_key3,
+    ]
+    wallet = client.get(f"/wallets/{public_key1}", headers=headers).json()["wallet"]
+    assert wallet["btc_balance"] == pytest.approx(0.25 - 0.5 * 0.015)
+
+
+def test_make_payout_not_enough_balance(client: TestClient) -> None:
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    public_key1 = wallet_response1.json()["wallet"]["public_key"]
+    public_key2 = wallet_response2.json()["wallet"]["public_key"]
+
+    response = client.post(
+        "/transactions/payout",
+        json={
+            "from_key": public_key1,
+            "legs": [
+                {"to_key": public_key2, "amount": 0.5},
+                {"to_key": public_key2, "amount": 0.75},
+            ],
+        },
+        headers=headers,
+    )
+
+    assert response.status_code == 419
+    wallet = client.get(f"/wallets/{public_key1}", headers=headers).json()["wallet"]
+    assert wallet["btc_balance"] == 1
+
+
+def test_make_transaction_deferred(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SETTLEMENT_MODE", "deferred")
+    client = TestClient(init_app())
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    public_key1 = wallet_response1.json()["wallet"]["public_key"]
+    public_key2 = wallet_response2.json()["wallet"]["public_key"]
+
+    response = client.post(
+        "/transactions",
+        json={"from_key": public_key1, "to_key": public_key2, "amount": 0.5},
+        headers=headers,
+    )
+
+    assert response.status_code == 202
+    transfer = response.json()["transfer"]
+    assert transfer["status"] == "pending"
+    status_url = f"/transactions/{transfer['id']}"
+    assert client.get(status_url, headers=headers).json() == response.json()
+
+    client.app.state.settlements.settle()  # type: ignore
+
+    status = client.get(status_url, headers=headers).json()["transfer"]
+    assert status["status"] == "settled"
+    assert status["transaction"]["amount"] == 0.5
+    assert len(client.get("/transactions", headers=headers).json()["transactions"]) == 1
+
+
+def test_get_transaction_status_falls_back_to_repository(client: TestClient) -> None:
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    response = client.post(
+        "/transactions",
+        json={
+            "from_key": wallet_response1.json()["wallet"]["public_key"],
+            "to_key": wallet_response2.json()["wallet"]["public_key"],
+            "amount": 0.5,
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201
+
+    (transaction_key,) = client.app.state.transactions.transactions  # type: ignore
+    status_url = f"/transactions/{transaction_key}"
+    status = client.get(status_url, headers=headers).json()["transfer"]
+
+    assert status["status"] == "settled"
+    assert status["transaction"]["amount"] == 0.5
+    other = client.post("/users", json={"email": "other@example.com"}).json()["user"]
+    assert client.get(status_url, headers=other).status_code == 404
+
+
+def test_make_transaction_deferred_queue_full(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("SETTLEMENT_MODE", "deferred")
+    monkeypatch.setenv("SETTLEMENT_QUEUE_DEPTH", "1")
+    client = TestClient(init_app())
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    request = {
+        "from_key": wallet_response1.json()["wallet"]["public_key"],
+        "to_key": wallet_response2.json()["wallet"]["public_key"],
+        "amount": 0.25,
+    }
+    headers = user_response.json()["user"]
+
+    assert client.post("/transactions", json=request, headers=headers).status_code == (
+        202
+    )
+    response = client.post("/transactions", json=request, headers=headers)
+
+    assert response.status_code == 503
+    assert response.json() == {"error": {"message": "Settlement queue is full."}}
+
+
+def test_get_transaction_status_unknown(client: TestClient) -> None:
+    user_response, _, _ = create_user_and_wallets(client)
+    key = uuid.uuid4()
+
+    response = client.get(f"/transactions/{key}", headers=user_response.json()["user"])
+
+    assert response.status_code == 404
+    assert response.json() == {
+        "error": {"message": f"Transaction with id <{key}> does not exist."}
+    }
+
+
 def test_get_transactions_success(client: TestClient) -> None:
     user_response, _, _ = create_user_and_wallets(client)
 
@@ -159,8 +355,87 @@ def test_get_transactions_success(client: TestClient) -> None:
     assert "transactions" in response.json()
 
 
+def test_get_transactions_reports_usd_value(client: TestClient) -> None:
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    client.post(
+        "/transactions",
+        json={
+            "from_key": wallet_response1.json()["wallet"]["public_key"],
+            "to_key": wallet_response2.json()["wallet"]["public_key"],
+            "amount": 0.5,
+        },
+        headers=user_response.json()["user"],
+    )
+
+    response = client.get("/transactions", headers=user_response.json()["user"])
+
+    transactions = response.json()["transactions"]
+    assert len(transactions) == 1
+    assert transactions[0]["usd_value"] == 0.5 * STUB_BTC_RATES["USD"]
+
+
+def test_get_transactions_in_pages(client: TestClient) -> None:
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    keys = [
+        wallet_response1.json()["wallet"]["public_key"],
+        wallet_response2.json()["wallet"]["public_key"],
+    ]
+    for index in range(3):
+        client.post(
+            "/transactions",
+            json={
+                "from_key": keys[index % 2],
+                "to_key": keys[(index + 1) % 2],
+                "amount": 0.1,
+            },
+            headers=headers,
+        )
+
+    first = client.get("/transactions", params={"limit": 2}, headers=headers)
+    second = client.get(
+        "/transactions",
+        params={"limit": 2, "after": first.json()["next_cursor"]},
+        headers=headers,
+    )
+
+    assert len(first.json()["transactions"]) == 2
+    assert len(second.json()["transactions"]) == 1
+    assert second.json()["next_cursor"] is None
+
+
 def test_get_transactions_user_does_not_exist(client: TestClient) -> None:
     response = client.get("/transactions", headers={"api_key": str(uuid.uuid4())})
 
     assert response.status_code == 404
     assert response.json()["error"]["message"] == "User does not exist."
+
+
+def test_export_transactions(client: TestClient) -> None:
+    user_response, wallet_response1, wallet_response2 = create_user_and_wallets(client)
+    headers = user_response.json()["user"]
+    public_key1 = wallet_response1.json()["wallet"]["public_key"]
+    public_key2 = wallet_response2.json()["wallet"]["public_key"]
+    client.post(
+        "/transactions",
+        json={"from_key": public_key1, "to_key": public_key2, "amount": 0.5},
+        headers=headers,
+    )
+
+    response = client.get("/transactions/export", headers=headers)
+
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    item = json.loads(lines[0])
+    assert item["from_key"] == public_key1
+    assert item["to_key"] == public_key2
+    assert item["usd_value"] == pytest.approx(0.5 * STUB_BTC_RATES["USD"])
+
+
+def test_export_transactions_user_does_not_exist(client: TestClient) -> None:
+    response = client.get(
+        "/transactions/export", headers={"api_key": str(uuid.uuid4())}
+    )
+
+    assert response.status_code == 404
@@ -1,19 +1,24 @@
+import threading
 from math import ceil
 from uuid import UUID, uuid4
 
 import pytest
 
-from constants import TEST_DB_PATH, TRANSFER_FEE
+from constants import BITCOIN, DOLLAR, TEST_DB_PATH, TRANSFER_FEE
 from core.errors import NotEnoughBalanceError, TransactionStatisticDoesNotExistError
+from core.rate_history import RateHistoryRepository
 from core.transaction_statistic import (
     Statistics,
+    StatisticsBucket,
     TransactionStatistic,
     TransactionStatisticRepository,
 )
 from core.wallet import Wallet
+from infra.in_memory.rate_history_in_memory import RateHistoryInMemory
 from infra.in_memory.transaction_statistic_in_memory import TransactionStatisticInMemory
 from infra.in_memory.wallet_in_memory import WalletInMemory
 from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.rate_history_sqlite import RateHistorySqlite
 from infra.sqlite.transaction_statistic_sqlite import TransactionStatisticSqlite
 
 
@@ -163,3 +168,171 @@ def test_transaction_statistic_sqlite_should_not_get_unknown() -> None:
     repo = TransactionStatisticSqlite(sqlite_database)
     test_transaction_statistic_repo_should_not_get_unknown(repo)
     repo.clear()
+
+
+def test_transaction_statistic_in_memory_keeps_running_totals() -> None:
+    repo = TransactionStatisticInMemory()
+    statistic = TransactionStatistic(profit=2)
+    repo.create(statistic)
+    repo.create(TransactionStatistic(profit=3))
+    repo.create(TransactionStatistic(key=statistic.get_key(), profit=4))
+
+    assert repo.get_statistics() == Statistics(2, 7)
+    assert repo.check_statistics()
+
+
+def test_transaction_statistic_in_memory_rebuilds_totals() -> None:
+    repo = TransactionStatisticInMemory()
+    repo.create(TransactionStatistic(profit=2))
+    statistic = TransactionStatistic(profit=5)
+    repo.transaction_statistics[statistic.get_key()] = statistic
+
+    assert not repo.check_statistics()
+    assert repo.rebuild_statistics() == Statistics(2, 7)
+    assert repo.get_statistics() == Statistics(2, 7)
+    assert repo.check_statistics()
+
+
+def test_transaction_statistic_in_memory_concurrent_creates() -> None:
+    repo = TransactionStatisticInMemory()
+
+    def create_many() -> None:
+        for _ in range(500):
+            repo.create(TransactionStatistic(profit=1))
+
+    threads = [threading.Thread(target=create_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert repo.get_statistics() == Statistics(4000, 4000)
+    assert repo.check_statistics()
+
+
+def test_transaction_statistic_repo_check_statistics(
+    repo: TransactionStatisticRepository = TransactionStatisticInMemory(),
+) -> None:
+    before = repo.get_statistics()
+    repo.create(TransactionStatistic(profit=2))
+    repo.create(TransactionStatistic(profit=3))
+
+    assert repo.get_statistics() == Statistics(
+        before.get_transactions_number() + 2, before.get_platform_profit() + 5
+    )
+    assert repo.check_statistics()
+    assert repo.rebuild_statistics() == repo.get_statistics()
+
+
+def test_transaction_statistic_sqlite_check_statistics() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = TransactionStatisticSqlite(sqlite_database)
+    test_transaction_statistic_repo_check_statistics(repo)
+    repo.clear()
+
+
+def test_transaction_statistic_sqlite_get_statistics_is_point_read() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = TransactionStatisticSqlite(sqlite_database)
+    repo.clear()
+    repo.create(TransactionStatistic(profit=2))
+
+    before = sqlite_database.get_query_count()
+    statistics = repo.get_statistics()
+
+    assert sqlite_database.get_query_count() - before == 1
+    assert statistics == Statistics(1, 2)
+    repo.clear()
+
+
+def test_transaction_statistic_sqlite_rebuilds_totals() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = TransactionStatisticSqlite(sqlite_database)
+    repo.clear()
+    repo.create(TransactionStatistic(profit=2))
+    repo.create(TransactionStatistic(profit=5))
+    sqlite_database.execute("DELETE FROM statistics_totals")
+
+    assert repo.get_statistics() == Statistics(0, 0)
+    assert not repo.check_statistics()
+    assert repo.rebuild_statistics() == Statistics(2, 7)
+    assert repo.get_statistics() == Statistics(2, 7)
+    repo.clear()
+
+
+def test_transaction_statistic_repo_get_buckets(
+    repo: TransactionStatisticRepository = TransactionStatisticInMemory(),
+) -> None:
+    day = 86400
+    repo.create(TransactionStatistic(profit=1, amount=10, created_at=day + 60))
+    repo.create(TransactionStatistic(profit=2, amount=20, created_at=day + 120))
+    repo.create(TransactionStatistic(profit=4, amount=40, created_at=day + 3600))
+    repo.create(TransactionStatistic(profit=8, amount=80, created_at=2 * day))
+
+    assert repo.get_buckets("day", day, 3 * day) == [
+        StatisticsBucket(day, 3, 7, 70),
+        StatisticsBucket(2 * day, 1, 8, 80),
+    ]
+    assert repo.get_buckets("hour", day + 1800, 2 * day) == [
+        StatisticsBucket(day, 2, 3, 30),
+        StatisticsBucket(day + 3600, 1, 4, 40),
+    ]
+    assert repo.get_buckets("hour", 2 * day + 1) == [
+        StatisticsBucket(2 * day, 1, 8, 80)
+    ]
+    assert repo.get_buckets("day", end=day) == []
+    assert repo.check_statistics()
+
+
+def test_transaction_statistic_sqlite_get_buckets() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = TransactionStatisticSqlite(sqlite_database)
+    repo.clear()
+    test_transaction_statistic_repo_get_buckets(repo)
+    repo.clear()
+
+
+def test_transaction_statistic_sqlite_rebuilds_rollups() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = TransactionStatisticSqlite(sqlite_database)
+    repo.clear()
+    repo.create(TransactionStatistic(profit=2, amount=5, created_at=100))
+    sqlite_database.execute("UPDATE statistics_hourly SET volume = 0")
+
+    assert not repo.check_statistics()
+    repo.rebuild_statistics()
+    assert repo.check_statistics()
+    assert repo.get_buckets("hour") == [StatisticsBucket(0, 1, 2, 5)]
+    repo.clear()
+
+
+def test_transaction_statistic_repo_values_profit_at_execution(
+    rate_history: RateHistoryRepository = RateHistoryInMemory(),
+    repo: TransactionStatisticRepository | None = None,
+) -> None:
+    if repo is None:
+        repo = TransactionStatisticInMemory(rate_history=rate_history)
+    rate_history.record({"USD": 100}, 10)
+    rate_history.record({"USD": 200}, 20)
+    statistic = TransactionStatistic(profit=BITCOIN // 100, created_at=15)
+    repo.create(statistic)
+    repo.create(TransactionStatistic(profit=BITCOIN // 100, created_at=25))
+    repo.create(TransactionStatistic(profit=BITCOIN // 100, created_at=5))
+
+    assert repo.get(statistic.get_key()).get_profit_usd() == DOLLAR
+    assert repo.get_statistics().get_platform_profit_usd() == 3 * DOLLAR
+    assert repo.get_buckets("day") == [
+        StatisticsBucket(0, 3, 3 * BITCOIN // 100, 0, 3 * DOLLAR)
+    ]
+    assert repo.check_statistics()
+
+
+def test_transaction_statistic_sqlite_values_profit_at_execution() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = TransactionStatisticSqlite(sqlite_database)
+    rate_history = RateHistorySqlite(sqlite_database)
+    repo.clear()
+    rate_history.clear()
+    test_transaction_statistic_repo_values_profit_at_execution(rate_history, repo)
+    repo.clear()
+    rate_history.clear()
@@ -0,0 +1,97 @@
+from uuid import uuid4
+
+import pytest
+
+from core.errors import UserAlreadyExistsError, UserDoesNotExistError
+from core.user import User
+from infra.cache.user_cache import UserCache
+from infra.in_memory.user_in_memory import UserInMemory
+from tests import test_users as user_tests
+from tests.conftest import FakeClock
+
+
+def test_user_cache_behaves_like_repository() -> None:
+    user_tests.test_user_in_memory_create_and_get(UserCache(UserInMemory()))
+    user_tests.test_user_in_memory_add_wallet(UserCache(UserInMemory()))
+    user_tests.test_user_in_memory_authenticate(UserCache(UserInMemory()))
+
+
+def test_user_cache_counts_hits_and_misses() -> None:
+    cache = UserCache(UserInMemory())
+    user = User("default@gmail.com")
+    cache.create(user)
+
+    cache.get(user.get_private_key())
+    cache.authenticate(user.get_private_key())
+    cache.get(user.get_private_key())
+
+    assert cache.get_misses() == 1
+    assert cache.get_hits() == 2
+
+
+def test_user_cache_does_not_cache_unknown_users() -> None:
+    cache = UserCache(UserInMemory())
+    unknown_key = uuid4()
+
+    for _ in range(2):
+        with pytest.raises(UserDoesNotExistError, match=str(unknown_key)):
+            cache.authenticate(unknown_key)
+
+    assert cache.get_misses() == 2
+
+
+def test_user_cache_expires_entries(clock: FakeClock) -> None:
+    cache = UserCache(UserInMemory(), ttl=10, clock=clock)
+    user = User("default@gmail.com")
+    cache.create(user)
+
+    cache.get(user.get_private_key())
+    clock.now = 9
+    cache.get(user.get_private_key())
+    clock.now = 10
+    cache.get(user.get_private_key())
+
+    assert cache.get_hits() == 1
+    assert cache.get_misses() == 2
+
+
+def test_user_cache_evicts_least_recently_used() -> None:
+    cache = UserCache(UserInMemory(), max_size=2)
+    users = [User(f"user{i}@gmail.com") for i in range(3)]
+    for user in users:
+        cache.create(user)
+
+    cache.get(users[0].get_private_key())
+    cache.get(users[1].get_private_key())
+    cache.get(users[0].get_private_key())
+    cache.get(users[2].get_private_key())
+    cache.get(users[0].get_private_key())
+    cache.get(users[1].get_private_key())
+
+    assert cache.get_hits() == 2
+    assert cache.get_misses() == 4
+
+
+def test_user_cache_invalidates_on_add_wallet() -> None:
+    cache = UserCache(UserInMemory())
+    user = User("default@gmail.com")
+    cache.create(user)
+    assert cache.get(user.get_private_key()).get_wallets() == []
+
+    wallet_key = uuid4()
+    cache.add_wallet(user.get_private_key(), wallet_key)
+
+    assert cache.get(user.get_private_key()).get_wallets() == [wallet_key]
+    assert cache.get_misses() == 2
+
+
+def test_user_cache_returns_copies() -> None:
+    cache = UserCache(UserInMemory())
+    user = User("default@gmail.com")
+    cache.create(user)
+
+    cache.get(user.get_private_key()).get_wallets().append(uuid4())
+
+    assert cache.get(user.get_private_key()).get_wallets() == []
+    with pytest.raises(UserAlreadyExistsError):
+        cache.create(User("default@gmail.com"))
@@ -100,6 +100,28 @@ def test_user_in_memory_add_wallet(repo: UserRepository = UserInMemory()) -> Non
         repo.add_wallet(user.get_private_key(), wallet_key)
 
 
+def test_user_in_memory_authenticate(repo: UserRepository = UserInMemory()) -> None:
+    none_existent_user_id = uuid4()
+    with pytest.raises(UserDoesNotExistError, match=str(none_existent_user_id)):
+        repo.authenticate(none_existent_user_id)
+
+    user = User("authenticate@gmail.com")
+    repo.create(user)
+
+    repo.authenticate(user.get_private_key())
+
+
+def test_user_in_memory_email_is_case_sensitive(
+    repo: UserRepository = UserInMemory(),
+) -> None:
+    user = User("Case@gmail.com")
+    repo.create(user)
+
+    repo.create(User("case@gmail.com"))
+    with pytest.raises(UserAlreadyExistsError, match="Case@gmail.com"):
+        repo.create(User("Case@gmail.com"))
+
+
 def test_user_sqlite_create_and_get() -> None:
     sqlite_database = SqliteDatabase(TEST_DB_PATH)
     repo = UserSqlite(sqlite_database)
@@ -112,3 +134,34 @@ def test_user_sqlite_add_wallet() -> None:
     repo = UserSqlite(sqlite_database)
     test_user_in_memory_add_wallet(repo)
     repo.clear()
+
+
+def test_user_sqlite_authenticate() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = UserSqlite(sqlite_database)
+    test_user_in_memory_authenticate(repo)
+    repo.clear()
+
+
+def test_user_sqlite_email_is_case_sensitive() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = UserSqlite(sqlite_database)
+    test_user_in_memory_email_is_case_sensitive(repo)
+    repo.clear()
+
+
+def test_user_sqlite_get_is_single_query() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = UserSqlite(sqlite_database)
+    user = User("default@gmail.com")
+    repo.create(user)
+    wallet_keys = [uuid4(), uuid4()]
+    for wallet_key in wallet_keys:
+        repo.add_wallet(user.get_private_key(), wallet_key)
+
+    before = sqlite_database.get_query_count()
+    result = repo.get(user.get_private_key())
+
+    assert sqlite_database.get_query_count() - before == 1
+    assert result == User("default@gmail.com", user.get_private_key(), wallet_keys)
+    repo.clear()
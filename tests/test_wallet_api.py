@@ -1,9 +1,10 @@
+import json
 import uuid
 
 import pytest
 from fastapi.testclient import TestClient
 
-from constants import MAX_WALLETS_PER_USER
+from constants import MAX_WALLETS_PER_USER, STUB_BTC_RATES
 from runner.setup import init_app
 
 
@@ -50,6 +51,21 @@ def test_create_wallet_wallet_limit_reached(client: TestClient) -> None:
     }
 
 
+def test_create_wallet_failed_conversion_is_not_stored(client: TestClient) -> None:
+    user_response = client.post("/users", json={"email": "test@example.com"})
+    headers = user_response.json()["user"]
+
+    for _ in range(MAX_WALLETS_PER_USER):
+        response = client.post(
+            "/wallets", params={"currencies": "XYZ"}, headers=headers
+        )
+        assert response.status_code == 415
+
+    users = client.app.state.users  # type: ignore
+    assert users.get(uuid.UUID(headers["api_key"])).get_wallets() == []
+    assert client.post("/wallets", headers=headers).status_code == 201
+
+
 def test_get_wallet_by_address_success(client: TestClient) -> None:
     email = "test@example.com"
     request_data = {"email": email}
@@ -67,6 +83,39 @@ def test_get_wallet_by_address_success(client: TestClient) -> None:
     assert "wallet" in response.json()
 
 
+def test_get_wallet_by_address_in_several_currencies(client: TestClient) -> None:
+    user_response = client.post("/users", json={"email": "test@example.com"})
+    wallet_response = client.post("/wallets", headers=user_response.json()["user"])
+    wallet = wallet_response.json()["wallet"]
+
+    response = client.get(
+        f"/wallets/{wallet['public_key']}",
+        params={"currencies": "eur,USD"},
+        headers=user_response.json()["user"],
+    )
+
+    assert response.status_code == 200
+    assert response.json()["wallet"]["balances"] == {
+        "EUR": wallet["btc_balance"] * STUB_BTC_RATES["EUR"],
+        "USD": wallet["btc_balance"] * STUB_BTC_RATES["USD"],
+    }
+
+
+def test_get_wallet_by_address_unknown_currency(client: TestClient) -> None:
+    user_response = client.post("/users", json={"email": "test@example.com"})
+    wallet_response = client.post("/wallets", headers=user_response.json()["user"])
+    public_key = wallet_response.json()["wallet"]["public_key"]
+
+    response = client.get(
+        f"/wallets/{public_key}",
+        params={"currencies": "XYZ"},
+        headers=user_response.json()["user"],
+    )
+
+    assert response.status_code == 415
+    assert response.json() == {"error": {"message": "conversion of btc to xyz failed."}}
+
+
 def test_get_wallet_by_address_user_not_found(client: TestClient) -> None:
     response = client.get(
         f"/wallets/{str(uuid.uuid4())}",
@@ -194,3 +243,81 @@ def test_get_wallet_transactions_invalid_owner(client: TestClient) -> None:
             "does not belong to the correct owner."
         }
     }
+
+
+def test_get_wallet_transactions_in_pages(client: TestClient) -> None:
+    user_response = client.post("/users", json={"email": "test@example.com"})
+    headers = user_response.json()["user"]
+    from_key = client.post("/wallets", headers=headers).json()["wallet"]["public_key"]
+    to_key = client.post("/wallets", headers=headers).json()["wallet"]["public_key"]
+    for _ in range(3):
+        client.post(
+            "/transactions",
+            json={"from_key": from_key, "to_key": to_key, "amount": 0.1},
+            headers=headers,
+        )
+
+    pages = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        response = client.get(
+            f"/wallets/{from_key}/transactions", params=params, headers=headers
+        )
+        assert response.status_code == 200
+        pages.append(response.json()["transactions"])
+        if response.json()["next_cursor"] is None:
+            break
+        params["after"] = response.json()["next_cursor"]
+
+    assert [len(page) for page in pages] == [2, 1]
+
+
+def test_get_wallet_transactions_invalid_cursor(client: TestClient) -> None:
+    user_response = client.post("/users", json={"email": "test@example.com"})
+    headers = user_response.json()["user"]
+    public_key = client.post("/wallets", headers=headers).json()["wallet"]["public_key"]
+
+    response = client.get(
+        f"/wallets/{public_key}/transactions",
+        params={"after": "not-a-cursor"},
+        headers=headers,
+    )
+
+    assert response.status_code == 422
+    assert response.json() == {"error": {"message": "Invalid cursor <not-a-cursor>."}}
+
+
+def test_export_wallet_transactions(client: TestClient) -> None:
+    user_response = client.post("/users", json={"email": "test@example.com"})
+    headers = user_response.json()["user"]
+    from_key = client.post("/wallets", headers=headers).json()["wallet"]["public_key"]
+    to_key = client.post("/wallets", headers=headers).json()["wallet"]["public_key"]
+    for _ in range(3):
+        client.post(
+            "/transactions",
+            json={"from_key": from_key, "to_key": to_key, "amount": 0.1},
+            headers=headers,
+        )
+
+    response = client.get(f"/wallets/{from_key}/transactions/export", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert len(items) == 3
+    assert [item["from_key"] for item in items] == [from_key] * 3
+    assert [item["amount"] for item in items] == [0.1] * 3
+
+
+def test_export_wallet_transactions_invalid_owner(client: TestClient) -> None:
+    owner = client.post("/users", json={"email": "owner@example.com"})
+    other = client.post("/users", json={"email": "other@example.com"})
+    public_key = client.post("/wallets", headers=owner.json()["user"]).json()["wallet"][
+        "public_key"
+    ]
+
+    response = client.get(
+        f"/wallets/{public_key}/transactions/export", headers=other.json()["user"]
+    )
+
+    assert response.status_code == 409
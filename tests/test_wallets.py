@@ -1,13 +1,30 @@
+import threading
+from itertools import islice
+from math import ceil
+from pathlib import Path
 from uuid import UUID, uuid4
 
 import pytest
 
-from constants import TEST_DB_PATH
-from core.errors import InvalidOwnerError, SameWalletsError, WalletDoesNotExistError
+from constants import TEST_DB_PATH, TRANSACTIONS_EXPORT_CHUNK_SIZE, TRANSFER_FEE, USD
+from core.errors import (
+    InvalidOwnerError,
+    NotEnoughBalanceError,
+    SameWalletsError,
+    WalletDoesNotExistError,
+)
 from core.transaction import Transaction
-from core.wallet import Wallet, WalletRepository
+from core.transaction_statistic import (
+    TransactionStatistic,
+    TransactionStatisticRepository,
+)
+from core.wallet import Wallet, WalletHeader, WalletRepository
+from infra.in_memory.transaction_statistic_in_memory import TransactionStatisticInMemory
 from infra.in_memory.wallet_in_memory import WalletInMemory
 from infra.sqlite.database_sqlite import SqliteDatabase
+from infra.sqlite.migration_sqlite import convert_keys, migrate
+from infra.sqlite.rate_history_sqlite import RateHistorySqlite
+from infra.sqlite.transaction_statistic_sqlite import TransactionStatisticSqlite
 from infra.sqlite.wallet_sqlite import WalletSqlite
 
 
@@ -60,6 +77,19 @@ def test_wallet_add_transaction() -> None:
     assert wallet.get_transactions()[0] == transaction
 
 
+def test_wallet_header_get() -> None:
+    public_key = uuid4()
+    private_key = uuid4()
+    balance = 3
+
+    header = WalletHeader(public_key, private_key, balance)
+
+    assert header.get_public_key() == public_key
+    assert header.get_private_key() == private_key
+    assert header.get_balance() == balance
+    assert isinstance(Wallet(), WalletHeader)
+
+
 def test_wallet_repo_create_and_get(repo: WalletRepository = WalletInMemory()) -> None:
     wallet = Wallet()
 
@@ -86,6 +116,44 @@ def test_wallet_repo_get_wallet(repo: WalletRepository = WalletInMemory()) -> No
     assert repo.get_wallet(user_key, wallet.get_public_key()) == wallet
 
 
+def test_wallet_repo_get_header(repo: WalletRepository = WalletInMemory()) -> None:
+    user_key = uuid4()
+    wallet = Wallet(private_key=user_key, balance=7)
+    repo.create(wallet)
+
+    header = repo.get_wallet_header(user_key, wallet.get_public_key())
+
+    assert header.get_public_key() == wallet.get_public_key()
+    assert header.get_private_key() == user_key
+    assert header.get_balance() == 7
+    assert repo.get_header(wallet.get_public_key()).get_balance() == 7
+
+    other_user_key = uuid4()
+    with pytest.raises(InvalidOwnerError, match=str(other_user_key)):
+        repo.get_wallet_header(other_user_key, wallet.get_public_key())
+
+    unknown_key = uuid4()
+    with pytest.raises(WalletDoesNotExistError, match=str(unknown_key)):
+        repo.get_header(unknown_key)
+
+
+def test_wallet_repo_update_balance(repo: WalletRepository = WalletInMemory()) -> None:
+    wallet = Wallet(balance=10)
+    repo.create(wallet)
+
+    repo.update_balance(wallet.get_public_key(), 5)
+    repo.update_balance(wallet.get_public_key(), -15)
+    assert repo.get_header(wallet.get_public_key()).get_balance() == 0
+
+    with pytest.raises(NotEnoughBalanceError, match=str(wallet.get_public_key())):
+        repo.update_balance(wallet.get_public_key(), -1)
+    assert repo.get_header(wallet.get_public_key()).get_balance() == 0
+
+    unknown_key = uuid4()
+    with pytest.raises(WalletDoesNotExistError, match=str(unknown_key)):
+        repo.update_balance(unknown_key, 1)
+
+
 def test_wallet_repo_should_not_get_wallet_of_diff_user(
     repo: WalletRepository = WalletInMemory(),
 ) -> None:
@@ -142,6 +210,282 @@ def test_wallet_repo_add_and_get_transaction(
     assert repo.get_transactions(user_key, from_key) == [transaction]
 
 
+def test_wallet_repo_transfer(
+    repo: WalletRepository = WalletInMemory(),
+    statistics: TransactionStatisticRepository = TransactionStatisticInMemory(),
+) -> None:
+    balance = 1000
+    wallet1 = Wallet(balance=balance)
+    wallet2 = Wallet(balance=0)
+    repo.create(wallet1)
+    repo.create(wallet2)
+
+    amount = 100
+    transaction = Transaction(
+        private_key=wallet1.get_private_key(),
+        from_key=wallet1.get_public_key(),
+        to_key=wallet2.get_public_key(),
+        amount=amount,
+    )
+
+    statistic = repo.transfer(transaction, statistics)
+
+    profit = ceil(amount * TRANSFER_FEE)
+    assert statistic.get_profit() == profit
+    assert statistics.get(statistic.get_key()) == statistic
+    assert repo.get(wallet1.get_public_key()).get_balance() == (
+        balance - amount - profit
+    )
+    assert repo.get(wallet2.get_public_key()).get_balance() == amount
+    assert repo.get_transactions(
+        wallet1.get_private_key(), wallet1.get_public_key()
+    ) == [transaction]
+
+
+def test_wallet_repo_transfer_not_enough_balance(
+    repo: WalletRepository = WalletInMemory(),
+    statistics: TransactionStatisticRepository = TransactionStatisticInMemory(),
+) -> None:
+    wallet1 = Wallet(balance=100)
+    wallet2 = Wallet()
+    repo.create(wallet1)
+    repo.create(wallet2)
+
+    transaction = Transaction(
+        private_key=wallet1.get_private_key(),
+        from_key=wallet1.get_public_key(),
+        to_key=wallet2.get_public_key(),
+        amount=100,
+    )
+
+    with pytest.raises(NotEnoughBalanceError, match=str(wallet1.get_public_key())):
+        repo.transfer(transaction, statistics)
+
+    assert repo.get(wallet1.get_public_key()).get_balance() == 100
+    assert repo.get(wallet2.get_public_key()).get_transactions() == []
+    assert statistics.get_statistics().get_transactions_number() == 0
+
+
+def test_wallet_repo_transfer_many(
+    repo: WalletRepository = WalletInMemory(),
+    statistics: TransactionStatisticRepository = TransactionStatisticInMemory(),
+) -> None:
+    user_key = uuid4()
+    wallet1 = Wallet(private_key=user_key, balance=1000)
+    wallet2 = Wallet(private_key=user_key, balance=0)
+    wallet3 = Wallet(balance=0)
+    for wallet in (wallet1, wallet2, wallet3):
+        repo.create(wallet)
+
+    def transfer(from_wallet: Wallet, to_key: UUID, amount: int) -> Transaction:
+        return Transaction(
+            private_key=user_key,
+            from_key=from_wallet.get_public_key(),
+            to_key=to_key,
+            amount=amount,
+        )
+
+    unknown_key = uuid4()
+    transactions = [
+        transfer(wallet1, wallet2.get_public_key(), 600),
+        transfer(wallet1, wallet3.get_public_key(), 300),
+        transfer(wallet1, wallet3.get_public_key(), 100),
+        transfer(wallet2, wallet3.get_public_key(), 200),
+        transfer(wallet3, wallet1.get_public_key(), 1),
+        transfer(wallet1, unknown_key, 1),
+        transfer(wallet2, wallet2.get_public_key(), 1),
+    ]
+
+    results = repo.transfer_many(transactions, statistics)
+
+    profit = ceil(300 * TRANSFER_FEE)
+    assert [type(result) for result in results] == [
+        TransactionStatistic,
+        TransactionStatistic,
+        NotEnoughBalanceError,
+        TransactionStatistic,
+        InvalidOwnerError,
+        WalletDoesNotExistError,
+        SameWalletsError,
+    ]
+    assert isinstance(results[5], WalletDoesNotExistError)
+    assert results[5].args == (unknown_key,)
+    assert repo.get(wallet1.get_public_key()).get_balance() == 100 - profit
+    assert repo.get(wallet2.get_public_key()).get_balance() == (
+        600 - 200 - ceil(200 * TRANSFER_FEE)
+    )
+    assert repo.get(wallet3.get_public_key()).get_balance() == 500
+    assert repo.get_user_transactions(user_key) == [
+        transactions[0],
+        transactions[1],
+        transactions[3],
+    ]
+    assert statistics.get_statistics().get_transactions_number() == 3
+    assert statistics.get_statistics().get_platform_profit() == profit + ceil(
+        200 * TRANSFER_FEE
+    )
+
+
+def test_wallet_repo_payout(
+    repo: WalletRepository = WalletInMemory(),
+    statistics: TransactionStatisticRepository = TransactionStatisticInMemory(),
+) -> None:
+    user_key = uuid4()
+    source = Wallet(private_key=user_key, balance=1000)
+    own = Wallet(private_key=user_key, balance=0)
+    foreign = Wallet(balance=0)
+    for wallet in (source, own, foreign):
+        repo.create(wallet)
+    legs = [
+        (own.get_public_key(), 100),
+        (foreign.get_public_key(), 200),
+        (foreign.get_public_key(), 300),
+    ]
+
+    transactions = repo.payout(user_key, source.get_public_key(), legs, statistics)
+
+    fees = ceil(200 * TRANSFER_FEE) + ceil(300 * TRANSFER_FEE)
+    assert [
+        (transaction.get_to_key(), transaction.get_amount())
+        for transaction in transactions
+    ] == legs
+    assert repo.get(source.get_public_key()).get_balance() == 1000 - 600 - fees
+    assert repo.get(own.get_public_key()).get_balance() == 100
+    assert repo.get(foreign.get_public_key()).get_balance() == 500
+    assert statistics.get_statistics().get_platform_profit() == fees
+    assert len(repo.get_transactions(user_key, source.get_public_key())) == 3
+
+    with pytest.raises(NotEnoughBalanceError, match=str(source.get_public_key())):
+        repo.payout(
+            user_key,
+            source.get_public_key(),
+            [(own.get_public_key(), 1), (foreign.get_public_key(), 1000)],
+            statistics,
+        )
+    unknown_key = uuid4()
+    with pytest.raises(WalletDoesNotExistError, match=str(unknown_key)):
+        repo.payout(
+            user_key,
+            source.get_public_key(),
+            [(own.get_public_key(), 1), (unknown_key, 1)],
+            statistics,
+        )
+    with pytest.raises(InvalidOwnerError):
+        repo.payout(
+            uuid4(), source.get_public_key(), [(own.get_public_key(), 1)], statistics
+        )
+    assert repo.get(source.get_public_key()).get_balance() == 1000 - 600 - fees
+    assert repo.get(own.get_public_key()).get_balance() == 100
+    assert statistics.get_statistics().get_transactions_number() == 3
+
+
+def test_wallet_repo_get_transactions_pages(
+    repo: WalletRepository = WalletInMemory(),
+) -> None:
+    wallet1 = Wallet(balance=100)
+    wallet2 = Wallet()
+    repo.create(wallet1)
+    repo.create(wallet2)
+    user_key = wallet1.get_private_key()
+    wallet_key = wallet1.get_public_key()
+    transactions = [
+        Transaction(
+            private_key=user_key,
+            from_key=wallet_key,
+            to_key=wallet2.get_public_key(),
+            created_at=created_at,
+        )
+        for created_at in (30, 10, 20, 20, 40)
+    ]
+    for transaction in transactions:
+        repo.add_transaction(transaction)
+    ordered = sorted(transactions, key=Transaction.get_cursor)
+
+    first = repo.get_transactions(user_key, wallet_key, 2)
+    second = repo.get_transactions(user_key, wallet_key, 2, first[-1].get_cursor())
+    rest = repo.get_transactions(user_key, wallet_key, after=second[-1].get_cursor())
+
+    assert first + second + rest == ordered
+    assert repo.get_transactions(user_key, wallet_key) == ordered
+    assert (
+        repo.get_transactions(user_key, wallet_key, 2, ordered[-1].get_cursor()) == []
+    )
+    with pytest.raises(InvalidOwnerError):
+        repo.get_transactions(uuid4(), wallet_key, 2)
+
+
+def test_wallet_repo_get_user_transactions(
+    repo: WalletRepository = WalletInMemory(),
+) -> None:
+    user_key = uuid4()
+    wallet1 = Wallet(private_key=user_key, balance=100)
+    wallet2 = Wallet(private_key=user_key)
+    wallet3 = Wallet()
+    for wallet in (wallet1, wallet2, wallet3):
+        repo.create(wallet)
+    own = Transaction(
+        private_key=user_key,
+        from_key=wallet1.get_public_key(),
+        to_key=wallet2.get_public_key(),
+        created_at=20,
+    )
+    outgoing = Transaction(
+        private_key=user_key,
+        from_key=wallet2.get_public_key(),
+        to_key=wallet3.get_public_key(),
+        created_at=10,
+    )
+    incoming = Transaction(
+        private_key=wallet3.get_private_key(),
+        from_key=wallet3.get_public_key(),
+        to_key=wallet1.get_public_key(),
+        created_at=30,
+    )
+    for transaction in (own, outgoing, incoming):
+        repo.add_transaction(transaction)
+
+    first = repo.get_user_transactions(user_key, 2)
+    rest = repo.get_user_transactions(user_key, 2, first[-1].get_cursor())
+
+    assert first == [outgoing, own]
+    assert rest == [incoming]
+    assert repo.get_user_transactions(user_key) == [outgoing, own, incoming]
+    assert repo.get_user_transactions(wallet3.get_private_key()) == [
+        outgoing,
+        incoming,
+    ]
+    assert repo.get_user_transactions(uuid4()) == []
+
+
+def test_wallet_repo_export_transactions(
+    repo: WalletRepository = WalletInMemory(),
+) -> None:
+    user_key = uuid4()
+    wallet1 = Wallet(private_key=user_key, balance=100)
+    wallet2 = Wallet(private_key=user_key)
+    repo.create(wallet1)
+    repo.create(wallet2)
+    transactions = [
+        Transaction(
+            private_key=user_key,
+            from_key=wallet1.get_public_key(),
+            to_key=wallet2.get_public_key(),
+            created_at=created_at,
+        )
+        for created_at in (20, 10, 30)
+    ]
+    for transaction in transactions:
+        repo.add_transaction(transaction)
+    ordered = sorted(transactions, key=Transaction.get_cursor)
+
+    assert list(repo.export_transactions(user_key, wallet2.get_public_key())) == (
+        ordered
+    )
+    assert list(repo.export_user_transactions(user_key)) == ordered
+    with pytest.raises(InvalidOwnerError):
+        repo.export_transactions(uuid4(), wallet1.get_public_key())
+
+
 def test_wallet_sqlite_create_and_get() -> None:
     sqlite_database = SqliteDatabase(TEST_DB_PATH)
     repo = WalletSqlite(sqlite_database)
@@ -163,6 +507,40 @@ def test_wallet_sqlite_get_wallet() -> None:
     repo.clear()
 
 
+def test_wallet_sqlite_get_header() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    test_wallet_repo_get_header(repo)
+    repo.clear()
+
+
+def test_wallet_sqlite_update_balance() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    test_wallet_repo_update_balance(repo)
+    repo.clear()
+
+
+def test_wallet_sqlite_update_balance_does_not_lose_concurrent_updates() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    wallet = Wallet(balance=0)
+    repo.create(wallet)
+
+    def deposit() -> None:
+        for _ in range(25):
+            repo.update_balance(wallet.get_public_key(), 1)
+
+    threads = [threading.Thread(target=deposit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert repo.get_header(wallet.get_public_key()).get_balance() == 200
+    repo.clear()
+
+
 def test_wallet_sqlite_should_not_get_wallet_of_diff_user() -> None:
     sqlite_database = SqliteDatabase(TEST_DB_PATH)
     repo = WalletSqlite(sqlite_database)
@@ -189,3 +567,196 @@ def test_wallet_sqlite_add_and_get_transaction() -> None:
     repo = WalletSqlite(sqlite_database)
     test_wallet_repo_add_and_get_transaction(repo)
     repo.clear()
+
+
+def test_wallet_sqlite_transfer() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    test_wallet_repo_transfer(repo, statistics)
+    repo.clear()
+    statistics.clear()
+
+
+def test_wallet_sqlite_transfer_many() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    test_wallet_repo_transfer_many(repo, statistics)
+    repo.clear()
+    statistics.clear()
+
+
+def test_wallet_sqlite_payout() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    test_wallet_repo_payout(repo, statistics)
+    repo.clear()
+    statistics.clear()
+
+
+def test_wallet_sqlite_transfer_not_enough_balance() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    test_wallet_repo_transfer_not_enough_balance(repo, statistics)
+    repo.clear()
+    statistics.clear()
+
+
+def test_wallet_sqlite_transfer_group_commit() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, group_commit_size=8)
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    test_wallet_repo_transfer(repo, statistics)
+    repo.clear()
+    statistics.clear()
+    test_wallet_repo_transfer_not_enough_balance(repo, statistics)
+    repo.clear()
+    statistics.clear()
+    sqlite_database.close()
+
+
+def test_wallet_sqlite_concurrent_transfers_are_grouped() -> None:
+    sqlite_database = SqliteDatabase(
+        TEST_DB_PATH, group_commit_size=8, group_commit_window=0.05
+    )
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    wallet1 = Wallet(balance=10_000)
+    wallet2 = Wallet(balance=0)
+    repo.create(wallet1)
+    repo.create(wallet2)
+    transactions = [
+        Transaction(
+            private_key=wallet1.get_private_key(),
+            from_key=wallet1.get_public_key(),
+            to_key=wallet2.get_public_key(),
+            amount=100,
+        )
+        for _ in range(20)
+    ]
+    group_commit = sqlite_database.group_commit
+    assert group_commit is not None
+    statements = group_commit.get_statements()
+    batches = group_commit.get_batches()
+
+    threads = [
+        threading.Thread(target=repo.transfer, args=(transaction, statistics))
+        for transaction in transactions
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert group_commit.get_statements() - statements == 20
+    assert group_commit.get_batches() - batches < 20
+    assert repo.get(wallet2.get_public_key()).get_balance() == 2_000
+    assert statistics.get_statistics().get_transactions_number() == 20
+    repo.clear()
+    statistics.clear()
+    sqlite_database.close()
+
+
+def test_wallet_sqlite_get_transactions_pages() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    test_wallet_repo_get_transactions_pages(repo)
+    repo.clear()
+
+
+def test_wallet_sqlite_get_user_transactions() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    test_wallet_repo_get_user_transactions(repo)
+    repo.clear()
+
+
+def test_wallet_sqlite_export_transactions() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    test_wallet_repo_export_transactions(repo)
+    repo.clear()
+
+
+def test_wallet_sqlite_export_leaves_pool_free_between_pages() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH, pool_size=1, pool_timeout=0.1)
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+    rate_history = RateHistorySqlite(sqlite_database)
+    wallet1 = Wallet(balance=10_000)
+    wallet2 = Wallet()
+    repo.create(wallet1)
+    repo.create(wallet2)
+    count = TRANSACTIONS_EXPORT_CHUNK_SIZE + 100
+    transactions = [
+        Transaction(
+            private_key=wallet1.get_private_key(),
+            from_key=wallet1.get_public_key(),
+            to_key=wallet2.get_public_key(),
+            amount=1,
+        )
+        for _ in range(count)
+    ]
+    repo.transfer_many(transactions, statistics)
+
+    rows = repo.export_transactions(wallet1.get_private_key(), wallet1.get_public_key())
+    exported = []
+    chunk = list(islice(rows, TRANSACTIONS_EXPORT_CHUNK_SIZE))
+    while len(chunk) > 0:
+        # The export endpoints value every chunk while the export is still open.
+        rate_history.get_rates_at(
+            USD, [transaction.get_created_at() for transaction in chunk]
+        )
+        exported.extend(chunk)
+        chunk = list(islice(rows, TRANSACTIONS_EXPORT_CHUNK_SIZE))
+
+    assert len(exported) == count
+    assert {transaction.get_key() for transaction in exported} == {
+        transaction.get_key() for transaction in transactions
+    }
+    repo.clear()
+    statistics.clear()
+    sqlite_database.close()
+
+
+def test_wallet_sqlite_get_query_count_does_not_grow_with_history() -> None:
+    sqlite_database = SqliteDatabase(TEST_DB_PATH)
+    repo = WalletSqlite(sqlite_database)
+    wallet1 = Wallet(balance=100)
+    wallet2 = Wallet()
+    repo.create(wallet1)
+    repo.create(wallet2)
+
+    def count_queries() -> int:
+        before = sqlite_database.get_query_count()
+        repo.get(wallet1.get_public_key())
+        return sqlite_database.get_query_count() - before
+
+    assert count_queries() == 1
+
+    for _ in range(10):
+        transaction = Transaction(
+            private_key=wallet1.get_private_key(),
+            from_key=wallet1.get_public_key(),
+            to_key=wallet2.get_public_key(),
+        )
+        repo.add_transaction(transaction)
+
+    assert count_queries() == 1
+    assert len(repo.get(wallet1.get_public_key()).get_transactions()) == 10
+    repo.clear()
+
+
+def test_wallet_sqlite_blob_keys(tmp_path: Path) -> None:
+    sqlite_database = SqliteDatabase(str(tmp_path / "blob.db"))
+    migrate(sqlite_database)
+    convert_keys(sqlite_database, "blob")
+    repo = WalletSqlite(sqlite_database)
+    statistics = TransactionStatisticSqlite(sqlite_database)
+
+    test_wallet_repo_create_and_get(repo)
+    test_wallet_repo_get_header(repo)
+    test_wallet_repo_transfer(repo, statistics)